@@ -0,0 +1,178 @@
+// Clientside renderers for the components that only need counts and means.
+// They read the compact aggregate table shipped once in the 'aggregate-store'
+// dcc.Store, so switching the group-by or sample size needs no server round trip.
+
+(function () {
+    function component(type, props) {
+        return {type: type, namespace: 'dash_html_components', props: props};
+    }
+
+    function formatCount(n) {
+        return n.toLocaleString('en-US');
+    }
+
+    function sampleEntry(aggregates, sampleSize) {
+        if (!aggregates) {
+            return null;
+        }
+        return aggregates.samples[String(sampleSize)] || null;
+    }
+
+    function message(text) {
+        return component('Div', {children: text, style: {color: '#666'}});
+    }
+
+    function summaryItem(value, label, color) {
+        return component('Div', {
+            children: [
+                component('H4', {children: value, style: {color: color, margin: '0', fontSize: '23px'}}),
+                component('P', {children: label, style: {color: '#666', margin: '5px 0', fontSize: '23px'}})
+            ],
+            style: {textAlign: 'center', padding: '10px', width: '33.33%'}
+        });
+    }
+
+    function renderSummary(aggregates, sampleSize) {
+        var entry = sampleEntry(aggregates, sampleSize);
+        if (!entry) {
+            return window.dash_clientside.no_update;
+        }
+        var total = entry.total;
+        var satisfaction = total.n ? total.satisfied / total.n * 100 : 0;
+        var service = total.n ? total.service_sum / total.n : 0;
+        return [
+            summaryItem(formatCount(total.n), 'Total Passengers', '#d32f2f'),
+            summaryItem(satisfaction.toFixed(1) + '%', 'Satisfaction Rate', '#4caf50'),
+            summaryItem(service.toFixed(2) + '/5.0', 'Avg Service Score', '#2196f3')
+        ];
+    }
+
+    function renderDistribution(aggregates, sampleSize, groupCol) {
+        var entry = sampleEntry(aggregates, sampleSize);
+        if (!entry) {
+            return window.dash_clientside.no_update;
+        }
+        var group = entry.groups[groupCol];
+        if (!group) {
+            return {
+                data: [],
+                layout: {
+                    title: {text: 'Distribution Chart'},
+                    height: 300,
+                    showlegend: false,
+                    annotations: [{
+                        text: "Column '" + groupCol + "' not found in dataset",
+                        xref: 'paper', yref: 'paper', x: 0.5, y: 0.5,
+                        xanchor: 'center', yanchor: 'middle',
+                        showarrow: false, font: {size: 16}
+                    }]
+                }
+            };
+        }
+        return {
+            data: [{
+                type: 'pie',
+                labels: group.labels,
+                values: group.n,
+                hole: 0.4,
+                textinfo: 'percent',
+                textposition: 'outside',
+                textfont: {size: 16},
+                marker: {
+                    colors: aggregates.colors.slice(0, group.n.length),
+                    line: {color: '#FFFFFF', width: 3}
+                },
+                sort: false
+            }],
+            layout: {
+                title: {
+                    text: 'Distribution',
+                    x: 0.5,
+                    xanchor: 'center',
+                    font: {size: 22, color: '#1a237e', family: 'Arial, sans-serif'}
+                },
+                height: 400,
+                margin: {t: 40, b: 80, l: 20, r: 20},
+                font: {size: 20},
+                showlegend: true,
+                legend: {
+                    orientation: 'h',
+                    font: {size: 20},
+                    x: 0.5,
+                    y: -0.1,
+                    xanchor: 'center',
+                    yanchor: 'top'
+                }
+            }
+        };
+    }
+
+    function renderSubgroupHeader(aggregates, sampleSize, groupCol, options, selected, accuracyInfo) {
+        var entry = sampleEntry(aggregates, sampleSize);
+        if (!entry) {
+            return window.dash_clientside.no_update;
+        }
+        var group = entry.groups[groupCol];
+        if (!group) {
+            return message('No subgroup data available');
+        }
+        if (!selected && options && options.length) {
+            selected = options[0].value;
+        }
+        var index = group.values.indexOf(selected);
+        if (index < 0) {
+            index = group.values.length ? 0 : -1;
+        }
+        if (index < 0) {
+            return message('No subgroup selected');
+        }
+        selected = group.values[index];
+        var n = group.n[index];
+        if (!n) {
+            return message('No data for ' + selected);
+        }
+
+        var spans = [
+            component('Span', {
+                children: 'Passengers: ' + formatCount(n),
+                style: {marginRight: '15px', fontSize: '18px', color: '#d32f2f'}
+            }),
+            component('Span', {
+                children: 'Satisfaction: ' + (group.satisfied[index] / n * 100).toFixed(1) + '%',
+                style: {marginRight: '15px', fontSize: '18px', color: '#4caf50'}
+            }),
+            component('Span', {
+                children: 'Avg Service: ' + (group.service_sum[index] / n).toFixed(2) + '/5.0',
+                style: {fontSize: '18px', color: '#2196f3'}
+            })
+        ];
+        // accuracy comes from the background Random Forest job once it matches this selection
+        if (accuracyInfo && accuracyInfo.accuracy !== null &&
+                accuracyInfo.group_col === groupCol &&
+                accuracyInfo.subgroup === selected &&
+                String(accuracyInfo.sample_size) === String(sampleSize)) {
+            spans.push(component('Span', {
+                children: 'Accuracy: ' + (accuracyInfo.accuracy * 100).toFixed(1) + '%',
+                style: {fontSize: '18px', color: '#000', marginLeft: '15px'}
+            }));
+        }
+
+        return component('Div', {
+            children: [
+                component('H6', {
+                    children: 'Analysis for ' + selected,
+                    style: {color: '#1a237e', marginBottom: '8px', fontWeight: 'bold', fontSize: '20px'}
+                }),
+                component('Div', {children: spans})
+            ]
+        });
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        airline: {
+            renderSummary: renderSummary,
+            renderDistribution: renderDistribution,
+            renderSubgroupHeader: renderSubgroupHeader
+        }
+    });
+})();
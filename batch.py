@@ -0,0 +1,74 @@
+"""
+Compute every subgroup result the dashboard shows without running it, e.g.
+
+    python batch.py --output batch_results
+    python batch.py --data dataset/partitioned --format parquet --workers 8 --output /data/nightly
+
+For every subgroup column, value and sample size: passenger count, satisfaction rate and
+mean service score, Random Forest importances with accuracy and the rating distribution
+of every service attribute; per sample size the k-means cluster profiles and the cluster
+split of every subgroup value. Tasks run on one process per CPU (--workers).
+
+Start the dashboard with AIRLINE_BATCH_RESULTS=<output> and, as long as the data has not
+changed since, it fills the Service Factor Rankings from these results and fits k-means
+with the k found here instead of sweeping for it.
+"""
+import argparse
+import sys
+import time
+
+from modules.Batch import run_batch, write_batch_results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compute all subgroup results of the dashboard headless')
+    parser.add_argument('--data', default='dataset/data2.csv', help='survey file or partitioned dataset directory')
+    parser.add_argument('--output', default='batch_results', help='directory for the manifest and tables')
+    parser.add_argument('--format', choices=['json', 'parquet'], default='json', help='table format (parquet needs pyarrow)')
+    parser.add_argument('--sample-sizes', default='1000,5000,-1', help='comma separated sample sizes, -1 for all rows')
+    parser.add_argument('--group-cols', default='', help='comma separated subgroup columns (default: the dashboard\'s)')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: one per CPU)')
+    args = parser.parse_args(argv)
+    if args.format == 'parquet':
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            print("--format parquet needs pyarrow; install it or use --format json")
+            return 2
+
+    from project import load_dataset, dataset_fingerprint, subgroup_options_for
+    from modules.Partitions import partition_keys
+    loaded = load_dataset(args.data)
+    if loaded is None:
+        return 2
+    df, service_attributes, _, partitions = loaded
+
+    if args.group_cols:
+        group_cols = [col.strip() for col in args.group_cols.split(',') if col.strip()]
+    else:
+        keys = partition_keys(partitions[0]) if partitions else ()
+        group_cols = [option['value'] for option in subgroup_options_for(df, keys)]
+    missing = [col for col in group_cols if col not in df.columns]
+    if missing:
+        print(f"Unknown subgroup columns: {missing}")
+        return 2
+    sample_sizes = [int(size) for size in args.sample_sizes.split(',') if size.strip()]
+
+    tables, summaries = run_batch(df, service_attributes, group_cols, sample_sizes, workers=args.workers)
+    manifest = {
+        'data_version': dataset_fingerprint(df),
+        'source': args.data,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'n_rows': len(df),
+        'group_cols': group_cols,
+        'sample_sizes': sample_sizes,
+        'service_attributes': service_attributes,
+        'summary': summaries
+    }
+    write_batch_results(args.output, manifest, tables, fmt=args.format)
+    print(f"Results written to {args.output} ({', '.join(f'{name}: {len(rows)} rows' for name, rows in tables.items())})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""
+Benchmark the pipeline stages at growing dataset sizes, e.g.
+
+    python benchmark.py --sizes full,100k,1m,10m --output benchmarks/latest.json
+    python benchmark.py --sizes full,100k --baseline benchmarks/baseline.json
+
+Larger sizes are the bundled survey resampled with replacement, or drawn from the
+synthetic generator with --synthetic. Results are written as
+JSON; with --baseline the run is compared against an earlier result file and the exit
+code is 1 when a stage regressed.
+"""
+import argparse
+import os
+import sys
+
+# a figure over its byte budget fails the benchmark run; a server only logs it
+os.environ.setdefault('AIRLINE_PAYLOAD_STRICT', '1')
+
+from modules.Benchmark import (run_benchmarks, compare_to_baseline, save_report, load_report,
+                               print_regressions, STAGE_ROW_LIMITS, REGRESSION_THRESHOLD)
+
+DEFAULT_SIZES = 'full,100k,1m,10m'
+
+
+def parse_size(text):
+    """
+    '26k' -> 26000, '1m' -> 1000000; 'full' keeps the bundled data as it is
+    """
+    text = text.strip().lower()
+    if text == 'full':
+        return None
+    multiplier = {'k': 1_000, 'm': 1_000_000}.get(text[-1], 1)
+    return int(float(text.rstrip('km')) * multiplier)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the dashboard's pipeline stages")
+    parser.add_argument('--data', default='dataset/data2.csv', help='survey CSV to scale up')
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help='comma separated row counts (k/m suffixes, or full)')
+    parser.add_argument('--stages', default='', help='comma separated stage name prefixes, e.g. charts,clustering.pca')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per stage')
+    parser.add_argument('--no-memory', action='store_true', help='skip the traced peak memory run')
+    parser.add_argument('--no-limits', action='store_true', help='run every stage at every size')
+    parser.add_argument('--output', default='benchmark_results.json', help='where to write the JSON results')
+    parser.add_argument('--baseline', help='earlier result file to compare against')
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                        help='relative slowdown or memory growth that counts as a regression')
+    parser.add_argument('--synthetic', action='store_true',
+                        help='generate the datasets with modules.Synthetic instead of resampling')
+    parser.add_argument('--seed', type=int, default=42, help='seed for --synthetic')
+    parser.add_argument('--verbose', action='store_true', help='keep the output of the benchmarked code')
+    args = parser.parse_args(argv)
+
+    from project import load_and_validate_data
+    raw_df = load_and_validate_data(args.data)
+    if raw_df is None:
+        return 2
+
+    report = run_benchmarks(
+        raw_df,
+        [parse_size(size) for size in args.sizes.split(',') if size.strip()],
+        stages=[stage.strip() for stage in args.stages.split(',') if stage.strip()],
+        repeat=args.repeat,
+        measure_memory=not args.no_memory,
+        row_limits=None if args.no_limits else STAGE_ROW_LIMITS,
+        verbose=args.verbose,
+        synthetic_seed=args.seed if args.synthetic else None
+    )
+    save_report(report, args.output)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        regressions = compare_to_baseline(report, load_report(args.baseline), threshold=args.threshold)
+        report['regressions'] = regressions
+        save_report(report, args.output)
+        print_regressions(regressions)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""
+Generate a synthetic survey with the distributions of the bundled data, e.g.
+
+    python generate_data.py --rows 50m --output dataset/synthetic_50m.csv --workers 8
+    python generate_data.py --rows 10m --format parquet --output dataset/synthetic_10m
+    python generate_data.py --rows 2m --output dataset/partitioned \
+        --partition airline=AA,BA,LH --partition quarter=2024Q1,2024Q2
+
+The same --seed always produces the same rows, whatever the number of workers.
+"""
+import argparse
+import itertools
+import os
+import sys
+import time
+
+from benchmark import parse_size
+from modules.Synthetic import fit_survey_model, write_survey
+from modules.Partitions import partition_id
+
+
+def partition_combinations(specs):
+    """
+    ['airline=AA,BA', 'quarter=2024Q1'] -> [{'airline': 'AA', 'quarter': '2024Q1'}, {'airline': 'BA', ...}]
+    """
+    keys = [spec.split('=', 1) for spec in specs]
+    return [dict(zip([key for key, _ in keys], values))
+            for values in itertools.product(*[values.split(',') for _, values in keys])]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate a synthetic airline satisfaction survey')
+    parser.add_argument('--data', default='dataset/data2.csv', help='survey CSV to learn the distributions from')
+    parser.add_argument('--rows', default='1m', help='number of rows (k/m suffixes)')
+    parser.add_argument('--output', required=True, help='CSV file, or directory of part files for parquet')
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--workers', type=int, default=None, help='generator processes (default: one per CPU)')
+    parser.add_argument('--partition', action='append', default=[], metavar='KEY=V1,V2',
+                        help='write a partitioned dataset under --output, one partition per combination of values')
+    args = parser.parse_args(argv)
+    try:
+        n_rows = parse_size(args.rows)
+    except ValueError:
+        n_rows = 0
+    # 'full' means the bundled data as it is to benchmark.py, it is no row count here
+    if n_rows is None or n_rows < 1:
+        parser.error(f"--rows must be a positive row count such as 500k or 2m, not {args.rows!r}")
+    combinations = partition_combinations(args.partition) if args.partition else []
+    if len(combinations) > n_rows:
+        parser.error(f"--rows {args.rows} is fewer rows than the {len(combinations)} partitions")
+
+    from project import load_and_validate_data
+    raw_df = load_and_validate_data(args.data)
+    if raw_df is None:
+        return 2
+
+    start = time.perf_counter()
+    try:
+        model = fit_survey_model(raw_df)
+        if combinations:
+            # rows split evenly over the partitions, the first n_rows % partitions get one more;
+            # each partition is generated with its own seed and continues the previous one's
+            # ids, so passenger ids stay unique across the dataset
+            per_partition, remainder = divmod(n_rows, len(combinations))
+            first_row = 0
+            for i, keys in enumerate(combinations):
+                directory = os.path.join(args.output, partition_id(keys))
+                os.makedirs(directory, exist_ok=True)
+                path = directory if args.format == 'parquet' else os.path.join(directory, 'part-0.csv')
+                partition_rows = per_partition + (1 if i < remainder else 0)
+                write_survey(model, partition_rows, path, fmt=args.format, seed=args.seed + i,
+                             workers=args.workers, first_row=first_row)
+                first_row += partition_rows
+        else:
+            write_survey(model, n_rows, args.output, fmt=args.format, seed=args.seed, workers=args.workers)
+    except ImportError as e:
+        print(e)
+        return 2
+    seconds = time.perf_counter() - start
+    print(f"Wrote {n_rows:,} rows to {args.output} in {seconds:.1f}s ({n_rows / seconds:,.0f} rows/s)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,29 @@
+"""
+gunicorn settings for serving wsgi:server
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('AIRLINE_BIND', '0.0.0.0:8050')
+
+# load the data and models once in the master, then fork the workers
+preload_app = True
+
+workers = int(os.environ.get('AIRLINE_WORKERS', multiprocessing.cpu_count()))
+worker_class = 'gthread'
+threads = int(os.environ.get('AIRLINE_THREADS', 4))
+
+# model-training callbacks can take a while on large samples
+timeout = int(os.environ.get('AIRLINE_TIMEOUT', 120))
+
+# recycle workers now and then so pages that did get copied are returned
+max_requests = 1000
+max_requests_jitter = 100
+
+
+def post_fork(server, worker):
+    # threads do not survive the fork: every worker watches the data file; the worker that
+    # takes the rebuild lock in the shared cache rebuilds it, the others adopt the published
+    # version, and workers forked later from the master catch up on their first check
+    import wsgi
+    wsgi.app.hot_reload.watch()
@@ -1,10 +1,28 @@
 from dash import html, dcc
 import dash_bootstrap_components as dbc
 
-def create_compact_layout(subgroup_options, color_options=None, pc_dimension_options=None):
+SAMPLE_SIZE_OPTIONS = [
+    {'label': '1K', 'value': 1000},
+    {'label': '5K', 'value': 5000},
+    {'label': 'All', 'value': -1}
+]
+
+DEFAULT_PC_DIMENSIONS = ['Customer Type', 'Class', 'Type of Travel', 'Satisfaction']
+
+# how often open pages ask whether the data was reloaded, in ms
+RELOAD_POLL_INTERVAL = 30000
+
+def create_compact_layout(subgroup_options, color_options=None, pc_dimension_options=None, aggregate_data=None,
+                          warming_up=False, dataset_options=None, data_version=None, reload_poll=False):
     """
     Overall compact layout for the airline passenger satisfaction dashboard.
+    aggregate_data: compact per-group counts shipped once to the browser for the clientside summaries
+    warming_up: poll the server until the startup warm-up is done, then redraw the charts once
+    dataset_options: partitions of a partitioned dataset; the selector is hidden without them
+    data_version: version of the data the page was built from
+    reload_poll: check every RELOAD_POLL_INTERVAL ms whether the server reloaded the data
     """
+    dataset_options = dataset_options or []
     if not pc_dimension_options:
         pc_dimension_options = [
             {'label': 'Customer Type', 'value': 'Customer Type'},
@@ -27,11 +45,7 @@ def create_compact_layout(subgroup_options, color_options=None, pc_dimension_opt
                             html.Label("Sample Size", style={'fontWeight': 'bold', 'fontSize': '18px', 'display': 'inline-block', 'marginRight': '5px', 'verticalAlign': 'middle'}),
                             dcc.Dropdown(
                                 id='sample-dropdown',
-                                options=[
-                                    {'label': '1K', 'value': 1000},
-                                    {'label': '5K', 'value': 5000},
-                                    {'label': 'All', 'value': -1}
-                                ],
+                                options=SAMPLE_SIZE_OPTIONS,
                                 value=5000,
                                 clearable=False,
                                 style={
@@ -44,6 +58,23 @@ def create_compact_layout(subgroup_options, color_options=None, pc_dimension_opt
                                 }
                             )
                         ], style={'display': 'inline-block', 'verticalAlign': 'middle', 'float': 'left', 'marginTop': '15px'}),
+                        html.Div([
+                            html.Label("Dataset", style={'fontWeight': 'bold', 'fontSize': '18px', 'display': 'inline-block', 'marginRight': '5px', 'verticalAlign': 'middle'}),
+                            dcc.Dropdown(
+                                id='dataset-dropdown',
+                                options=dataset_options,
+                                value=[option['value'] for option in dataset_options],
+                                multi=True,
+                                placeholder="All partitions",
+                                style={
+                                    'width': '320px',
+                                    'fontSize': '16px',
+                                    'display': 'inline-block',
+                                    'verticalAlign': 'middle'
+                                }
+                            )
+                        ], style={'display': 'inline-block' if dataset_options else 'none', 'verticalAlign': 'middle',
+                                  'float': 'right', 'marginTop': '15px'}),
                         html.H1("Airline Passenger Satisfaction Dashboard", 
                                style={'color': '#1a237e', 'fontWeight': 'bold', 'display': 'inline-block', 'margin': '0', 'position': 'absolute', 'left': '50%', 'transform': 'translateX(-50%)'})
                     ], style={'position': 'relative', 'height': '60px', 'marginBottom': '10px'}),
@@ -205,6 +236,13 @@ def create_compact_layout(subgroup_options, color_options=None, pc_dimension_opt
                         }
                     ),
                     
+                    # accuracy of the last Random Forest run, merged into the header clientside
+                    dcc.Store(id='rf-accuracy-store'),
+                    
+                    # Progress of the background Random Forest job
+                    html.Progress(id='service-factors-progress', value='0', max='3',
+                                  style={'width': '100%', 'visibility': 'hidden'}),
+                    
                     # Service factors ranking chart
                     dcc.Graph(
                         id='service-factors-chart',
@@ -242,7 +280,7 @@ def create_compact_layout(subgroup_options, color_options=None, pc_dimension_opt
                             dcc.Dropdown(
                                 id='pc-dimensions-dropdown',
                                 options=pc_dimension_options,
-                                value=['Customer Type', 'Class', 'Type of Travel', 'Satisfaction'],
+                                value=DEFAULT_PC_DIMENSIONS,
                                 multi=True,
                                 clearable=False,
                                 maxHeight=300,
@@ -285,7 +323,8 @@ def create_compact_layout(subgroup_options, color_options=None, pc_dimension_opt
                             options=[
                                 {'label': 'Passenger Clusters (PCA)', 'value': 'pca_scatter'},
                                 {'label': 'Cluster Comparison', 'value': 'cluster_comparison'},
-                                {'label': 'Service Profiles', 'value': 'cluster_profiles'}
+                                {'label': 'Service Profiles', 'value': 'cluster_profiles'},
+                                {'label': 'Density Clusters (DBSCAN)', 'value': 'dbscan_scatter'}
                             ],
                             value='pca_scatter',
                             clearable=False,
@@ -293,12 +332,19 @@ def create_compact_layout(subgroup_options, color_options=None, pc_dimension_opt
                         )
                     ], style={'marginBottom': '15px'}),
                     
+                    # Progress of the background clustering job
+                    html.Progress(id='clustering-progress', value='0', max='9',
+                                  style={'width': '100%', 'visibility': 'hidden'}),
+                    
                     # Clustering chart area
                     dcc.Graph(
                         id='clustering-chart',
                         style={'height': '280px', 'marginBottom': '15px'},
                         config={'displayModeBar': False}
-                    )
+                    ),
+                    
+                    # Hover detail, fetched on demand from the server
+                    html.Div(id='clustering-hover-detail', style={'fontSize': '18px', 'color': '#666', 'minHeight': '24px'})
                 ], className="module-container", style={
                     'width': '43%', 
                     'height': '50vh',
@@ -311,6 +357,53 @@ def create_compact_layout(subgroup_options, color_options=None, pc_dimension_opt
                     'boxShadow': '0 2px 4px rgba(0,0,0,0.1)',
                     'overflowY': 'auto'
                 })
+            ], style={'overflow': 'hidden'}),
+            
+            # Row 3: Flight Distance vs Delay
+            html.Div([
+                html.Div([
+                    html.H5("Flight Distance vs Delay", className="mb-3", style={'color': '#1a237e', 'fontSize': '28px', 'fontWeight': 'bold'}),
+                    html.Div([
+                        html.Label("Delay:", style={'fontWeight': 'bold', 'fontSize': '23px', 'color': '#1a237e'}),
+                        dcc.Dropdown(
+                            id='delay-scatter-column',
+                            options=[
+                                {'label': 'Departure Delay', 'value': 'Departure Delay in Minutes'},
+                                {'label': 'Arrival Delay', 'value': 'Arrival Delay in Minutes'}
+                            ],
+                            value='Departure Delay in Minutes',
+                            clearable=False,
+                            style={'fontSize': '23px', 'marginBottom': '10px'}
+                        )
+                    ], style={'marginBottom': '15px', 'width': '40%'}),
+                    
+                    # current zoom window; the chart is re-binned server-side on every zoom
+                    dcc.Store(id='delay-scatter-view'),
+                    dcc.Graph(
+                        id='delay-scatter-chart',
+                        style={'height': '400px'},
+                        config={'displayModeBar': False}
+                    )
+                ], className="module-container", style={
+                    'width': '100%',
+                    'marginTop': '1.5%',
+                    'padding': '15px',
+                    'backgroundColor': '#fff',
+                    'border': '1px solid #ddd',
+                    'borderRadius': '8px',
+                    'boxShadow': '0 2px 4px rgba(0,0,0,0.1)'
+                })
             ], style={'overflow': 'hidden'})
-        ])
+        ]),
+        
+        # counts and sums per group and sample size; summary cards, donut and header render from this
+        dcc.Store(id='aggregate-store', data=aggregate_data),
+        
+        # startup warm-up state; charts show a placeholder for combinations still being prepared
+        dcc.Store(id='warmup-status', data={'ready': not warming_up}),
+        dcc.Interval(id='warmup-interval', interval=2000, disabled=not warming_up),
+        
+        # after a hot reload the server-side charts and the aggregate store switch to the new version
+        dcc.Store(id='data-version', data=data_version),
+        dcc.Interval(id='reload-interval', interval=RELOAD_POLL_INTERVAL, disabled=not reload_poll)
     ], fluid=True, style={'padding': '20px'})
\ No newline at end of file
@@ -0,0 +1,96 @@
+"""
+Replay simulated analysts against a running dashboard and report callback latency
+as concurrency grows, e.g.
+
+    python loadtest.py --start --users 1,5,10,20 --duration 60
+    python loadtest.py --url http://127.0.0.1:8050 --users 10 --output loadtest.json
+
+Every simulated analyst loads the page and then keeps changing the group-by, sample
+size, parallel-categories dimensions, subgroup and clustering chart, firing the same
+/_dash-update-component requests the browser would. With --start a local server
+(threaded Flask, or gunicorn with --gunicorn) is started for the run and stopped after.
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+from modules.LoadTest import run_load_test
+
+SERVE_SNIPPET = (
+    "from project import build_dashboard, DEFAULT_DATA_PATH\n"
+    "import os\n"
+    "app = build_dashboard(os.environ.get('AIRLINE_DATA_PATH', DEFAULT_DATA_PATH))\n"
+    "app.warmup.start()\n"
+    "app.hot_reload.watch()\n"
+    "app.run(host='127.0.0.1', port={port}, debug=False, threaded=True)\n"
+)
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(port, gunicorn=False, timeout=300):
+    """
+    Start the dashboard in a child process and wait until it serves its layout
+    """
+    if gunicorn:
+        command = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--bind', f'127.0.0.1:{port}', 'wsgi:server']
+    else:
+        command = [sys.executable, '-c', SERVE_SNIPPET.format(port=port)]
+    process = subprocess.Popen(command, cwd=os.path.dirname(os.path.abspath(__file__)),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f'http://127.0.0.1:{port}'
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Dashboard exited with code {process.returncode} before it was ready")
+        try:
+            urllib.request.urlopen(url + '/_dash-layout', timeout=5).read()
+            return process, url
+        except OSError:
+            time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError(f"Dashboard did not come up within {timeout}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load test the dashboard callbacks')
+    parser.add_argument('--url', default='http://127.0.0.1:8050', help='dashboard to test')
+    parser.add_argument('--start', action='store_true', help='start a local dashboard for the run')
+    parser.add_argument('--gunicorn', action='store_true', help='with --start, serve through gunicorn.conf.py')
+    parser.add_argument('--users', default='1,5,10,20', help='comma separated concurrency levels')
+    parser.add_argument('--duration', type=float, default=60, help='seconds per concurrency level')
+    parser.add_argument('--think-time', type=float, default=1.0, help='mean pause between interactions in seconds')
+    parser.add_argument('--seed', type=int, default=42, help='seed for the interaction sequences')
+    parser.add_argument('--output', default='loadtest_results.json', help='where to write the JSON results')
+    args = parser.parse_args(argv)
+
+    process = None
+    url = args.url
+    if args.start:
+        process, url = start_server(_free_port(), gunicorn=args.gunicorn)
+        print(f"Dashboard started at {url}")
+    try:
+        levels = run_load_test(url, [int(users) for users in args.users.split(',') if users.strip()],
+                               args.duration, think_time=args.think_time, seed=args.seed)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+
+    with open(args.output, 'w') as f:
+        json.dump({'url': url, 'think_time': args.think_time, 'levels': levels}, f, indent=2)
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,149 @@
+import json
+import hashlib
+from modules.Batch import plain_value
+
+ARROW_MIME = 'application/vnd.apache.arrow.stream'
+JSON_MIME = 'application/json'
+# clients revalidate on every poll; unchanged tables cost a 304 without a body
+CACHE_CONTROL = 'no-cache'
+
+
+class TableNotComputed(Exception):
+    """
+    Raised by a table builder when the table only comes from an offline run that has not
+    been made for this data; answered with 503 and the message
+    """
+
+
+def summary_records(aggregates, group_cols, sample_size):
+    """
+    Passenger count, satisfaction rate and mean service score per subgroup value, read from
+    the aggregate store the dashboard sends to the browser
+    """
+    groups = aggregates['samples'][str(sample_size)]['groups']
+    records = []
+    for group_col in group_cols:
+        group = groups[group_col]
+        for i, value in enumerate(group['values']):
+            n = group['n'][i]
+            records.append({
+                'group_col': group_col,
+                'value': value,
+                # the labels are chart tick text with <br> line breaks
+                'label': str(group['labels'][i]).replace('<br>', ' '),
+                'sample_size': sample_size,
+                'n': n,
+                'satisfied': group['satisfied'][i],
+                'satisfaction_rate': group['satisfied'][i] / n * 100 if n else None,
+                'service_mean': group['service_sum'][i] / n if n else None
+            })
+    return records
+
+
+def sort_histogram_records(records, group_cols, group_values, service_attributes):
+    """
+    Histogram records from batch results in one order whatever order the batch workers wrote
+    them in: by group column, subgroup value (group_values[group_col] order), attribute and rating,
+    so equal ETags always mean equal bytes
+    """
+    positions = {group_col: {value: i for i, value in enumerate(values)} for group_col, values in group_values.items()}
+    group_index = {group_col: i for i, group_col in enumerate(group_cols)}
+    attribute_index = {attr: i for i, attr in enumerate(service_attributes)}
+
+    def key(record):
+        value_positions = positions.get(record['group_col'], {})
+        return (group_index.get(record['group_col'], len(group_index)),
+                value_positions.get(record['value'], len(value_positions)), str(record['value']),
+                attribute_index.get(record['attribute'], len(attribute_index)), record['rating'])
+    return sorted(records, key=key)
+
+
+def table_etag(data_version, table, params, fmt):
+    """
+    Tables are computed from the data alone, so the data version and the request identify the bytes
+    """
+    digest = hashlib.sha1(json.dumps([data_version, table, sorted(params.items()), fmt]).encode('utf-8'))
+    return digest.hexdigest()[:20]
+
+
+def encode_records(records, fmt):
+    if fmt == 'arrow':
+        import pyarrow as pa
+        table = pa.Table.from_pylist([{key: plain_value(value) for key, value in record.items()} for record in records])
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+    return json.dumps([{key: plain_value(value) for key, value in record.items()} for record in records]).encode('utf-8')
+
+
+def _arrow_available():
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def register_aggregate_api(server, current_state, tables, index):
+    """
+    GET /api/aggregates lists what is available, GET /api/aggregates/<table> answers with
+    tables[table](state, params) as JSON records or, with ?format=arrow or
+    Accept: application/vnd.apache.arrow.stream, an Arrow IPC stream (needs pyarrow)
+    params: group_col, sample_size and attribute from the query string; builders raise
+    LookupError for unknown values (404), ValueError for invalid ones (400), return None
+    when the table is not computed yet (503, retry) and raise TableNotComputed when it
+    needs an offline run (503)
+    Every table carries an ETag of the data version and the request, and If-None-Match
+    gets a 304 before anything is computed; encoded tables are kept in the state's
+    figure cache, so every worker encodes a table once per data version
+    """
+    from flask import request, jsonify, Response
+
+    @server.route('/api/aggregates')
+    def aggregates_index():
+        state = current_state()
+        return jsonify(dict(index(state), data_version=state.data_version, tables=sorted(tables)))
+
+    @server.route('/api/aggregates/<table>')
+    def aggregates_table(table):
+        if table not in tables:
+            return jsonify({'error': f'Unknown table {table}', 'tables': sorted(tables)}), 404
+        fmt = request.args.get('format')
+        if fmt is None:
+            fmt = 'arrow' if request.accept_mimetypes.best_match([JSON_MIME, ARROW_MIME]) == ARROW_MIME else 'json'
+        if fmt not in ('json', 'arrow'):
+            return jsonify({'error': f'Unknown format {fmt}, use json or arrow'}), 400
+        if fmt == 'arrow' and not _arrow_available():
+            return jsonify({'error': 'Arrow responses need pyarrow on the server; request JSON instead'}), 406
+
+        # one state for the whole request, like the callbacks
+        state = current_state()
+        params = {name: request.args.get(name) for name in ('group_col', 'sample_size', 'attribute')
+                  if request.args.get(name) is not None}
+        etag = table_etag(state.data_version, table, params, fmt)
+        headers = {'Cache-Control': CACHE_CONTROL, 'Vary': 'Accept', 'X-Data-Version': state.data_version}
+        if request.if_none_match.contains_weak(etag):
+            response = Response(status=304, headers=headers)
+            response.set_etag(etag)
+            return response
+
+        cache_inputs = (table, tuple(sorted(params.items())), fmt)
+        body = state.figure_cache.get('aggregate_api', cache_inputs)
+        if body is None:
+            try:
+                records = tables[table](state, params)
+            except LookupError as e:
+                return jsonify({'error': str(e.args[0] if e.args else e)}), 404
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            except TableNotComputed as e:
+                return jsonify({'error': str(e)}), 503
+            if records is None:
+                return jsonify({'error': f'{table} for these parameters are not computed yet'}), 503, {'Retry-After': '30'}
+            body = encode_records(records, fmt)
+            state.figure_cache.set('aggregate_api', cache_inputs, body)
+
+        response = Response(body, mimetype=ARROW_MIME if fmt == 'arrow' else JSON_MIME, headers=headers)
+        response.set_etag(etag)
+        return response
@@ -0,0 +1,117 @@
+import pandas as pd
+import plotly.express as px
+from utils import get_display_value
+from modules.Metrics import stage
+
+
+def get_group_values(df, group_col):
+    """
+    Group values in display order: categorical order if available, otherwise order of appearance
+    """
+    if isinstance(df[group_col].dtype, pd.CategoricalDtype):
+        return df[group_col].cat.categories.tolist()
+    return df[group_col].unique().tolist()
+
+
+def _round(value, digits):
+    return value if digits is None else round(value, digits)
+
+
+def compute_group_aggregates(df, group_col, digits=6):
+    """
+    Passenger count, satisfied count and service score sum per group value
+    Sums rather than means so aggregates can be merged and divided on the client
+    digits: rounding of the service score sums, None to keep them exact for merging
+    """
+    values = get_group_values(df, group_col)
+    satisfied = (df['satisfaction'] == 'satisfied').astype(int)
+    grouped = pd.DataFrame({
+        'n': 1,
+        'satisfied': satisfied,
+        'service_sum': df['Service_Quality_Score']
+    }).groupby(df[group_col], observed=False, sort=False).sum().reindex(values, fill_value=0)
+
+    service_sums = grouped['service_sum'].astype(float)
+    return {
+        'values': values,
+        'labels': [get_display_value(v) for v in values],
+        'n': grouped['n'].astype(int).tolist(),
+        'satisfied': grouped['satisfied'].astype(int).tolist(),
+        'service_sum': (service_sums if digits is None else service_sums.round(digits)).tolist()
+    }
+
+
+def compute_summary_aggregates(df, group_cols, digits=6):
+    """
+    Overall totals plus per-group aggregates for each of the given group columns
+    """
+    return {
+        'total': {
+            'n': int(len(df)),
+            'satisfied': int((df['satisfaction'] == 'satisfied').sum()),
+            'service_sum': _round(float(df['Service_Quality_Score'].sum()), digits)
+        },
+        'groups': {
+            col: compute_group_aggregates(df, col, digits) for col in group_cols if col in df.columns
+        }
+    }
+
+
+def merge_summary_aggregates(parts, group_cols, digits=6):
+    """
+    compute_summary_aggregates of consecutive row blocks (computed with digits=None) merged into
+    the aggregates of all their rows: counts and sums add up, group values keep the order in
+    which they first appear
+    """
+    total = {'n': 0, 'satisfied': 0, 'service_sum': 0.0}
+    groups = {}
+    for part in parts:
+        for metric in total:
+            total[metric] += part['total'][metric]
+        for col, group in part['groups'].items():
+            merged = groups.setdefault(col, {})
+            for i, value in enumerate(group['values']):
+                entry = merged.setdefault(value, {'label': group['labels'][i], 'n': 0, 'satisfied': 0, 'service_sum': 0.0})
+                entry['n'] += group['n'][i]
+                entry['satisfied'] += group['satisfied'][i]
+                entry['service_sum'] += group['service_sum'][i]
+    total['service_sum'] = _round(total['service_sum'], digits)
+    return {
+        'total': total,
+        'groups': {
+            col: {
+                'values': list(groups[col]),
+                'labels': [entry['label'] for entry in groups[col].values()],
+                'n': [entry['n'] for entry in groups[col].values()],
+                'satisfied': [entry['satisfied'] for entry in groups[col].values()],
+                'service_sum': [_round(entry['service_sum'], digits) for entry in groups[col].values()]
+            } for col in group_cols if col in groups
+        }
+    }
+
+
+@stage('aggregate', 'summary')
+def build_aggregate_store(df, group_cols, sample_sizes, random_state=42, store=None, full_aggregates=None):
+    """
+    Compact aggregate table for the browser, one entry per sample-size option
+    Samples are drawn exactly like the server callbacks draw them, so the numbers match
+    store: a modules.SqlStore.SurveyStore to compute the aggregates in SQL instead
+    full_aggregates: already computed aggregates of all of df, used wherever the sample is all rows
+    """
+    samples = {}
+    for sample_size in sample_sizes:
+        if full_aggregates is not None and not (sample_size > 0 and len(df) > sample_size):
+            samples[str(sample_size)] = full_aggregates
+            continue
+        if store is not None:
+            samples[str(sample_size)] = store.summary_aggregates(group_cols, sample_size)
+            continue
+        if sample_size > 0 and len(df) > sample_size:
+            sampled_df = df.sample(n=sample_size, random_state=random_state)
+        else:
+            sampled_df = df
+        samples[str(sample_size)] = compute_summary_aggregates(sampled_df, group_cols)
+
+    # same palette as the server-side distribution chart
+    colors = [c.replace('rgb', 'rgba').replace(')', ',0.7)') for c in px.colors.qualitative.Set1]
+    return {'samples': samples, 'colors': colors}
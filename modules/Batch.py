@@ -0,0 +1,258 @@
+import os
+import json
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+from modules.Aggregates import compute_summary_aggregates, get_group_values
+from modules.ServiceFactor import compute_rf_importance
+from modules.clustering import CustomerSegmentationAnalyzer
+
+# batch results written by batch.py; when they were computed from the same data the
+# dashboard seeds its caches from them at start-up
+BATCH_RESULTS = os.environ.get('AIRLINE_BATCH_RESULTS', '')
+MANIFEST_FILE = 'manifest.json'
+TABLES = ('subgroups', 'rating_distributions', 'cluster_profiles', 'cluster_shares')
+RATINGS = range(0, 6)
+
+# set in the parent right before the pool forks, so the workers inherit the frame
+_batch_frame = None
+_batch_service_attributes = None
+_batch_samples = {}
+
+
+def _sample(sample_size, random_state=42):
+    # the rows the dashboard's get_sampled_df picks, drawn once per process and size
+    if sample_size not in _batch_samples:
+        df = _batch_frame
+        _batch_samples[sample_size] = (df.sample(n=sample_size, random_state=random_state)
+                                       if sample_size > 0 and len(df) > sample_size else df)
+    return _batch_samples[sample_size]
+
+
+def subgroup_results(group_col, sample_size, value):
+    """
+    Summary metrics, Random Forest importances with accuracy and rating distributions of one
+    subgroup value, on the sample the dashboard draws for sample_size
+    Returns ({table: [records]}, seconds)
+    """
+    start = time.perf_counter()
+    sampled_df = _sample(sample_size)
+    subgroup_data = sampled_df[sampled_df[group_col] == value]
+    key = {'group_col': group_col, 'value': value, 'sample_size': sample_size}
+
+    n = len(subgroup_data)
+    satisfied = int((subgroup_data['satisfaction'] == 'satisfied').sum())
+    record = dict(key, n=n, satisfied=satisfied,
+                  satisfaction_rate=satisfied / n * 100 if n else None,
+                  service_mean=float(subgroup_data['Service_Quality_Score'].mean()) if n else None,
+                  accuracy=None)
+    # same model, split and seed as the Service Factor Rankings chart
+    rf = compute_rf_importance(subgroup_data, _batch_service_attributes) if n else None
+    if rf is not None:
+        factors, importances, accuracy = rf
+        record['accuracy'] = float(accuracy)
+        record.update({f'importance:{factor}': importance for factor, importance in zip(factors, importances)})
+
+    distributions = []
+    for attr in _batch_service_attributes:
+        counts = subgroup_data[attr].value_counts()
+        distributions += [dict(key, attribute=attr, rating=rating, count=int(counts.get(rating, 0)))
+                          for rating in RATINGS]
+    return {'subgroups': [record], 'rating_distributions': distributions}, time.perf_counter() - start
+
+
+def cluster_profile_records(analyzer, sample_size):
+    """
+    One record per k-means cluster of a fitted analyzer: size, satisfaction, age, mean score
+    of every service attribute ('mean:<attr>') and most common value of every feature ('mode:<feature>')
+    """
+    kmeans = analyzer.cluster_results['kmeans']
+    profiles = []
+    for cluster_id, profile in analyzer.analyze_cluster_characteristics().items():
+        record = {
+            'sample_size': sample_size,
+            'cluster': int(cluster_id),
+            'n_clusters': int(kmeans['n_clusters']),
+            'silhouette_score': float(kmeans['silhouette_score']),
+            'size': profile['size'],
+            'size_percentage': float(profile['size_percentage']),
+            'satisfaction_rate': float(profile['satisfaction_rate']),
+            'avg_age': float(profile['avg_age']) if 'avg_age' in profile else None,
+            'age_range': profile.get('age_range')
+        }
+        record.update({f'mean:{attr}': float(score) for attr, score in profile['avg_service_scores'].items()})
+        record.update({f'mode:{feature}': value for feature, value in profile['dominant_characteristics'].items()})
+        profiles.append(record)
+    return profiles
+
+
+def cluster_results(sample_size, group_cols):
+    """
+    K-means segments of the sample as the clustering chart fits them (k from the silhouette
+    sweep), their profiles and how every subgroup value splits across them
+    Returns ({table: [records]}, seconds)
+    """
+    start = time.perf_counter()
+    sampled_df = _sample(sample_size)
+    analyzer = CustomerSegmentationAnalyzer(sampled_df, _batch_service_attributes)
+    labels = analyzer.perform_kmeans_clustering()
+    kmeans = analyzer.cluster_results['kmeans']
+
+    profiles = cluster_profile_records(analyzer, sample_size)
+
+    shares = []
+    for group_col in group_cols:
+        counts = pd.crosstab(sampled_df[group_col].to_numpy(), labels)
+        for value in get_group_values(sampled_df, group_col):
+            row = counts.loc[value] if value in counts.index else None
+            shares += [{'group_col': group_col, 'value': value, 'sample_size': sample_size, 'cluster': int(cluster_id),
+                        'count': int(row[cluster_id]) if row is not None and cluster_id in row.index else 0}
+                       for cluster_id in range(int(kmeans['n_clusters']))]
+    return {'cluster_profiles': profiles, 'cluster_shares': shares}, time.perf_counter() - start
+
+
+def _run_task(task):
+    name, args = task
+    tables, seconds = (cluster_results if name == 'clusters' else subgroup_results)(*args)
+    return task, tables, seconds
+
+
+def batch_tasks(df, group_cols, sample_sizes):
+    """
+    Clustering per sample size first (the k sweep is the longest task), then one task per
+    sample size, subgroup column and value
+    """
+    tasks = [('clusters', (sample_size, tuple(group_cols))) for sample_size in sample_sizes]
+    tasks += [('subgroup', (group_col, sample_size, value))
+              for sample_size in sample_sizes for group_col in group_cols
+              for value in get_group_values(df, group_col)]
+    return tasks
+
+
+def run_batch(df, service_attributes, group_cols, sample_sizes, workers=None):
+    """
+    Everything the dashboard computes per subgroup, for every subgroup column, value and
+    sample size, on a process pool; returns ({table: [records]}, summary aggregates per sample size)
+    Records are in task order whatever the number of workers
+    """
+    global _batch_frame, _batch_service_attributes, _batch_samples
+    _batch_frame, _batch_service_attributes, _batch_samples = df, list(service_attributes), {}
+    workers = workers or os.cpu_count() or 1
+    tasks = batch_tasks(df, group_cols, sample_sizes)
+    print(f"Batch: {len(tasks)} tasks on {workers} worker{'s' if workers > 1 else ''}")
+
+    results = {}
+    start = time.perf_counter()
+    if workers > 1:
+        with ProcessPoolExecutor(min(workers, len(tasks)), mp_context=multiprocessing.get_context('fork')) as pool:
+            futures = [pool.submit(_run_task, task) for task in tasks]
+            for done, future in enumerate(as_completed(futures), 1):
+                task, tables, seconds = future.result()
+                results[task] = tables
+                print(f"  [{done}/{len(tasks)}] {task[0]} {task[1]}: {seconds:.1f}s")
+    else:
+        for done, task in enumerate(tasks, 1):
+            _, tables, seconds = _run_task(task)
+            results[task] = tables
+            print(f"  [{done}/{len(tasks)}] {task[0]} {task[1]}: {seconds:.1f}s")
+    print(f"Batch finished in {time.perf_counter() - start:.1f}s")
+
+    tables = {name: [] for name in TABLES}
+    for task in tasks:
+        for name, records in results[task].items():
+            tables[name] += records
+    summaries = {str(sample_size): compute_summary_aggregates(_sample(sample_size), group_cols)
+                 for sample_size in sample_sizes}
+    return tables, summaries
+
+
+def load_matching_batch_results(path, data_version):
+    """
+    Tables of the batch results at path if they were computed from this version of the data, else None
+    """
+    try:
+        manifest, tables = load_batch_results(path)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Batch results at {path} not used: {e}")
+        return None
+    if manifest.get('data_version') != data_version:
+        print(f"Batch results at {path} are for data version {manifest.get('data_version')}, not {data_version}")
+        return None
+    print(f"Batch results: using {path} ({manifest.get('created')})")
+    return tables
+
+
+def batch_cluster_counts(tables, n_rows):
+    """
+    {sample size: k} of the batch k-means fits, -1 for fits on every row
+    """
+    return {(row['sample_size'] if 0 < row['sample_size'] < n_rows else -1): row['n_clusters']
+            for row in tables['cluster_profiles']}
+
+
+def batch_rf_results(tables, service_attributes):
+    """
+    {(group_col, sample_size, value): (factors, importances, accuracy)} ordered like compute_rf_importance
+    """
+    results = {}
+    for row in tables['subgroups']:
+        if row.get('accuracy') is None:
+            continue
+        # stable sort of the attributes in their original order, as compute_rf_importance sorts them
+        ranked = sorted(((attr, row[f'importance:{attr}']) for attr in service_attributes),
+                        key=lambda item: item[1], reverse=True)
+        results[(row['group_col'], row['sample_size'], row['value'])] = (
+            [attr for attr, _ in ranked], [importance for _, importance in ranked], row['accuracy'])
+    return results
+
+
+def plain_value(value):
+    # numpy scalars and NaN as JSON values
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    return value
+
+
+def write_batch_results(output, manifest, tables, fmt='json'):
+    """
+    output/manifest.json plus one file per table: records as JSON, or Parquet (needs pyarrow)
+    """
+    if fmt == 'parquet':
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ImportError("Writing parquet needs pyarrow; install it or use --format json")
+    os.makedirs(output, exist_ok=True)
+    for name, records in tables.items():
+        path = os.path.join(output, f'{name}.{fmt}')
+        if fmt == 'parquet':
+            pd.DataFrame(records).to_parquet(path, index=False)
+        else:
+            with open(path, 'w') as f:
+                json.dump([{key: plain_value(value) for key, value in record.items()} for record in records], f)
+    with open(os.path.join(output, MANIFEST_FILE), 'w') as f:
+        json.dump(dict(manifest, format=fmt, tables=list(tables)), f, indent=2, default=plain_value)
+    return output
+
+
+def load_batch_results(path):
+    """
+    (manifest, {table: [records]}) from a batch.py output directory
+    """
+    with open(os.path.join(path, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+    tables = {}
+    for name in manifest['tables']:
+        table_path = os.path.join(path, f"{name}.{manifest['format']}")
+        if manifest['format'] == 'parquet':
+            frame = pd.read_parquet(table_path)
+            tables[name] = [{key: plain_value(value) for key, value in record.items()}
+                            for record in frame.to_dict('records')]
+        else:
+            with open(table_path) as f:
+                tables[name] = json.load(f)
+    return manifest, tables
@@ -0,0 +1,301 @@
+import io
+import os
+import sys
+import json
+import time
+import platform
+import tempfile
+import tracemalloc
+import subprocess
+import contextlib
+import numpy as np
+import pandas as pd
+
+# a stage is skipped above this many rows unless limits are turned off;
+# silhouette_score (k sweep and the final k-means fit) is quadratic in rows
+STAGE_ROW_LIMITS = {
+    'clustering.k_sweep': 50_000,
+    'clustering.kmeans': 50_000,
+    'rf.analyze_all_subgroups': 2_000_000,
+    'charts.rf_importance': 2_000_000
+}
+
+# group-by columns and sample sizes of the dashboard's aggregate store
+AGGREGATE_GROUP_COLUMNS = ['Gender', 'Customer Type', 'Age_Group', 'Class', 'Type of Travel', 'Travel_Experience']
+AGGREGATE_SAMPLE_SIZES = [1000, 5000, -1]
+
+try:
+    import polars  # noqa: F401
+    POLARS_AVAILABLE = True
+except ImportError:
+    POLARS_AVAILABLE = False
+
+# a stage counts as regressed when it is this much slower (or bigger) than the baseline
+REGRESSION_THRESHOLD = 0.2
+# timings below this are too noisy to compare
+MIN_COMPARED_SECONDS = 0.01
+
+
+def scale_dataset(raw_df, n_rows, random_state=42):
+    """
+    Raw survey rows resampled with replacement to n_rows, with fresh passenger ids
+    """
+    if n_rows is None or n_rows == len(raw_df):
+        return raw_df.copy()
+    scaled = raw_df.sample(n=n_rows, replace=n_rows > len(raw_df), random_state=random_state)
+    scaled = scaled.reset_index(drop=True)
+    if 'id' in scaled.columns:
+        scaled['id'] = np.arange(1, n_rows + 1)
+    if 'Unnamed: 0' in scaled.columns:
+        scaled['Unnamed: 0'] = np.arange(n_rows)
+    return scaled
+
+
+def _fitted_analyzer(df, service_attributes):
+    # labels from a single k-means run, so the chart stages do not pay for the silhouette score
+    from sklearn.cluster import KMeans
+    from modules.clustering import CustomerSegmentationAnalyzer
+    analyzer = CustomerSegmentationAnalyzer(df, service_attributes)
+    _, X_scaled = analyzer.prepare_clustering_features()
+    analyzer.perform_pca_analysis()
+    analyzer.derived['Cluster'] = KMeans(n_clusters=4, random_state=42, n_init=1).fit_predict(X_scaled)
+    return analyzer
+
+
+def _prepared_analyzer(df, service_attributes):
+    from modules.clustering import CustomerSegmentationAnalyzer
+    analyzer = CustomerSegmentationAnalyzer(df, service_attributes)
+    analyzer.prepare_clustering_features()
+    return analyzer
+
+
+def pipeline_stages():
+    """
+    [(name, setup, run)]: setup(context) builds the arguments outside the timing, run(*args) is timed
+    context holds 'csv_path', 'raw', 'df', 'service_attributes' and 'subgroup' (a Class value)
+    """
+    from project import load_and_validate_data
+    from preprocess import preprocess_airline_data
+    from layout import DEFAULT_PC_DIMENSIONS
+    from modules.Distribution import create_distribution_chart
+    from modules.RaderChart import create_radar_chart, create_radar_chart_fast
+    from modules.ParallelCategories import create_parallel_categories_chart
+    from modules.ServiceFactor import create_average_ratings_chart, create_rf_importance_chart
+    from modules.DelayScatter import DistanceDelayBinner, create_distance_delay_chart
+    from modules.SubgroupRFAnalysis import SubgroupRFAnalyzer
+    from modules.clustering import CustomerSegmentationAnalyzer
+    from modules.Aggregates import build_aggregate_store
+
+    def subgroup_args(ctx):
+        df = ctx['df']
+        return df[df['Class'] == ctx['subgroup']], ctx['service_attributes'], ctx['subgroup']
+
+    stages = [
+        ('load_and_validate_data', lambda ctx: (ctx['csv_path'],), load_and_validate_data),
+        ('preprocess_airline_data', lambda ctx: (ctx['raw'].copy(),),
+         lambda raw: preprocess_airline_data(raw, copy=False)),
+        ('aggregates.summary', lambda ctx: (ctx['df'], AGGREGATE_GROUP_COLUMNS, AGGREGATE_SAMPLE_SIZES),
+         build_aggregate_store),
+        ('charts.distribution', lambda ctx: (ctx['df'], 'Class'), create_distribution_chart),
+        ('charts.radar', lambda ctx: (ctx['df'], ctx['service_attributes'], 'Class'), create_radar_chart),
+        ('charts.radar_fast', lambda ctx: (ctx['df'], ctx['service_attributes'], 'Class'),
+         create_radar_chart_fast),
+        ('charts.parallel_categories', lambda ctx: (ctx['df'], DEFAULT_PC_DIMENSIONS, -1),
+         create_parallel_categories_chart),
+        ('charts.average_ratings', subgroup_args, create_average_ratings_chart),
+        ('charts.rf_importance', subgroup_args, create_rf_importance_chart),
+        ('charts.distance_delay', lambda ctx: (ctx['df'],),
+         lambda df: create_distance_delay_chart(DistanceDelayBinner(df))),
+        ('rf.analyze_all_subgroups', lambda ctx: (SubgroupRFAnalyzer(ctx['df'], ctx['service_attributes']),),
+         lambda analyzer: analyzer.analyze_all_subgroups('Class')),
+        ('clustering.prepare_features', lambda ctx: (CustomerSegmentationAnalyzer(ctx['df'], ctx['service_attributes']),),
+         lambda analyzer: analyzer.prepare_clustering_features()),
+        ('clustering.pca', lambda ctx: (_prepared_analyzer(ctx['df'], ctx['service_attributes']),),
+         lambda analyzer: analyzer.perform_pca_analysis()),
+        ('clustering.k_sweep', lambda ctx: (_prepared_analyzer(ctx['df'], ctx['service_attributes']),),
+         lambda analyzer: analyzer.find_optimal_clusters()),
+        ('clustering.kmeans', lambda ctx: (_prepared_analyzer(ctx['df'], ctx['service_attributes']),),
+         lambda analyzer: analyzer.perform_kmeans_clustering(n_clusters=4)),
+        ('charts.cluster_scatter', lambda ctx: (_fitted_analyzer(ctx['df'], ctx['service_attributes']),),
+         lambda analyzer: analyzer.create_pca_scatter_plot()),
+        ('charts.cluster_profiles', lambda ctx: (_fitted_analyzer(ctx['df'], ctx['service_attributes']),),
+         lambda analyzer: analyzer.create_cluster_profiles_chart()),
+        ('charts.cluster_comparison', lambda ctx: (_fitted_analyzer(ctx['df'], ctx['service_attributes']),),
+         lambda analyzer: analyzer.create_cluster_comparison_chart())
+    ]
+    if POLARS_AVAILABLE:
+        from modules import PolarsBackend
+        stages += [
+            # load_and_validate_data + preprocess_airline_data, ending in the same pandas frame
+            ('polars.load_preprocess', lambda ctx: (ctx['csv_path'],), PolarsBackend.load_and_preprocess),
+            # only the columns and rows the service-factor chart of one subgroup reads
+            ('polars.load_preprocess_subgroup',
+             lambda ctx: (ctx['csv_path'], ctx['service_attributes'] + ['satisfaction', 'Class'],
+                          {'Class': ctx['subgroup']}),
+             PolarsBackend.load_and_preprocess),
+            ('polars.aggregates', lambda ctx: (PolarsBackend.collect_survey(ctx['csv_path'])[0].lazy(),
+                                               AGGREGATE_GROUP_COLUMNS, AGGREGATE_SAMPLE_SIZES),
+             PolarsBackend.build_aggregate_store)
+        ]
+    return stages
+
+
+def _quiet(verbose):
+    return contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+
+
+def time_stage(setup, run, context, repeat=3, measure_memory=True, verbose=False):
+    """
+    Median and best wall time over repeat runs, plus the traced memory peak of one extra run
+    (tracemalloc slows allocations down, so it is kept out of the timed runs)
+    """
+    timings = []
+    for _ in range(repeat):
+        with _quiet(verbose):
+            args = setup(context)
+            start = time.perf_counter()
+            run(*args)
+            timings.append(time.perf_counter() - start)
+        del args
+
+    peak = None
+    if measure_memory:
+        with _quiet(verbose):
+            args = setup(context)
+            tracemalloc.start()
+            try:
+                run(*args)
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+        del args
+
+    return {
+        'seconds': float(np.median(timings)),
+        'seconds_min': float(min(timings)),
+        'runs': len(timings),
+        'peak_bytes': peak
+    }
+
+
+def _environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, timeout=10).stdout.strip() or None
+    except Exception:
+        commit = None
+    import sklearn
+    import plotly
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'sklearn': sklearn.__version__,
+        'plotly': plotly.__version__
+    }
+
+
+def run_benchmarks(raw_df, sizes, stages=None, repeat=3, measure_memory=True,
+                   row_limits=STAGE_ROW_LIMITS, verbose=False, synthetic_seed=None):
+    """
+    Time every pipeline stage at every dataset size; raw_df is the unprocessed survey data
+    sizes: row counts, None for raw_df as it is; stages: name prefixes to run (all by default)
+    synthetic_seed: draw the larger datasets from modules.Synthetic instead of resampling raw_df
+    """
+    from preprocess import preprocess_airline_data
+    from modules.Synthetic import fit_survey_model, generate_survey
+    model = None if synthetic_seed is None else fit_survey_model(raw_df)
+
+    selected = [stage for stage in pipeline_stages()
+                if not stages or any(stage[0].startswith(prefix) for prefix in stages)]
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in sizes:
+            if model is None or size is None:
+                raw = scale_dataset(raw_df, size)
+            else:
+                raw = generate_survey(model, size, seed=synthetic_seed)
+            n_rows = len(raw)
+            csv_path = os.path.join(tmp_dir, f'survey_{n_rows}.csv')
+            raw.to_csv(csv_path, index=False)
+            with _quiet(verbose):
+                df, service_attributes = preprocess_airline_data(raw)
+            context = {
+                'csv_path': csv_path,
+                'raw': raw,
+                'df': df,
+                'service_attributes': service_attributes,
+                'subgroup': df['Class'].value_counts().index[0]
+            }
+            print(f"=== {n_rows:,} rows ===")
+
+            for name, setup, run in selected:
+                limit = (row_limits or {}).get(name)
+                if limit and n_rows > limit:
+                    print(f"  {name:<32} skipped (over {limit:,} rows)")
+                    results.append({'stage': name, 'rows': n_rows, 'skipped': f'over {limit:,} rows'})
+                    continue
+                try:
+                    measured = time_stage(setup, run, context, repeat, measure_memory, verbose)
+                except Exception as e:
+                    print(f"  {name:<32} failed: {e}")
+                    results.append({'stage': name, 'rows': n_rows, 'error': str(e)})
+                    continue
+                measured['rows_per_second'] = n_rows / measured['seconds'] if measured['seconds'] else None
+                results.append({'stage': name, 'rows': n_rows, **measured})
+                memory = '' if measured['peak_bytes'] is None else f", peak {measured['peak_bytes'] / 2 ** 20:,.1f} MB"
+                print(f"  {name:<32} {measured['seconds']:9.3f}s, "
+                      f"{measured['rows_per_second']:,.0f} rows/s{memory}")
+            os.remove(csv_path)
+
+    return {'environment': _environment(), 'results': results}
+
+
+def compare_to_baseline(report, baseline, threshold=REGRESSION_THRESHOLD, min_seconds=MIN_COMPARED_SECONDS):
+    """
+    Stages that got slower or use more memory than in the baseline report by more than threshold
+    """
+    previous = {(r['stage'], r['rows']): r for r in baseline.get('results', []) if 'seconds' in r}
+    regressions = []
+    for result in report['results']:
+        before = previous.get((result['stage'], result['rows']))
+        if before is None or 'seconds' not in result:
+            continue
+        checks = [('seconds', before['seconds'] >= min_seconds or result['seconds'] >= min_seconds),
+                  ('peak_bytes', True)]
+        for metric, comparable in checks:
+            old, new = before.get(metric), result.get(metric)
+            if not comparable or not old or new is None:
+                continue
+            ratio = new / old
+            if ratio > 1 + threshold:
+                regressions.append({'stage': result['stage'], 'rows': result['rows'], 'metric': metric,
+                                    'baseline': old, 'current': new, 'ratio': ratio})
+    return regressions
+
+
+def save_report(report, path):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+
+def load_report(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def print_regressions(regressions, out=sys.stdout):
+    if not regressions:
+        print("No regressions against the baseline", file=out)
+        return
+    print(f"{len(regressions)} regression(s) against the baseline:", file=out)
+    for r in regressions:
+        print(f"  {r['stage']} @ {r['rows']:,} rows: {r['metric']} {r['baseline']:,.4g} -> "
+              f"{r['current']:,.4g} ({r['ratio']:.2f}x)", file=out)
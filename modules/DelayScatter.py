@@ -0,0 +1,153 @@
+import numpy as np
+import plotly.graph_objects as go
+from utils import get_display_name
+from modules.Payload import figure_budget
+from modules.Metrics import stage
+
+DELAY_COLUMNS = ['Departure Delay in Minutes', 'Arrival Delay in Minutes']
+
+
+class DistanceDelayBinner:
+    """
+    Flight Distance vs delay as compact NumPy columns, re-binned on demand
+    so the browser only ever receives a fixed-size grid instead of raw points
+    """
+
+    def __init__(self, df, distance_col='Flight Distance'):
+        self.distance_col = distance_col
+        self.distance = df[distance_col].to_numpy(dtype=np.float32)
+        self.delays = {
+            col: df[col].fillna(0).to_numpy(dtype=np.float32)
+            for col in DELAY_COLUMNS if col in df.columns
+        }
+        self.satisfied = (df['satisfaction'] == 'satisfied').to_numpy(dtype=np.float32)
+        self._default_ranges = {}
+
+    def default_ranges(self, delay_col):
+        """
+        Full distance range; delays are long-tailed so the initial view stops at the 99th percentile
+        """
+        if delay_col not in self._default_ranges:
+            delays = self.delays[delay_col]
+            x_range = [float(self.distance.min()), float(self.distance.max())]
+            y_range = [float(delays.min()), float(max(np.percentile(delays, 99), delays.min() + 1))]
+            self._default_ranges[delay_col] = (x_range, y_range)
+        return self._default_ranges[delay_col]
+
+    @stage('aggregate', 'delay_bins')
+    def bin(self, delay_col, x_range=None, y_range=None, bins=(80, 60)):
+        """
+        Vectorized 2D histogram of passengers and satisfied passengers over the visible range
+        """
+        default_x, default_y = self.default_ranges(delay_col)
+        x_min, x_max = x_range or default_x
+        y_min, y_max = y_range or default_y
+        nx, ny = bins
+        x_span = (x_max - x_min) or 1.0
+        y_span = (y_max - y_min) or 1.0
+
+        # bin coordinates on the full columns; rows outside the view land in one overflow bin
+        bin_x = (self.distance - x_min) * (nx / x_span)
+        bin_y = (self.delays[delay_col] - y_min) * (ny / y_span)
+        visible = (bin_x >= 0) & (bin_x <= nx) & (bin_y >= 0) & (bin_y <= ny)
+        flat = np.minimum(bin_y.astype(np.int32), ny - 1) * nx + np.minimum(bin_x.astype(np.int32), nx - 1)
+        flat[~visible] = nx * ny
+
+        counts = np.bincount(flat, minlength=nx * ny + 1)[:-1].reshape(ny, nx)
+        satisfied_counts = np.bincount(flat, weights=self.satisfied, minlength=nx * ny + 1)[:-1].reshape(ny, nx)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            satisfaction_rate = np.where(counts > 0, satisfied_counts / counts * 100, np.nan)
+
+        return {
+            'x_edges': np.linspace(x_min, x_max, nx + 1),
+            'y_edges': np.linspace(y_min, y_max, ny + 1),
+            'counts': counts,
+            'satisfaction_rate': satisfaction_rate,
+            'n_visible': int(counts.sum())
+        }
+
+
+def parse_relayout_ranges(relayout_data, current_ranges=None):
+    """
+    Extract the zoomed axis ranges from a Graph's relayoutData
+    Returns (x_range, y_range); None means the default range for that axis
+    """
+    x_range, y_range = current_ranges or (None, None)
+    if not relayout_data:
+        return x_range, y_range
+
+    for axis in ('xaxis', 'yaxis'):
+        if relayout_data.get(f'{axis}.autorange'):
+            new_range = None
+        elif f'{axis}.range[0]' in relayout_data:
+            new_range = [relayout_data[f'{axis}.range[0]'], relayout_data[f'{axis}.range[1]']]
+        elif f'{axis}.range' in relayout_data:
+            new_range = list(relayout_data[f'{axis}.range'])
+        else:
+            continue
+        if axis == 'xaxis':
+            x_range = new_range
+        else:
+            y_range = new_range
+    return x_range, y_range
+
+
+@figure_budget('distance_delay_chart')
+def create_distance_delay_chart(binner, delay_col='Departure Delay in Minutes', x_range=None, y_range=None, bins=(80, 60)):
+    """
+    Heatmap of Flight Distance vs delay coloured by satisfaction rate, binned server-side
+    """
+    if delay_col not in binner.delays:
+        return go.Figure().add_annotation(
+            text=f"Column '{delay_col}' not found in dataset",
+            xref="paper", yref="paper", x=0.5, y=0.5,
+            showarrow=False, font=dict(size=14)
+        )
+
+    grid = binner.bin(delay_col, x_range, y_range, bins)
+    x_edges, y_edges = grid['x_edges'], grid['y_edges']
+    x_centers = (x_edges[:-1] + x_edges[1:]) / 2
+    y_centers = (y_edges[:-1] + y_edges[1:]) / 2
+
+    fig = go.Figure(go.Heatmap(
+        x=np.round(x_centers, 1),
+        y=np.round(y_centers, 1),
+        z=np.round(grid['satisfaction_rate'], 1),
+        customdata=grid['counts'],
+        colorscale='RdYlGn',
+        zmin=0,
+        zmax=100,
+        colorbar=dict(title='Satisfied (%)', tickfont=dict(size=16)),
+        hoverongaps=False,
+        hovertemplate='Distance: %{x:.0f}<br>' +
+                      'Delay: %{y:.0f} min<br>' +
+                      'Satisfied: %{z:.1f}%<br>' +
+                      'Passengers: %{customdata:,}<extra></extra>'
+    ))
+
+    fig.update_layout(
+        title={
+            'text': f"{grid['n_visible']:,} passengers in view",
+            'x': 0.5,
+            'xanchor': 'center',
+            'font': {'size': 16, 'color': '#1a237e', 'family': 'Arial'}
+        },
+        xaxis=dict(
+            title=get_display_name(binner.distance_col),
+            titlefont=dict(size=20),
+            tickfont=dict(size=16),
+            range=[x_edges[0], x_edges[-1]]
+        ),
+        yaxis=dict(
+            title=get_display_name(delay_col),
+            titlefont=dict(size=20),
+            tickfont=dict(size=16),
+            range=[y_edges[0], y_edges[-1]]
+        ),
+        height=400,
+        margin=dict(l=20, r=20, t=50, b=20),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)'
+    )
+
+    return fig
@@ -3,7 +3,9 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import pandas as pd
 from utils import get_display_value
+from modules.Payload import figure_budget
 
+@figure_budget('distribution_chart')
 def create_distribution_chart(df, group_col='Class'):
     """
     Create a pie chart for distribution analysis
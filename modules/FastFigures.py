@@ -0,0 +1,88 @@
+import os
+import time
+import numpy as np
+
+# use the dict-based builders in the hot callbacks
+FAST_FIGURES = os.environ.get('AIRLINE_FAST_FIGURES', '1') == '1'
+
+_templates = {}
+
+
+def validated_template(name, build):
+    """
+    Figure dict built once through go.Figure (and so validated once), reused as a template
+    """
+    if name not in _templates:
+        _templates[name] = build().to_plotly_json()
+    return _templates[name]
+
+
+def merge_figure_dict(base, updates):
+    """
+    Copy of base with updates merged in recursively; base itself is never modified
+    """
+    merged = dict(base)
+    for key, value in updates.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_figure_dict(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def figure_from_template(name, build, traces, layout_updates=None):
+    """
+    Plain figure dict: every trace is the template's first trace with its per-call values merged in
+    Values merged in are not validated, so they must already be JSON-ready lists, numbers and strings
+    """
+    template = validated_template(name, build)
+    trace_template = template['data'][0]
+    return {
+        'data': [merge_figure_dict(trace_template, trace) for trace in traces],
+        'layout': merge_figure_dict(template['layout'], layout_updates or {})
+    }
+
+
+def _time_builder(builder, args, repeat):
+    # builders are wrapped by figure_budget; time the construction itself
+    builder = getattr(builder, '__wrapped__', builder)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        builder(*args)
+        timings.append(time.perf_counter() - start)
+    timings_ms = np.array(timings) * 1000
+    return {
+        'ms_p50': float(np.percentile(timings_ms, 50)),
+        'ms_p95': float(np.percentile(timings_ms, 95))
+    }
+
+
+def benchmark_figure_builders(df, service_attributes, group_col='Class', repeat=50):
+    """
+    Time the validated go.Figure builders against the dict-based builders on the same inputs
+    """
+    from modules.RaderChart import create_radar_chart, create_radar_chart_fast
+    from modules.ServiceFactor import (build_rf_importance_figure, build_rf_importance_figure_fast,
+                                       compute_rf_importance)
+
+    results = {}
+
+    radar_args = (df, service_attributes, group_col)
+    results['radar_chart'] = {
+        'validated': _time_builder(create_radar_chart, radar_args, repeat),
+        'fast': _time_builder(create_radar_chart_fast, radar_args, repeat)
+    }
+
+    # the Random Forest fit is shared by both paths, so only the figure construction is compared
+    subgroup = df[group_col].iloc[0]
+    factors, importances, _ = compute_rf_importance(df[df[group_col] == subgroup], service_attributes)
+    bar_args = (factors, importances)
+    results['rf_importance_chart'] = {
+        'validated': _time_builder(build_rf_importance_figure, bar_args, repeat),
+        'fast': _time_builder(build_rf_importance_figure_fast, bar_args, repeat)
+    }
+
+    for timings in results.values():
+        timings['speedup'] = timings['validated']['ms_p50'] / max(timings['fast']['ms_p50'], 1e-9)
+    return results
@@ -0,0 +1,323 @@
+import os
+import time
+import threading
+
+# seconds between checks of the data file for changes; 0 turns the watcher off (the reload API still works)
+RELOAD_INTERVAL = float(os.environ.get('AIRLINE_RELOAD_INTERVAL', '5'))
+# POST /api/reload needs this value in the X-Reload-Token header; unset disables the endpoint
+RELOAD_TOKEN = os.environ.get('AIRLINE_RELOAD_TOKEN', '')
+# seconds after which a rebuild lock left by a process that died mid-rebuild is taken over
+RELOAD_LOCK_TIMEOUT = float(os.environ.get('AIRLINE_RELOAD_LOCK_TIMEOUT', 1800))
+
+# shared cache keys: the process holding the rebuild lock, the last version it published,
+# the source fingerprint whose rebuild failed and the data version each process serves
+LOCK_KEY = ('reload', 'leader')
+PUBLISHED_KEY = ('reload', 'published')
+FAILED_KEY = ('reload', 'failed')
+SERVING_KEY = ('reload', 'serving')
+
+
+def source_fingerprint(path):
+    """
+    Sizes and modification times of the data file, or of every data file under a directory
+    """
+    if os.path.isdir(path):
+        files = sorted(os.path.join(directory, f) for directory, _, names in os.walk(path)
+                       for f in names if f.endswith(('.csv', '.parquet')))
+    else:
+        files = [path]
+    stats = []
+    for f in files:
+        try:
+            stat = os.stat(f)
+        except OSError:
+            continue
+        stats.append(f'{os.path.relpath(f, path) if f != path else ""}:{stat.st_size}:{stat.st_mtime_ns}')
+    return ';'.join(stats)
+
+
+class DashboardState:
+    """
+    Everything the callbacks read for one version of the data (frame, fitted models,
+    aggregates, caches); a callback takes the state of the version its page shows once and
+    uses only that, so it answers from one version even when a reload swaps in the next one
+    meanwhile
+    """
+
+    def __init__(self, **parts):
+        self.__dict__.update(parts)
+
+
+class StateHolder:
+    """
+    The current DashboardState plus the machinery to replace it: rebuild() builds the next
+    state in a background thread from the changed source and it is published with a single
+    reference assignment, so requests see either the old state or the new one, never a mix
+
+    With a shared cache, server processes coordinate: the one that takes the rebuild lock
+    rebuilds and publishes the new version, the others adopt(published) it instead of
+    rebuilding, and cleanup(versions) is called with the data versions still in use anywhere
+    """
+
+    def __init__(self, state, rebuild=None, source=None, interval=RELOAD_INTERVAL, cache=None,
+                 adopt=None, cleanup=None):
+        self._state = state
+        self.rebuild = rebuild
+        self.adopt = adopt or (lambda published: rebuild())
+        self.source = source
+        self.interval = interval
+        self.cache = cache
+        self.cleanup = cleanup
+        # the state before the current one, still used by requests that started before the swap
+        self._previous = None
+        self._failed = None
+        self._lock = threading.Lock()
+        self._reload_thread = None
+        self._watch_thread = None
+        self._watch_pid = None
+        state.source_fingerprint = source_fingerprint(source) if source else None
+        self._status = {'reloads': 0, 'last_reload': None, 'last_error': None, 'reason': None}
+        if cache is not None:
+            # created once at start-up, before any worker: a lock or serving list left behind
+            # belongs to a previous server
+            cache.delete(LOCK_KEY)
+            cache.delete(SERVING_KEY)
+
+    def current(self):
+        return self._state
+
+    def for_version(self, data_version):
+        """
+        The state of data_version while this process still holds it (the current one or the
+        one it replaced), None otherwise
+        """
+        state, previous = self._state, self._previous
+        if state.data_version == data_version:
+            return state
+        if previous is not None and previous.data_version == data_version:
+            return previous
+        return None
+
+    def page_state(self):
+        """
+        The state new pages and the reload poll move pages to: the current one once every
+        server process holds it, the one it replaced until then
+        """
+        state, previous = self._state, self._previous
+        if previous is None or self.served_everywhere(state.data_version):
+            return state
+        return previous
+
+    def served_everywhere(self, data_version):
+        """
+        Whether every live server process holds data_version, so a page moved to it gets all
+        its callbacks answered from it whichever process they reach
+        """
+        if self.for_version(data_version) is None:
+            return False
+        if self.cache is None:
+            return True
+        now = time.time()
+        return all(data_version in served for served, expires in self.cache.get(SERVING_KEY, {}).values()
+                   if expires > now)
+
+    def swap(self, state):
+        """
+        Publish state; the one it replaces stays usable for the requests still holding it
+        """
+        with self._lock:
+            self._previous, self._state = self._state, state
+            self._status['reloads'] += 1
+            self._status['last_reload'] = time.time()
+        self._heartbeat()
+
+    def is_reloading(self):
+        return self._reload_thread is not None and self._reload_thread.is_alive()
+
+    def _start(self, target, reason, *args):
+        with self._lock:
+            if self.is_reloading():
+                return False
+            self._status['reason'] = reason
+            self._reload_thread = threading.Thread(target=target, args=args, name='reload', daemon=True)
+            self._reload_thread.start()
+        return True
+
+    def reload(self, reason='api'):
+        """
+        Start rebuilding in a background thread; False when a reload is already running here
+        or another process holds the rebuild lock
+        """
+        if self.rebuild is None:
+            raise RuntimeError("This dashboard was not built with a reloadable source")
+        if self._leader() is not None:
+            return False
+        return self._start(self._reload, reason)
+
+    # ----- shared cache -----
+
+    def _leader(self):
+        return self.cache.get(LOCK_KEY) if self.cache is not None else None
+
+    def _acquire(self, token):
+        # add only succeeds when the key is missing or its entry expired
+        return self.cache is None or self.cache.add(LOCK_KEY, token, expire=RELOAD_LOCK_TIMEOUT)
+
+    def _release(self, token):
+        if self.cache is None:
+            return
+        with self.cache.transact():
+            if self.cache.get(LOCK_KEY) == token:
+                self.cache.delete(LOCK_KEY)
+
+    def _published(self):
+        return self.cache.get(PUBLISHED_KEY) if self.cache is not None else None
+
+    def _failed_fingerprint(self):
+        failed = self.cache.get(FAILED_KEY) if self.cache is not None else self._failed
+        return failed['fingerprint'] if failed else None
+
+    def _heartbeat(self):
+        """
+        Record the versions this process serves, so no other one cleans up their files
+        """
+        if self.cache is None:
+            return
+        now = time.time()
+        versions = {self._state.data_version}
+        if self._previous is not None:
+            versions.add(self._previous.data_version)
+        with self.cache.transact():
+            serving = {pid: entry for pid, entry in self.cache.get(SERVING_KEY, {}).items()
+                       if entry[1] > now and pid != os.getpid()}
+            serving[os.getpid()] = (versions, now + max(60, 3 * self.interval))
+            self.cache.set(SERVING_KEY, serving)
+
+    def _versions_in_use(self):
+        now = time.time()
+        versions = {self._state.data_version}
+        if self._previous is not None:
+            versions.add(self._previous.data_version)
+        if self.cache is not None:
+            for served, expires in self.cache.get(SERVING_KEY, {}).values():
+                if expires > now:
+                    versions |= served
+        return versions
+
+    # ----- rebuilding -----
+
+    def _reload(self):
+        # taken before reading, so a change made while rebuilding triggers another reload
+        fingerprint = source_fingerprint(self.source)
+        token = f'{os.getpid()}:{threading.get_ident()}:{time.time()}'
+        if not self._acquire(token):
+            print("Reload: another process is rebuilding, its version is adopted once published")
+            return
+        try:
+            # the previous lock holder may have finished or failed on this source between the
+            # watcher's check and taking the lock; a reload asked for over the API always rebuilds
+            if self._status['reason'] != 'api':
+                published = self._published()
+                if published is not None and published['fingerprint'] == fingerprint:
+                    if published['data_version'] == self._state.data_version:
+                        self._state.source_fingerprint = fingerprint
+                    else:
+                        self._adopt(published)
+                    return
+                if fingerprint == self._failed_fingerprint():
+                    return
+            print(f"Reload ({self._status['reason']}): rebuilding from {self.source}")
+            start = time.perf_counter()
+            try:
+                state = self.rebuild()
+            except Exception as e:
+                print(f"Reload failed, still serving version {self._state.data_version}: {e}")
+                self._status['last_error'] = str(e)
+                # the watcher skips this source until it changes again
+                self._failed = {'fingerprint': fingerprint, 'error': str(e)}
+                if self.cache is not None:
+                    self.cache.set(FAILED_KEY, self._failed)
+                return
+            state.source_fingerprint = fingerprint
+            old_version = self._state.data_version
+            self.swap(state)
+            self._status['last_error'] = None
+            self._failed = None
+            if self.cache is not None:
+                self.cache.delete(FAILED_KEY)
+                self.cache.set(PUBLISHED_KEY, {'fingerprint': fingerprint, 'data_version': state.data_version,
+                                               'time': time.time()})
+            print(f"Reload done in {time.perf_counter() - start:.1f}s: version {old_version} -> {state.data_version}")
+            if self.cleanup is not None:
+                try:
+                    self.cleanup(self._versions_in_use())
+                except Exception as e:
+                    print(f"Reload cleanup failed: {e}")
+        finally:
+            self._release(token)
+
+    def _adopt(self, published):
+        print(f"Reload ({self._status['reason']}): adopting version {published['data_version']}")
+        start = time.perf_counter()
+        try:
+            state = self.adopt(published)
+            if state.data_version != published['data_version']:
+                raise RuntimeError(f"source changed again, loaded version {state.data_version}")
+        except Exception as e:
+            print(f"Adopting version {published['data_version']} failed, still serving "
+                  f"version {self._state.data_version}: {e}")
+            self._status['last_error'] = str(e)
+            return
+        state.source_fingerprint = published['fingerprint']
+        self.swap(state)
+        self._status['last_error'] = None
+        print(f"Adopted version {state.data_version} in {time.perf_counter() - start:.1f}s")
+
+    def watch(self):
+        """
+        Poll the source for changes in a daemon thread and reload once it has stopped changing;
+        threads do not survive a fork, so every server process starts its own
+        """
+        if not self.source or self.interval <= 0 or self.rebuild is None:
+            return self
+        if self._watch_thread is not None and self._watch_thread.is_alive() and self._watch_pid == os.getpid():
+            return self
+        self._watch_pid = os.getpid()
+        self._watch_thread = threading.Thread(target=self._watch, name='reload-watcher', daemon=True)
+        self._watch_thread.start()
+        return self
+
+    def _watch(self):
+        last_seen = None
+        while True:
+            time.sleep(self.interval)
+            fingerprint = source_fingerprint(self.source)
+            try:
+                if not self.is_reloading():
+                    self._check(fingerprint, last_seen)
+                self._heartbeat()
+            except Exception as e:
+                print(f"Reload check failed: {e}")
+            last_seen = fingerprint
+
+    def _check(self, fingerprint, last_seen):
+        state = self._state
+        if not fingerprint or fingerprint == state.source_fingerprint:
+            return
+        published = self._published()
+        if published is not None and published['fingerprint'] == fingerprint:
+            # another process already rebuilt this source
+            if published['data_version'] == state.data_version:
+                state.source_fingerprint = fingerprint
+            else:
+                self._start(self._adopt, 'published', published)
+            return
+        # a file still being written looks different on every check; wait for two equal ones
+        if fingerprint == last_seen and fingerprint != self._failed_fingerprint() and self._leader() is None:
+            self.reload('file changed')
+
+    def status(self):
+        return dict(self._status, version=self._state.data_version, reloading=self.is_reloading(),
+                    rebuilding_elsewhere=self._leader() is not None and not self.is_reloading(),
+                    failed_source=self._failed_fingerprint(), source=self.source,
+                    watching=self._watch_thread is not None and self._watch_thread.is_alive())
@@ -0,0 +1,315 @@
+import json
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, urlencode
+import http.client
+import numpy as np
+
+UPDATE_PATH = '/_dash-update-component'
+
+# interactions a simulated analyst picks from: (component id, property) whose value is changed
+ACTIONS = {
+    'group_by': ('subgroup-dropdown-distribution', 'value'),
+    'sample_size': ('sample-dropdown', 'value'),
+    'pc_dimensions': ('pc-dimensions-dropdown', 'value'),
+    'subgroup': ('service-factors-subgroup-dropdown', 'value'),
+    'clustering_chart': ('clustering-chart-selector', 'value')
+}
+# relative frequency of each interaction
+ACTION_WEIGHTS = {'group_by': 3, 'sample_size': 2, 'pc_dimensions': 2, 'subgroup': 3, 'clustering_chart': 2}
+
+# give up on a background callback that has not finished by then
+BACKGROUND_TIMEOUT = 300
+
+
+class _ThreadedClient:
+    """
+    Blocking http.client requests on a thread pool, one keep-alive connection per thread
+    """
+
+    def __init__(self, base_url, max_connections):
+        parts = urlsplit(base_url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.prefix = parts.path.rstrip('/')
+        self._local = threading.local()
+        self._pool = ThreadPoolExecutor(max_connections, thread_name_prefix='loadtest')
+
+    def _request(self, method, path, body):
+        for attempt in range(2):
+            conn = getattr(self._local, 'conn', None)
+            if conn is None:
+                conn = self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=BACKGROUND_TIMEOUT)
+            try:
+                conn.request(method, self.prefix + path, body=body,
+                             headers={'Content-Type': 'application/json'} if body else {})
+                response = conn.getresponse()
+                return response.status, response.read()
+            except (http.client.HTTPException, ConnectionError):
+                # the server closed the keep-alive connection; reconnect once
+                conn.close()
+                self._local.conn = None
+                if attempt:
+                    raise
+
+    async def request(self, method, path, body=None):
+        return await asyncio.get_running_loop().run_in_executor(self._pool, self._request, method, path, body)
+
+    async def close(self):
+        self._pool.shutdown(wait=False)
+
+
+class _AiohttpClient:
+    """
+    Native async requests when aiohttp is installed
+    """
+
+    def __init__(self, base_url, max_connections):
+        import aiohttp
+        self.base_url = base_url.rstrip('/')
+        self.session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=max_connections),
+                                             timeout=aiohttp.ClientTimeout(total=BACKGROUND_TIMEOUT))
+
+    async def request(self, method, path, body=None):
+        async with self.session.request(method, self.base_url + path, data=body,
+                                        headers={'Content-Type': 'application/json'} if body else {}) as response:
+            return response.status, await response.read()
+
+    async def close(self):
+        await self.session.close()
+
+
+def make_client(base_url, max_connections=100):
+    try:
+        return _AiohttpClient(base_url, max_connections)
+    except ImportError:
+        return _ThreadedClient(base_url, max_connections)
+
+
+def _parse_outputs(output):
+    """
+    '..a.figure...b.data..' or 'a.figure' -> [('a', 'figure'), ('b', 'data')]
+    """
+    if output.startswith('..') and output.endswith('..'):
+        return [tuple(part.rsplit('.', 1)) for part in output[2:-2].split('...')]
+    return [tuple(output.rsplit('.', 1))]
+
+
+def server_callbacks(dependencies):
+    """
+    The callbacks that run on the server, as listed by /_dash-dependencies
+    """
+    callbacks = []
+    for dep in dependencies:
+        if dep.get('clientside_function'):
+            continue
+        outputs = _parse_outputs(dep['output'])
+        callbacks.append({
+            'name': '+'.join(dict.fromkeys(component for component, _ in outputs)),
+            'output': dep['output'],
+            'outputs': outputs,
+            'multi': dep['output'].startswith('..'),
+            'inputs': [(i['id'], i['property']) for i in dep['inputs']],
+            'state': [(s['id'], s['property']) for s in dep.get('state', [])],
+            'background': dep.get('long') is not None,
+            'interval': (dep.get('long') or {}).get('interval', 1000) / 1000,
+            'prevent_initial_call': dep.get('prevent_initial_call', False)
+        })
+    return callbacks
+
+
+def layout_props(layout):
+    """
+    {(component id, property): value} for every component with an id in the layout
+    """
+    props = {}
+    stack = [layout]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(node)
+        elif isinstance(node, dict) and 'props' in node:
+            component_id = node['props'].get('id')
+            for prop, value in node['props'].items():
+                if prop == 'children':
+                    stack.append(value)
+                elif component_id is not None and isinstance(component_id, str):
+                    props[(component_id, prop)] = value
+    return props
+
+
+class AnalystSession:
+    """
+    One simulated browser: keeps the component values, fires the server callbacks an
+    interaction triggers (chained ones in waves, like the Dash renderer) and records latencies
+    """
+
+    def __init__(self, client, callbacks, layout, rng, record):
+        self.client = client
+        self.callbacks = callbacks
+        self.props = layout_props(layout)
+        self.rng = rng
+        self.record = record
+
+    def _payload(self, callback, changed):
+        def values(deps):
+            return [{'id': c, 'property': p, 'value': self.props.get((c, p))} for c, p in deps]
+        outputs = [{'id': c, 'property': p} for c, p in callback['outputs']]
+        return {
+            'output': callback['output'],
+            'outputs': outputs if callback['multi'] else outputs[0],
+            'inputs': values(callback['inputs']),
+            'state': values(callback['state']),
+            'changedPropIds': [f'{c}.{p}' for c, p in callback['inputs'] if (c, p) in changed]
+        }
+
+    async def _call(self, callback, changed):
+        body = json.dumps(self._payload(callback, changed))
+        start = time.perf_counter()
+        size = 0
+        try:
+            status, data = await self.client.request('POST', UPDATE_PATH, body)
+            size += len(data)
+            if callback['background'] and status == 200:
+                job = json.loads(data)
+                query = urlencode({'cacheKey': job['cacheKey'], 'job': job['job']})
+                # poll like the renderer until the job has a result
+                while status == 200 and b'"response"' not in data and time.perf_counter() - start < BACKGROUND_TIMEOUT:
+                    await asyncio.sleep(callback['interval'])
+                    status, data = await self.client.request('POST', f'{UPDATE_PATH}?{query}', body)
+                    size += len(data)
+            ok = status in (200, 204) and (status == 204 or b'"response"' in data)
+        except Exception:
+            status, data, ok = None, b'', False
+        self.record(callback['name'], time.perf_counter() - start, ok, size)
+
+        if status != 200 or not ok:
+            return set()
+        changed_props = set()
+        for component, props in json.loads(data).get('response', {}).items():
+            for prop, value in props.items():
+                self.props[(component, prop)] = value
+                changed_props.add((component, prop))
+        return changed_props
+
+    async def _fire(self, triggered, changed):
+        """
+        Run the triggered callbacks in waves; a callback waits while one of its inputs is
+        still the output of another pending callback
+        """
+        while triggered:
+            pending_outputs = {out for cb in triggered for out in cb['outputs']}
+            ready = [cb for cb in triggered
+                     if not any(i in pending_outputs and i not in cb['outputs'] for i in cb['inputs'])] or triggered
+            waiting = [cb for cb in triggered if cb not in ready]
+            results = await asyncio.gather(*[self._call(cb, changed) for cb in ready])
+            changed = set().union(*results)
+            triggered = waiting + [cb for cb in self.callbacks
+                                   if cb not in waiting and any(i in changed for i in cb['inputs'])]
+
+    async def load_page(self):
+        await self._fire([cb for cb in self.callbacks if not cb['prevent_initial_call']], set())
+
+    def _choose(self, action):
+        component, prop = ACTIONS[action]
+        options = self.props.get((component, 'options')) or []
+        values = [o['value'] if isinstance(o, dict) else o for o in options]
+        if not values:
+            return None
+        if action == 'pc_dimensions':
+            size = self.rng.integers(2, min(5, len(values)) + 1)
+            return [values[i] for i in sorted(self.rng.choice(len(values), size, replace=False))]
+        current = self.props.get((component, prop))
+        others = [v for v in values if v != current] or values
+        return others[self.rng.integers(len(others))]
+
+    async def interact(self):
+        """
+        One random interaction and every callback it sets off
+        """
+        names = list(ACTION_WEIGHTS)
+        weights = np.array([ACTION_WEIGHTS[name] for name in names], dtype=float)
+        action = names[self.rng.choice(len(names), p=weights / weights.sum())]
+        value = self._choose(action)
+        if value is None:
+            return
+        key = ACTIONS[action]
+        self.props[key] = value
+        await self._fire([cb for cb in self.callbacks if key in cb['inputs']], {key})
+
+
+def _summary(samples, duration):
+    latencies_ms = np.array([s[0] for s in samples]) * 1000
+    return {
+        'requests': len(samples),
+        'errors': sum(1 for s in samples if not s[1]),
+        'throughput_per_s': len(samples) / duration,
+        'p50_ms': float(np.percentile(latencies_ms, 50)),
+        'p95_ms': float(np.percentile(latencies_ms, 95)),
+        'p99_ms': float(np.percentile(latencies_ms, 99)),
+        'mean_bytes': float(np.mean([s[2] for s in samples]))
+    }
+
+
+async def run_level(base_url, users, duration, think_time=1.0, seed=42):
+    """
+    users concurrent analysts for duration seconds, each loading the page and then interacting
+    with exponentially distributed pauses of mean think_time; returns latency stats per callback
+    """
+    client = make_client(base_url, max_connections=users * 4)
+    try:
+        _, data = await client.request('GET', '/_dash-dependencies')
+        callbacks = server_callbacks(json.loads(data))
+        _, data = await client.request('GET', '/_dash-layout')
+        layout = json.loads(data)
+
+        samples = {}
+        start = time.perf_counter()
+        end = start + duration
+
+        def record(name, seconds, ok, size):
+            if time.perf_counter() <= end:
+                samples.setdefault(name, []).append((seconds, ok, size))
+
+        async def analyst(index):
+            session = AnalystSession(client, callbacks, layout, np.random.default_rng([seed, users, index]), record)
+            await session.load_page()
+            while time.perf_counter() < end:
+                await asyncio.sleep(min(session.rng.exponential(think_time), max(end - time.perf_counter(), 0)))
+                if time.perf_counter() < end:
+                    await session.interact()
+
+        await asyncio.gather(*[analyst(i) for i in range(users)])
+        elapsed = time.perf_counter() - start
+    finally:
+        await client.close()
+
+    everything = [s for callback_samples in samples.values() for s in callback_samples]
+    return {
+        'users': users,
+        'duration_s': elapsed,
+        'overall': _summary(everything, elapsed) if everything else None,
+        'callbacks': {name: _summary(callback_samples, elapsed) for name, callback_samples in sorted(samples.items())}
+    }
+
+
+def run_load_test(base_url, user_levels, duration, think_time=1.0, seed=42):
+    """
+    run_level for every concurrency level in turn
+    """
+    levels = []
+    for users in user_levels:
+        print(f"=== {users} concurrent users for {duration:.0f}s ===")
+        level = asyncio.run(run_level(base_url, users, duration, think_time, seed))
+        levels.append(level)
+        for name, stats in level['callbacks'].items():
+            print(f"  {name:<45} n={stats['requests']:<5} p50 {stats['p50_ms']:8.0f} ms  "
+                  f"p95 {stats['p95_ms']:8.0f} ms  p99 {stats['p99_ms']:8.0f} ms  "
+                  f"{stats['throughput_per_s']:6.2f}/s  errors {stats['errors']}")
+        if level['overall']:
+            overall = level['overall']
+            print(f"  {'all callbacks':<45} n={overall['requests']:<5} p50 {overall['p50_ms']:8.0f} ms  "
+                  f"p95 {overall['p95_ms']:8.0f} ms  p99 {overall['p99_ms']:8.0f} ms  "
+                  f"{overall['throughput_per_s']:6.2f}/s  errors {overall['errors']}")
+    return levels
@@ -0,0 +1,144 @@
+import os
+import time
+import functools
+import tracemalloc
+import numpy as np
+import pandas as pd
+from modules.Metrics import set_gauge
+
+# trace allocations and report per-callback peaks and per-object sizes; slows every allocation down
+MEMORY_TRACKING = os.environ.get('AIRLINE_MEMORY_TRACKING', '') == '1'
+# analyzers read the passenger frame in place and keep their derived columns as separate arrays;
+# '0' gives every analyzer its own copy of the frame
+ANALYZER_COPY_FREE = os.environ.get('AIRLINE_ANALYZER_COPY_FREE', '1') == '1'
+
+# how far object_memory follows attributes of nested objects (fitted models, indexes)
+MAX_ATTRIBUTE_DEPTH = 3
+
+
+def frame_memory(df):
+    """
+    Bytes held by a DataFrame including its index and the contents of object columns
+    """
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+
+def _column_buffer(series):
+    values = series.array
+    # categoricals share their codes; other columns their numpy (or object) array
+    return values.codes if isinstance(values, pd.Categorical) else np.asarray(values)
+
+
+def copied_columns(df, other):
+    """
+    Columns of df that hold their own data instead of sharing other's buffer: every column
+    is checked, so a frame with only some columns copied is not reported as copy-free
+    """
+    if df is other:
+        return []
+    copied = []
+    for col in df.columns:
+        if col not in other.columns or not np.shares_memory(_column_buffer(df[col]), _column_buffer(other[col])):
+            copied.append(col)
+    return copied
+
+
+def _base_array(arr):
+    while isinstance(arr.base, np.ndarray):
+        arr = arr.base
+    return arr
+
+
+def _value_bytes(value, source, seen, depth):
+    """
+    Bytes held by value that were not counted yet; views count their base array once and
+    frames sharing data with source count nothing
+    """
+    if isinstance(value, np.ndarray):
+        base = _base_array(value)
+        if id(base) in seen:
+            return 0
+        seen.add(id(base))
+        return base.nbytes
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        if id(value) in seen:
+            return 0
+        seen.add(id(value))
+        if isinstance(value, pd.DataFrame) and source is not None:
+            # only the columns (and index) not shared with the source frame are this value's own
+            copied = copied_columns(value, source)
+            usage = value[copied].memory_usage(deep=True, index=False).sum() if copied else 0
+            if value.index is not source.index:
+                usage += value.index.memory_usage(deep=True)
+            return int(usage)
+        usage = value.memory_usage(deep=True, index=True)
+        return int(usage.sum() if isinstance(value, pd.DataFrame) else usage)
+    if isinstance(value, dict):
+        return sum(_value_bytes(v, source, seen, depth) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(_value_bytes(v, source, seen, depth) for v in value)
+    if depth < MAX_ATTRIBUTE_DEPTH and hasattr(value, '__dict__') and not isinstance(value, type):
+        return sum(_value_bytes(v, source, seen, depth + 1) for v in vars(value).values())
+    return 0
+
+
+def object_memory(obj, source=None):
+    """
+    Bytes held by each attribute of obj (the whole value for frames and arrays);
+    data shared with the source frame is not counted
+    """
+    seen = set()
+    if isinstance(obj, (np.ndarray, pd.DataFrame, pd.Series)):
+        return {'data': _value_bytes(obj, source, seen, 0)}
+    parts = {}
+    for attr, value in vars(obj).items():
+        size = _value_bytes(value, source, seen, 1)
+        if size:
+            parts[attr] = size
+    return parts
+
+
+def report_object_memory(objects, source=None):
+    """
+    Print and publish (airline_object_memory_bytes) the memory of named long-lived objects
+    objects: {name: object}; returns {name: {'bytes': total, 'parts': {attribute: bytes}}}
+    """
+    report = {}
+    for name, obj in objects.items():
+        parts = object_memory(obj, source if obj is not source else None)
+        total = sum(parts.values())
+        report[name] = {'bytes': total, 'parts': parts}
+        set_gauge('airline_object_memory_bytes', total, object=name)
+        largest = ", ".join(f"{attr} {size / 2 ** 20:.1f}" for attr, size in
+                            sorted(parts.items(), key=lambda item: -item[1])[:4])
+        print(f"[memory] {name}: {total / 2 ** 20:.1f} MB" + (f" ({largest})" if largest else ""))
+    return report
+
+
+def track_memory(name):
+    """
+    Decorator that reports the traced memory peak of each call above its starting allocation,
+    as airline_peak_memory_bytes (largest seen); returns the function untouched unless
+    AIRLINE_MEMORY_TRACKING=1. Peaks are per process, so calls running at the same time add up
+    """
+    def decorator(fn):
+        if not MEMORY_TRACKING:
+            return fn
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                current, peak = tracemalloc.get_traced_memory()
+                peak_bytes = max(peak - before, 0)
+                print(f"[memory] {name}: peak +{peak_bytes / 2 ** 20:.1f} MB, "
+                      f"retained {(current - before) / 2 ** 20:+.1f} MB in {time.perf_counter() - start:.2f}s")
+                set_gauge('airline_peak_memory_bytes', peak_bytes, keep_max=True, function=name)
+        return wrapper
+    return decorator
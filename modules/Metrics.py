@@ -0,0 +1,334 @@
+import os
+import time
+import atexit
+import functools
+import threading
+from contextlib import contextmanager
+from flask import has_request_context
+
+# seconds a process keeps metric updates in memory before writing them to the shared cache
+METRICS_FLUSH_INTERVAL = float(os.environ.get('AIRLINE_METRICS_FLUSH_INTERVAL', 5))
+
+# histogram bucket upper bounds in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+METRIC_HELP = {
+    'airline_callback_seconds': ('histogram', 'Dash callback latency in seconds'),
+    'airline_callback_errors_total': ('counter', 'Dash callbacks that raised an exception'),
+    'airline_stage_seconds': ('histogram', 'Latency of named processing stages in seconds'),
+    'airline_cache_requests_total': ('counter', 'Cache lookups by cache and result'),
+    'airline_payload_over_budget_total': ('counter', 'Figures sent although over their byte budget'),
+    'airline_cache_hit_ratio': ('gauge', 'Share of cache lookups that were hits'),
+    'airline_peak_memory_bytes': ('gauge', 'Largest traced memory peak of a callback or stage above its starting allocation'),
+    'airline_object_memory_bytes': ('gauge', 'Memory held by long-lived objects such as the passenger frame and fitted analyzers')
+}
+
+
+class _MemoryStore:
+    """
+    Per-process metric storage, used until configure_metrics points at a shared cache
+    """
+
+    def __init__(self):
+        self._values = {}
+        self._series = set()
+        self._lock = threading.Lock()
+
+    def incr(self, key, amount=1):
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, key):
+        return self._values.get(key, 0)
+
+    def set(self, key, value):
+        with self._lock:
+            self._values[key] = value
+
+    def maximum(self, key, value):
+        with self._lock:
+            self._values[key] = max(self._values.get(key, 0), value)
+
+    def add_series(self, series):
+        with self._lock:
+            self._series.add(series)
+
+    def series(self):
+        return set(self._series)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+            self._series.clear()
+
+
+class _DiskStore:
+    """
+    Metric storage in a diskcache.Cache, shared by the server, its workers and background jobs
+    Updates collect in process memory and are written in one transaction at most every
+    METRICS_FLUSH_INTERVAL seconds, when /metrics is rendered, after a background job and at
+    exit, so observations on the request path never touch SQLite
+    """
+
+    def __init__(self, cache, interval=METRICS_FLUSH_INTERVAL):
+        self.cache = cache
+        self.interval = interval
+        self._lock = threading.Lock()
+        # series already written to the cache's series list
+        self._known = set()
+        self._reset_pending()
+
+    def _reset_pending(self):
+        self._increments = {}
+        self._values = {}
+        self._maxima = {}
+        self._new_series = set()
+        self._last_flush = time.monotonic()
+
+    def after_fork(self):
+        # the child starts with the parent's unwritten updates; they are the parent's to write
+        self._lock = threading.Lock()
+        self._reset_pending()
+
+    def _maybe_flush(self):
+        if time.monotonic() - self._last_flush >= self.interval:
+            self.flush()
+
+    def incr(self, key, amount=1):
+        with self._lock:
+            self._increments[key] = self._increments.get(key, 0) + amount
+        self._maybe_flush()
+
+    def get(self, key):
+        return self.cache.get(('metrics',) + key, 0)
+
+    def set(self, key, value):
+        with self._lock:
+            self._values[key] = value
+        self._maybe_flush()
+
+    def maximum(self, key, value):
+        with self._lock:
+            self._maxima[key] = max(self._maxima.get(key, value), value)
+        self._maybe_flush()
+
+    def add_series(self, series):
+        if series in self._known:
+            return
+        with self._lock:
+            self._new_series.add(series)
+
+    def flush(self):
+        """
+        Write this process's pending updates to the cache in one transaction
+        """
+        with self._lock:
+            increments, values, maxima, new_series = self._increments, self._values, self._maxima, self._new_series
+            self._reset_pending()
+        if not (increments or values or maxima or new_series):
+            return
+        try:
+            with self.cache.transact():
+                if new_series:
+                    known = self.cache.get(('metrics', 'series'), set())
+                    self.cache.set(('metrics', 'series'), known | new_series)
+                for key, amount in increments.items():
+                    self.cache.incr(('metrics',) + key, amount)
+                for key, value in values.items():
+                    self.cache.set(('metrics',) + key, value)
+                for key, value in maxima.items():
+                    if value > self.cache.get(('metrics',) + key, 0):
+                        self.cache.set(('metrics',) + key, value)
+            self._known |= new_series
+        except Exception as e:
+            print(f"Could not write metrics: {e}")
+
+    def series(self):
+        return self.cache.get(('metrics', 'series'), set())
+
+    def clear(self):
+        with self._lock:
+            self._reset_pending()
+        for series in self.series():
+            for field in ('count', 'sum', 'value') + tuple(range(len(LATENCY_BUCKETS) + 1)):
+                self.cache.delete(('metrics',) + series + (field,))
+        self.cache.delete(('metrics', 'series'))
+        self._known.clear()
+
+
+_store = _MemoryStore()
+
+
+def configure_metrics(cache, reset=True):
+    """
+    Keep metrics in a shared diskcache.Cache so every process reports into one set of series
+    """
+    global _store
+    _store = _DiskStore(cache)
+    if reset:
+        _store.clear()
+
+
+def flush_metrics():
+    """
+    Write the metric updates this process still holds to the shared cache
+    """
+    if isinstance(_store, _DiskStore):
+        _store.flush()
+
+
+def _after_fork():
+    if isinstance(_store, _DiskStore):
+        _store.after_fork()
+
+
+os.register_at_fork(after_in_child=_after_fork)
+atexit.register(flush_metrics)
+
+
+def _labels(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+
+def observe(name, seconds, **labels):
+    """
+    Record one latency observation in a histogram
+    """
+    series = ('histogram', name, _labels(labels))
+    bucket = next((i for i, bound in enumerate(LATENCY_BUCKETS) if seconds <= bound), len(LATENCY_BUCKETS))
+    try:
+        _store.add_series(series)
+        _store.incr(series + (bucket,))
+        _store.incr(series + ('count',))
+        # sums are kept in microseconds so they can be incremented atomically
+        _store.incr(series + ('sum',), int(seconds * 1e6))
+    except Exception as e:
+        print(f"Could not record metric {name}: {e}")
+
+
+def increment(name, amount=1, **labels):
+    """
+    Increase a counter
+    """
+    series = ('counter', name, _labels(labels))
+    try:
+        _store.add_series(series)
+        _store.incr(series + ('value',), amount)
+    except Exception as e:
+        print(f"Could not record metric {name}: {e}")
+
+
+def set_gauge(name, value, keep_max=False, **labels):
+    """
+    Set a gauge, or raise it to value if keep_max and value is larger than the current one
+    """
+    series = ('gauge', name, _labels(labels))
+    try:
+        _store.add_series(series)
+        if keep_max:
+            _store.maximum(series + ('value',), value)
+        else:
+            _store.set(series + ('value',), value)
+    except Exception as e:
+        print(f"Could not record metric {name}: {e}")
+
+
+def record_cache(cache_name, hit):
+    """
+    Count a cache lookup as hit or miss
+    """
+    increment('airline_cache_requests_total', cache=cache_name, result='hit' if hit else 'miss')
+
+
+@contextmanager
+def stage(name, detail=None):
+    """
+    Time a block as a named stage: sample, aggregate, fit, build_figure, builder (a builder run by
+    modules.Executor.run_builders) or serialize
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe('airline_stage_seconds', time.perf_counter() - start, stage=name, detail=detail)
+
+
+def timed_callback(name):
+    """
+    Decorator for Dash callbacks: latency histogram, call count and errors per callback
+    """
+    def decorator(callback_fn):
+        @functools.wraps(callback_fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return callback_fn(*args, **kwargs)
+            except Exception:
+                increment('airline_callback_errors_total', callback=name)
+                raise
+            finally:
+                observe('airline_callback_seconds', time.perf_counter() - start, callback=name)
+                # background jobs run outside a request in a process that ends with the job
+                if not has_request_context():
+                    flush_metrics()
+        return wrapper
+    return decorator
+
+
+def _escape_label_value(value):
+    # the text exposition format escapes backslash, double quote and line feed in label values
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape_label_value(v)}"' for k, v in pairs) + '}'
+
+
+def render_prometheus():
+    """
+    All metrics in the Prometheus text exposition format
+    Other processes' updates appear when those flush: on their first update once
+    METRICS_FLUSH_INTERVAL seconds have passed, after a background job or at exit
+    """
+    flush_metrics()
+    by_name = {}
+    for kind, name, labels in _store.series():
+        by_name.setdefault(name, []).append((kind, labels))
+
+    # hit ratio per cache, derived from the lookup counter
+    hit_ratio = {}
+    for kind, labels in by_name.get('airline_cache_requests_total', []):
+        label_dict = dict(labels)
+        hits, total = hit_ratio.get(label_dict['cache'], (0, 0))
+        value = _store.get(('counter', 'airline_cache_requests_total', labels, 'value'))
+        hit_ratio[label_dict['cache']] = (hits + (value if label_dict['result'] == 'hit' else 0), total + value)
+
+    lines = []
+    for name in sorted(by_name):
+        kind, help_text = METRIC_HELP.get(name, (by_name[name][0][0], name))
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for series_kind, labels in sorted(by_name[name]):
+            series = (series_kind, name, labels)
+            if series_kind in ('counter', 'gauge'):
+                lines.append(f'{name}{_format_labels(labels)} {_store.get(series + ("value",))}')
+                continue
+            cumulative = 0
+            for i, bound in enumerate(LATENCY_BUCKETS + (float('inf'),)):
+                cumulative += _store.get(series + (i,))
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{name}_bucket{_format_labels(labels, [("le", le)])} {cumulative}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {_store.get(series + ("sum",)) / 1e6}')
+            lines.append(f'{name}_count{_format_labels(labels)} {_store.get(series + ("count",))}')
+
+    if hit_ratio:
+        kind, help_text = METRIC_HELP['airline_cache_hit_ratio']
+        lines.append(f'# HELP airline_cache_hit_ratio {help_text}')
+        lines.append(f'# TYPE airline_cache_hit_ratio {kind}')
+        for cache_name, (hits, total) in sorted(hit_ratio.items()):
+            lines.append(f'airline_cache_hit_ratio{_format_labels([("cache", cache_name)])} {hits / total if total else 0}')
+
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,245 @@
+import os
+import time
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import NearestNeighbors
+
+# upper bound on the neighbours a look-alike query may ask for
+MAX_K = int(os.environ.get('AIRLINE_MAX_NEIGHBORS', 100))
+# upper bound on the passenger ids of one batch query
+MAX_BATCH_IDS = int(os.environ.get('AIRLINE_MAX_BATCH_IDS', 1000))
+
+
+def parse_k(value, default=10):
+    """
+    Neighbour count of a query: an integer from 1 to MAX_K, default when not given
+    Raises ValueError otherwise
+    """
+    if value is None:
+        return default
+    if isinstance(value, str):
+        value = value.strip()
+        value = int(value) if value.isdigit() else None
+    if isinstance(value, bool) or not isinstance(value, int) or not 1 <= value <= MAX_K:
+        raise ValueError(f"k must be an integer from 1 to {MAX_K}")
+    return value
+
+
+def parse_passenger_ids(payload):
+    """
+    Passenger ids of a batch query body: a JSON object whose 'ids' is a list of 1 to
+    MAX_BATCH_IDS integers or strings
+    Raises ValueError otherwise
+    """
+    if not isinstance(payload, dict):
+        raise ValueError('Body must be a JSON object like {"ids": [...], "k": 10}')
+    passenger_ids = payload.get('ids')
+    if not isinstance(passenger_ids, list) or not 1 <= len(passenger_ids) <= MAX_BATCH_IDS:
+        raise ValueError(f"ids must be a list of 1 to {MAX_BATCH_IDS} passenger ids")
+    if any(isinstance(pid, bool) or not isinstance(pid, (int, str)) for pid in passenger_ids):
+        raise ValueError("ids must be integers or strings")
+    return passenger_ids
+
+
+class PassengerNeighborIndex:
+    """
+    Nearest-neighbour index for passenger look-alike queries and cluster assignment
+    """
+
+    def __init__(self, scaled_features, passenger_ids, cluster_labels=None,
+                 cluster_model=None, algorithm='auto', leaf_size=40):
+        self.features = np.ascontiguousarray(scaled_features, dtype=np.float64)
+        self.passenger_ids = np.asarray(passenger_ids)
+        self.cluster_labels = None if cluster_labels is None else np.asarray(cluster_labels)
+        self.cluster_model = cluster_model
+        self.algorithm = algorithm
+        self.leaf_size = leaf_size
+        self.nn = None
+        # passenger id -> row position in the feature matrix
+        self._id_index = pd.Index(self.passenger_ids)
+
+    @classmethod
+    def from_analyzer(cls, analyzer, algorithm='auto', leaf_size=40):
+        """
+        Build an index from a fitted CustomerSegmentationAnalyzer
+        """
+        _, X_scaled = analyzer.prepare_clustering_features()
+
+        if 'id' in analyzer.df.columns:
+            passenger_ids = analyzer.df['id'].to_numpy()
+        else:
+            passenger_ids = analyzer.df.index.to_numpy()
+
+        kmeans_results = analyzer.cluster_results.get('kmeans', {})
+        index = cls(
+            X_scaled,
+            passenger_ids,
+            cluster_labels=kmeans_results.get('labels'),
+            cluster_model=kmeans_results.get('model'),
+            algorithm=algorithm,
+            leaf_size=leaf_size
+        )
+        return index.build()
+
+    def build(self):
+        """
+        Fit the underlying KD-tree / ball tree
+        """
+        self.nn = NearestNeighbors(algorithm=self.algorithm, leaf_size=self.leaf_size)
+        self.nn.fit(self.features)
+        return self
+
+    def _positions(self, passenger_ids):
+        positions = self._id_index.get_indexer(passenger_ids)
+        missing = [pid for pid, pos in zip(passenger_ids, positions) if pos < 0]
+        if missing:
+            raise KeyError(f"Unknown passenger id(s): {missing[:5]}")
+        return positions
+
+    def _cluster_of(self, position):
+        if self.cluster_labels is None:
+            return None
+        return int(self.cluster_labels[position])
+
+    def query_vectors(self, vectors, k=10):
+        """
+        Raw k-NN search for scaled feature vectors; returns (distances, positions)
+        """
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float64))
+        k = min(k, len(self.features))
+        return self.nn.kneighbors(vectors, n_neighbors=k)
+
+    def query_batch(self, passenger_ids, k=10):
+        """
+        Segment and k most similar passengers for each of the given passenger ids
+        """
+        passenger_ids = list(passenger_ids)
+        if not passenger_ids:
+            return []
+        positions = self._positions(passenger_ids)
+
+        # ask for one extra neighbour since each passenger is its own nearest match
+        distances, neighbors = self.query_vectors(self.features[positions], k=k + 1)
+
+        results = []
+        for pos, dist_row, nbr_row in zip(positions, distances, neighbors):
+            keep = nbr_row != pos
+            dist_row, nbr_row = dist_row[keep][:k], nbr_row[keep][:k]
+            results.append({
+                'passenger_id': self.passenger_ids[pos].item(),
+                'cluster': self._cluster_of(pos),
+                'neighbors': [
+                    {
+                        'passenger_id': self.passenger_ids[n].item(),
+                        'distance': float(d),
+                        'cluster': self._cluster_of(n)
+                    }
+                    for n, d in zip(nbr_row, dist_row)
+                ]
+            })
+        return results
+
+    def query(self, passenger_id, k=10):
+        """
+        Segment and k most similar passengers for a single passenger id
+        """
+        return self.query_batch([passenger_id], k=k)[0]
+
+    def assign_clusters(self, vectors, k=15):
+        """
+        Assign segments to new scaled feature vectors
+        Uses the fitted k-means model when available, otherwise a majority vote of neighbours
+        """
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float64))
+        if self.cluster_model is not None:
+            return self.cluster_model.predict(vectors)
+        if self.cluster_labels is None:
+            raise ValueError("Index has no cluster labels to assign from")
+
+        _, neighbors = self.query_vectors(vectors, k=k)
+        neighbor_labels = self.cluster_labels[neighbors]
+        n_labels = int(self.cluster_labels.max()) + 1
+        votes = np.apply_along_axis(np.bincount, 1, neighbor_labels, minlength=n_labels)
+        return votes.argmax(axis=1)
+
+    def save(self, path):
+        """
+        Persist the fitted index to disk
+        """
+        joblib.dump({
+            'nn': self.nn,
+            'features': self.features,
+            'passenger_ids': self.passenger_ids,
+            'cluster_labels': self.cluster_labels,
+            'cluster_model': self.cluster_model,
+            'algorithm': self.algorithm,
+            'leaf_size': self.leaf_size
+        }, path)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load an index saved with save()
+        """
+        state = joblib.load(path)
+        index = cls(
+            state['features'],
+            state['passenger_ids'],
+            cluster_labels=state['cluster_labels'],
+            cluster_model=state['cluster_model'],
+            algorithm=state['algorithm'],
+            leaf_size=state['leaf_size']
+        )
+        index.nn = state['nn']
+        return index
+
+
+def benchmark_neighbor_index(index, n_queries=500, k=10, batch_size=100, random_state=42):
+    """
+    Measure query latency and recall@k of an index against exact brute-force search
+    """
+    rng = np.random.RandomState(random_state)
+    n_queries = min(n_queries, len(index.passenger_ids))
+    query_ids = index.passenger_ids[rng.choice(len(index.passenger_ids), n_queries, replace=False)]
+
+    # single-query latency
+    latencies = []
+    for pid in query_ids:
+        start = time.perf_counter()
+        index.query(pid, k=k)
+        latencies.append(time.perf_counter() - start)
+    latencies_ms = np.array(latencies) * 1000
+
+    # batch throughput
+    start = time.perf_counter()
+    batch_results = []
+    for i in range(0, n_queries, batch_size):
+        batch_results.extend(index.query_batch(query_ids[i:i + batch_size], k=k))
+    batch_seconds = time.perf_counter() - start
+
+    # recall against exact brute-force neighbours
+    exact = NearestNeighbors(algorithm='brute').fit(index.features)
+    positions = index._positions(query_ids)
+    _, exact_neighbors = exact.kneighbors(index.features[positions], n_neighbors=min(k + 1, len(index.features)))
+
+    hits = 0
+    total = 0
+    for pos, exact_row, result in zip(positions, exact_neighbors, batch_results):
+        expected = set(index.passenger_ids[exact_row[exact_row != pos][:k]].tolist())
+        found = set(n['passenger_id'] for n in result['neighbors'])
+        hits += len(expected & found)
+        total += len(expected)
+
+    return {
+        'algorithm': index.algorithm,
+        'n_points': len(index.passenger_ids),
+        'n_queries': n_queries,
+        'k': k,
+        'latency_ms_p50': float(np.percentile(latencies_ms, 50)),
+        'latency_ms_p95': float(np.percentile(latencies_ms, 95)),
+        'latency_ms_p99': float(np.percentile(latencies_ms, 99)),
+        'batch_queries_per_second': n_queries / batch_seconds if batch_seconds > 0 else float('inf'),
+        'recall_at_k': hits / total if total else 1.0
+    }
@@ -1,8 +1,33 @@
+import numpy as np
 import plotly.graph_objects as go
 from utils import get_display_name, get_display_value
+from modules.Payload import figure_budget
 import pandas as pd
 
 
+# dimension label -> data column
+PC_DIMENSION_COLUMNS = {
+    'Customer Type': 'Customer Type',
+    'Gender': 'Gender',
+    'Class': 'Class',
+    'Type of Travel': 'Type of Travel',
+    'Age Group': 'Age_Group',
+    'Satisfaction': 'satisfaction',
+    'Departure Delay Category': 'Departure_Delay_Category',
+    'Arrival Delay Category': 'Arrival_Delay_Category'
+}
+# columns shown when none of the selected dimensions is available
+PC_DEFAULT_COLUMNS = ['Customer Type', 'Class', 'Type of Travel', 'satisfaction']
+
+
+def parallel_categories_columns(selected_dimensions):
+    """
+    Data columns the chart reads for the selected dimensions
+    """
+    return [PC_DIMENSION_COLUMNS[d] for d in selected_dimensions if d in PC_DIMENSION_COLUMNS] + PC_DEFAULT_COLUMNS
+
+
+@figure_budget('parallel_categories_chart')
 def create_parallel_categories_chart(df, selected_dimensions, sample_size=5000):
     """
     Create parallel categories chart for categorical airline data with full width and complete labels
@@ -10,19 +35,10 @@ def create_parallel_categories_chart(df, selected_dimensions, sample_size=5000):
     if sample_size > 0 and len(df) > sample_size:
         plot_data = df.sample(n=sample_size, random_state=42)
     else:
-        plot_data = df.copy()
+        plot_data = df
     
     # define available categorical dimensions 
-    available_dimensions = {
-        'Customer Type': 'Customer Type',
-        'Gender': 'Gender', 
-        'Class': 'Class',
-        'Type of Travel': 'Type of Travel',
-        'Age Group': 'Age_Group',
-        'Satisfaction': 'satisfaction',
-        'Departure Delay Category': 'Departure_Delay_Category',
-        'Arrival Delay Category': 'Arrival_Delay_Category'
-    }
+    available_dimensions = PC_DIMENSION_COLUMNS
     
     # filter selected dimensions
     valid_dimensions = []
@@ -35,7 +51,7 @@ def create_parallel_categories_chart(df, selected_dimensions, sample_size=5000):
     
     # If no valid dimensions, use default
     if not valid_dimensions:
-        default_dims = ['Customer Type', 'Class', 'Type of Travel', 'satisfaction']
+        default_dims = PC_DEFAULT_COLUMNS
         valid_dimensions = [d for d in default_dims if d in plot_data.columns]
         valid_labels = [d.replace('_', ' ').title() for d in valid_dimensions]
     
@@ -47,6 +63,7 @@ def create_parallel_categories_chart(df, selected_dimensions, sample_size=5000):
         )
     
     dimensions = []
+    code_columns = {}
     
     for i, (col, label) in enumerate(zip(valid_dimensions, valid_labels)):
         values = plot_data[col].astype(str).fillna('Unknown')
@@ -59,17 +76,29 @@ def create_parallel_categories_chart(df, selected_dimensions, sample_size=5000):
             display_categories = [get_display_value(str(cat)) for cat in categories]
         else:
             display_categories = display_values.unique().tolist()
+        # values outside the categories (e.g. missing ones) go last
+        display_categories = list(dict.fromkeys(display_categories + display_values.unique().tolist()))
         
+        # rows as small integer codes; the labels are sent once per dimension as tick text
+        code_columns[i] = pd.Categorical(display_values, categories=display_categories).codes.astype(
+            np.int8 if len(display_categories) < 128 else np.int16)
         dimensions.append(dict(
-            values=display_values, 
             label=get_display_name(label),
             categoryorder='array',
-            categoryarray=display_categories
+            categoryarray=list(range(len(display_categories))),
+            ticktext=display_categories
         ))
     
+    # one path per distinct category combination with its passenger count,
+    # so the payload no longer grows with the number of rows
+    combinations = pd.DataFrame(code_columns).value_counts(sort=False).reset_index(name='count')
+    for i, dimension in enumerate(dimensions):
+        dimension['values'] = combinations[i].to_numpy()
+    
     # create parallel categories chart
     fig = go.Figure(data=[go.Parcats(
         dimensions=dimensions,
+        counts=combinations['count'].to_numpy(),
         line=dict(
             colorscale='viridis',
             showscale=True,
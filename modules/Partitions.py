@@ -0,0 +1,173 @@
+import os
+import numpy as np
+import pandas as pd
+
+# comma separated key=value pairs limiting which partitions are loaded at all, e.g.
+# 'airline=AA,quarter=2024Q1'; a key given more than once matches any of its values
+PARTITION_FILTER = os.environ.get('AIRLINE_PARTITIONS', '')
+DATA_EXTENSIONS = ('.csv', '.parquet')
+
+
+def parse_partition_filter(text):
+    """
+    'airline=AA,airline=BA,quarter=2024Q1' -> {'airline': ['AA', 'BA'], 'quarter': ['2024Q1']}
+    """
+    scope = {}
+    for item in text.split(','):
+        if '=' in item:
+            key, value = item.split('=', 1)
+            scope.setdefault(key.strip(), []).append(value.strip())
+    return scope
+
+
+def partition_id(keys):
+    return '/'.join(f'{key}={value}' for key, value in keys.items())
+
+
+def discover_partitions(root):
+    """
+    Hive-style partitions under root: every directory reached through key=value directories
+    that holds data files, e.g. root/airline=AA/region=EU/quarter=2024Q1/part-0.csv
+    [{'id', 'keys', 'path', 'files', 'fingerprint'}] sorted by id
+    """
+    partitions = []
+    for directory, subdirs, files in os.walk(root):
+        subdirs.sort()
+        relative = os.path.relpath(directory, root)
+        segments = [] if relative == '.' else relative.split(os.sep)
+        if not all('=' in segment for segment in segments):
+            continue
+        data_files = sorted(os.path.join(directory, f) for f in files if f.endswith(DATA_EXTENSIONS))
+        if not segments or not data_files:
+            continue
+        keys = dict(segment.split('=', 1) for segment in segments)
+        stats = [os.stat(f) for f in data_files]
+        partitions.append({
+            'id': partition_id(keys),
+            'keys': keys,
+            'path': directory,
+            'files': data_files,
+            # changes whenever a file of the partition is rewritten, added or removed
+            'fingerprint': ';'.join(f'{os.path.basename(f)}:{s.st_size}:{s.st_mtime_ns}'
+                                    for f, s in zip(data_files, stats))
+        })
+    return sorted(partitions, key=lambda p: p['id'])
+
+
+def prune_partitions(partitions, scope):
+    """
+    Partitions whose keys match scope ({key: value or [values]}); keys a partition lacks do not match
+    """
+    if not scope:
+        return list(partitions)
+    wanted = {key: set(values if isinstance(values, (list, tuple, set)) else [values])
+              for key, values in scope.items()}
+    return [p for p in partitions if all(p['keys'].get(key) in values for key, values in wanted.items())]
+
+
+def partition_keys(partitions):
+    """
+    Partition key names in the order they first appear in the directory layout
+    """
+    return list(dict.fromkeys(key for p in partitions for key in p['keys']))
+
+
+def _read_file(path):
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+
+def read_partitions(partitions, columns=None):
+    """
+    Raw rows of the given partitions, partition by partition, with one column per partition key
+    Also returns each partition's index range [start, stop) in the result, which survives
+    row-wise preprocessing (dropped rows leave gaps, the ranges stay valid)
+    """
+    keys = partition_keys(partitions)
+    frames = []
+    ranges = {}
+    start = 0
+    for partition in partitions:
+        frame = pd.concat([_read_file(f) for f in partition['files']], ignore_index=True)
+        if columns is not None:
+            frame = frame[[c for c in columns if c in frame.columns]]
+        for key in keys:
+            frame[key] = partition['keys'].get(key)
+        frames.append(frame)
+        ranges[partition['id']] = (start, start + len(frame))
+        start += len(frame)
+    df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    return df, ranges
+
+
+def write_partition(df, root, keys, fmt='csv', name='part-0'):
+    """
+    Write one partition's rows to root/key=value/.../name.csv (or .parquet, needs pyarrow)
+    """
+    directory = os.path.join(root, *[f'{key}={value}' for key, value in keys.items()])
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f'{name}.{fmt}')
+    if fmt == 'parquet':
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+    return path
+
+
+class PartitionedData:
+    """
+    Row ranges of the loaded partitions in the preprocessed frame, plus their aggregates,
+    computed once per partition and kept in the shared cache until the partition's files change
+    """
+
+    def __init__(self, df, partitions, ranges, cache=None):
+        self.df = df
+        self.partitions = {p['id']: p for p in partitions}
+        self.keys = partition_keys(partitions)
+        self.cache = cache
+        # index ranges -> positions in df (rows dropped by preprocessing shift them)
+        self.slices = {pid: tuple(df.index.searchsorted([start, stop])) for pid, (start, stop) in ranges.items()}
+
+    def options(self):
+        return [{'label': ' / '.join(p['keys'].values()), 'value': pid} for pid, p in self.partitions.items()]
+
+    def normalize_scope(self, scope):
+        """
+        Sorted tuple of known partition ids; () when the scope is every loaded partition
+        """
+        selected = tuple(sorted(pid for pid in (scope or []) if pid in self.partitions))
+        return () if len(selected) == len(self.partitions) else selected
+
+    def frame(self, scope=()):
+        """
+        Rows of the partitions in scope, in load order; only their ranges of the frame are read
+        """
+        if not scope:
+            return self.df
+        bounds = [self.slices[pid] for pid in self.partitions if pid in scope]
+        if len(bounds) == 1:
+            return self.df.iloc[bounds[0][0]:bounds[0][1]]
+        return self.df.iloc[np.concatenate([np.arange(start, stop) for start, stop in bounds])]
+
+    def partition_aggregates(self, pid, group_cols):
+        """
+        Full-precision summary aggregates of one partition, from the cache when its files are unchanged
+        """
+        from modules.Aggregates import compute_summary_aggregates
+        key = ('partition-aggregates', pid, self.partitions[pid]['fingerprint'], tuple(group_cols))
+        aggregates = self.cache.get(key) if self.cache is not None else None
+        if aggregates is None:
+            start, stop = self.slices[pid]
+            aggregates = compute_summary_aggregates(self.df.iloc[start:stop], group_cols, digits=None)
+            if self.cache is not None:
+                self.cache.set(key, aggregates)
+        return aggregates
+
+    def summary_aggregates(self, group_cols, scope=()):
+        """
+        compute_summary_aggregates over the rows in scope, merged from the per-partition aggregates
+        """
+        from modules.Aggregates import merge_summary_aggregates
+        pids = [pid for pid in self.partitions if not scope or pid in scope]
+        return merge_summary_aggregates([self.partition_aggregates(pid, group_cols) for pid in pids], group_cols)
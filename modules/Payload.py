@@ -0,0 +1,243 @@
+import os
+import time
+import base64
+import functools
+import threading
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+from plotly.io.json import to_json_plotly
+from modules.Metrics import increment, observe, stage
+
+# 'compact' ships typed arrays and a trimmed template, 'full' the figure exactly as built
+PAYLOAD_MODE = os.environ.get('AIRLINE_PAYLOAD_MODE', 'compact')
+# 1 enforces budgets: a figure over its budget raises PayloadBudgetError (tests, benchmarks,
+# CI); by default a server only logs it and counts it in airline_payload_over_budget_total
+PAYLOAD_STRICT = os.environ.get('AIRLINE_PAYLOAD_STRICT', '0') == '1'
+
+# serialized bytes allowed per figure builder, measured on the compact encoding
+FIGURE_BYTE_BUDGETS = {
+    'distribution_chart': 8_000,
+    'radar_chart': 10_000,
+    # all eight dimensions on every row: ~1,250 category combinations as int8 codes
+    'parallel_categories_chart': 24_000,
+    'service_factors_chart': 8_000,
+    'rf_comparison_chart': 10_000,
+    'rf_subgroup_chart': 8_000,
+    # WebGL mode tops out at DENSITY_POINT_THRESHOLD points, density mode is grid-sized
+    'cluster_scatter': 400_000,
+    'cluster_profiles_chart': 8_000,
+    'cluster_comparison_chart': 8_000,
+    'distance_delay_chart': 50_000
+}
+
+# numeric arrays shorter than this stay plain JSON lists
+MIN_TYPED_ARRAY_LENGTH = 32
+
+# template sections only needed when the figure has that kind of subplot
+SUBPLOT_TEMPLATE_KEYS = {
+    'polar': ('scatterpolar', 'scatterpolargl', 'barpolar'),
+    'ternary': ('scatterternary',),
+    'scene': ('scatter3d', 'surface', 'mesh3d', 'cone', 'streamtube', 'volume', 'isosurface'),
+    'geo': ('scattergeo', 'choropleth'),
+    'mapbox': ('scattermapbox', 'choroplethmapbox', 'densitymapbox')
+}
+
+_builder_depth = threading.local()
+
+
+class PayloadBudgetError(ValueError):
+    """
+    A figure builder produced more bytes than its budget allows
+    """
+
+
+def configure_serialization():
+    """
+    Use orjson for figure serialization when installed; returns whether gzip
+    compression of responses is available (flask-compress)
+    """
+    try:
+        import orjson  # noqa: F401
+        pio.json.config.default_engine = 'orjson'
+    except ImportError:
+        print("orjson not installed, using the standard json encoder")
+
+    try:
+        import flask_compress  # noqa: F401
+        return True
+    except ImportError:
+        print("flask-compress not installed, responses are sent uncompressed")
+        return False
+
+
+def _typed_array(values, max_ndim=1):
+    """
+    Base64 typed-array spec understood by plotly.js, or None if the values are not numeric
+    or the plain JSON list would be smaller (e.g. values already rounded to a few digits)
+    """
+    if isinstance(values, list):
+        if not values or not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values):
+            return None
+        arr = np.asarray(values)
+    elif isinstance(values, np.ndarray):
+        arr = values
+    else:
+        return None
+
+    if arr.dtype.kind not in 'iuf' or arr.size < MIN_TYPED_ARRAY_LENGTH:
+        return None
+    if arr.ndim > max_ndim:
+        return None
+
+    if arr.dtype.kind == 'f':
+        finite = arr[np.isfinite(arr)]
+        # whole numbers such as ids would lose precision in float32
+        if len(finite) == arr.size and np.all(finite == np.round(finite)) and np.abs(finite).max() < 2 ** 31:
+            arr = arr.astype('<i4')
+        else:
+            arr = arr.astype('<f4')
+    elif arr.dtype.itemsize > 4:
+        if np.abs(arr).max() >= 2 ** 31:
+            return None
+        arr = arr.astype('<i4')
+    else:
+        arr = arr.astype(arr.dtype.newbyteorder('<'))
+
+    spec = {
+        'dtype': arr.dtype.str[1:],
+        'bdata': base64.b64encode(np.ascontiguousarray(arr).tobytes()).decode('ascii')
+    }
+    if arr.ndim > 1:
+        spec['shape'] = ','.join(str(n) for n in arr.shape)
+    if len(spec['bdata']) >= len(to_json_plotly(values)):
+        return None
+    return spec
+
+
+def _encode_arrays(obj, key=None):
+    if isinstance(obj, dict):
+        return {k: _encode_arrays(v, k) for k, v in obj.items()}
+    if isinstance(obj, (list, np.ndarray)):
+        # plotly.js decodes multi-dimensional typed arrays for z (heatmap matrices, image pixels)
+        spec = _typed_array(obj, max_ndim=3 if key == 'z' else 1)
+        if spec is not None:
+            return spec
+        if isinstance(obj, list):
+            # nested objects such as parcats dimensions; nested lists of numbers stay as they are
+            return [_encode_arrays(v) if isinstance(v, dict) else v for v in obj]
+    return obj
+
+
+def _slim_template(template, trace_types):
+    """
+    Keep only the template parts the figure's trace and subplot types use
+    """
+    if not template:
+        return template
+    layout = {
+        key: value for key, value in template.get('layout', {}).items()
+        if key not in SUBPLOT_TEMPLATE_KEYS or any(t in trace_types for t in SUBPLOT_TEMPLATE_KEYS[key])
+    }
+    data = {t: value for t, value in template.get('data', {}).items() if t in trace_types}
+    return {'data': data, 'layout': layout}
+
+
+def compact_figure(fig):
+    """
+    JSON-ready figure dict with numeric arrays as float32/int32 typed arrays and a trimmed template
+    """
+    fig_dict = fig.to_plotly_json() if isinstance(fig, go.Figure) else fig
+    data = [_encode_arrays(trace) for trace in fig_dict.get('data', [])]
+    layout = dict(fig_dict.get('layout', {}))
+    trace_types = {trace.get('type', 'scatter') for trace in data}
+    if 'template' in layout:
+        layout['template'] = _slim_template(layout['template'], trace_types)
+    compacted = {'data': data, 'layout': layout}
+    if fig_dict.get('frames'):
+        compacted['frames'] = fig_dict['frames']
+    return compacted
+
+
+def figure_payload_bytes(fig):
+    """
+    Size of the figure as Dash will serialize it
+    """
+    return len(to_json_plotly(fig).encode('utf-8'))
+
+
+def _is_figure(obj):
+    # go.Figure, or a plain figure dict from the fast builders
+    return isinstance(obj, go.Figure) or (isinstance(obj, dict) and 'data' in obj and 'layout' in obj)
+
+
+def _check_figure(name, fig):
+    with stage('serialize', name):
+        if PAYLOAD_MODE == 'compact':
+            fig = compact_figure(fig)
+        size = figure_payload_bytes(fig)
+    budget = FIGURE_BYTE_BUDGETS.get(name)
+
+    print(f"[payload] {name}: {size:,} bytes" + (f" (budget {budget:,})" if budget else ""))
+    if budget and size > budget:
+        message = f"{name} figure is {size:,} bytes, over its {budget:,} byte budget"
+        # budgets are measured on the compact encoding; full mode only reports them
+        if PAYLOAD_STRICT and PAYLOAD_MODE == 'compact':
+            raise PayloadBudgetError(message)
+        # the figure is still sent: a large chart beats a failed callback
+        print(f"Warning: {message}")
+        increment('airline_payload_over_budget_total', figure=name)
+    return fig
+
+
+def figure_budget(name):
+    """
+    Decorator for figure builders: logs the serialized size against FIGURE_BYTE_BUDGETS[name]
+    and, in compact mode, returns the compacted figure dict (figures inside tuples too)
+    Builders called from another budgeted builder are left to the outer one
+    """
+    def decorator(builder):
+        @functools.wraps(builder)
+        def wrapper(*args, **kwargs):
+            depth = getattr(_builder_depth, 'value', 0)
+            _builder_depth.value = depth + 1
+            start = time.perf_counter()
+            try:
+                result = builder(*args, **kwargs)
+            finally:
+                _builder_depth.value = depth
+            if depth > 0:
+                return result
+            observe('airline_stage_seconds', time.perf_counter() - start, stage='build_figure', detail=name)
+
+            if _is_figure(result):
+                return _check_figure(name, result)
+            if isinstance(result, tuple):
+                return tuple(_check_figure(name, item) if _is_figure(item) else item
+                             for item in result)
+            return result
+        return wrapper
+    return decorator
+
+
+def register_payload_logging(server):
+    """
+    Log the response size of completed Dash callbacks that return a figure, per output;
+    the text and store outputs are small and not worth reading the body back for
+    """
+    from flask import request
+
+    @server.after_request
+    def log_callback_payload(response):
+        if request.path.endswith('/_dash-update-component') and response.status_code == 200 \
+                and not response.direct_passthrough:
+            payload = request.get_json(silent=True) or {}
+            if '.figure' not in payload.get('output', ''):
+                return response
+            body = response.get_data()
+            # background callback polls without a result carry no 'response' key
+            if b'"response"' in body:
+                print(f"[payload] callback {payload.get('output', '?')}: {len(body):,} bytes")
+        return response
+
+    return log_callback_payload
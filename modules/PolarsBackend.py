@@ -0,0 +1,212 @@
+import os
+import numpy as np
+import pandas as pd
+from utils import get_display_value
+
+# load and preprocess with Polars lazy frames instead of pandas (needs polars)
+POLARS_BACKEND = os.environ.get('AIRLINE_POLARS', '0') == '1'
+
+SERVICE_ATTRIBUTES = [
+    'Inflight wifi service', 'Departure/Arrival time convenient',
+    'Ease of Online booking', 'Gate location', 'Food and drink',
+    'Online boarding', 'Seat comfort', 'Inflight entertainment',
+    'On-board service', 'Leg room service', 'Baggage handling',
+    'Checkin service', 'Inflight service', 'Cleanliness'
+]
+AGE_LABELS = ['Young (≤25)', 'Adult (26-40)', 'Middle-aged (41-60)', 'Senior (>60)']
+AGE_BINS = [0, 25, 40, 60, 100]
+DELAY_LABELS = ['No Delay', 'Short (1-15min)', 'Medium (16-60min)', 'Long (>60min)']
+DELAY_BINS = [-1, 0, 15, 60, float('inf')]
+# index label of each row, so dropped rows leave the same gaps as in pandas
+ROW_INDEX = '__row_index'
+
+
+def _polars():
+    try:
+        import polars as pl
+    except ImportError:
+        raise ImportError("The Polars backend needs polars; install it or unset AIRLINE_POLARS")
+    return pl
+
+
+def scan_survey(path):
+    """
+    Lazy frame over a survey CSV, a Parquet file or a directory of Parquet part files
+    Columns without a header get the names pandas gives them ('Unnamed: 0')
+    """
+    pl = _polars()
+    if os.path.isdir(path):
+        lf = pl.scan_parquet(os.path.join(path, '*.parquet'))
+    elif path.endswith('.parquet'):
+        lf = pl.scan_parquet(path)
+    else:
+        # delays with missing values are floats, as pandas reads them
+        lf = pl.scan_csv(path, schema_overrides={'Arrival Delay in Minutes': pl.Float64})
+    names = lf.collect_schema().names()
+    renames = {name: f'Unnamed: {i}' for i, name in enumerate(names) if name == ''}
+    return lf.rename(renames) if renames else lf
+
+
+def _cut(pl, column, bins, labels):
+    """
+    pd.cut(column, bins, labels=labels): right-closed bins, null outside them
+    """
+    expr = pl.when((pl.col(column) > bins[0]) & (pl.col(column) <= bins[1])).then(pl.lit(labels[0]))
+    for low, high, label in zip(bins[1:-1], bins[2:], labels[1:]):
+        expr = expr.when((pl.col(column) > low) & (pl.col(column) <= high)).then(pl.lit(label))
+    return expr.otherwise(None).cast(pl.Enum(labels))
+
+
+def preprocess_lazy(lf):
+    """
+    The steps of preprocess_airline_data as a lazy query; returns (lazy frame, service attributes)
+    Nothing is read until the frame is collected, so filters and column selections applied
+    afterwards are pushed down into the scan
+    """
+    pl = _polars()
+    columns = lf.collect_schema().names()
+    lf = lf.with_row_index(ROW_INDEX)
+
+    if 'Arrival Delay in Minutes' in columns:
+        lf = lf.with_columns(pl.col('Arrival Delay in Minutes').fill_null(0))
+    if 'satisfaction' in columns:
+        lf = lf.filter(pl.col('satisfaction').is_not_null())
+
+    derived = []
+    if 'satisfaction' in columns:
+        derived.append((pl.col('satisfaction') == 'satisfied').cast(pl.Int64).alias('satisfaction_binary'))
+    if 'Age' in columns:
+        derived.append(_cut(pl, 'Age', AGE_BINS, AGE_LABELS).alias('Age_Group'))
+    if 'Departure Delay in Minutes' in columns:
+        derived.append(_cut(pl, 'Departure Delay in Minutes', DELAY_BINS, DELAY_LABELS).alias('Departure_Delay_Category'))
+    if 'Arrival Delay in Minutes' in columns:
+        derived.append(_cut(pl, 'Arrival Delay in Minutes', DELAY_BINS, DELAY_LABELS).alias('Arrival_Delay_Category'))
+
+    # the pandas path clips ratings only when they already lie in the clip range, which
+    # leaves them unchanged, so there is no clipping step here
+    service_attributes = [attr for attr in SERVICE_ATTRIBUTES if attr in columns]
+    if service_attributes:
+        derived.append(pl.mean_horizontal(service_attributes).alias('Service_Quality_Score'))
+    if 'Type of Travel' in columns and 'Class' in columns:
+        derived.append(pl.concat_str([pl.col('Type of Travel'), pl.lit('_'), pl.col('Class')])
+                       .alias('Travel_Experience'))
+    return lf.with_columns(derived), service_attributes
+
+
+def to_pandas(frame):
+    """
+    Collected Polars frame -> pandas frame with the dtypes preprocess_airline_data produces
+    (converted column by column through NumPy, so pyarrow is not needed)
+    """
+    pl = _polars()
+    data = {}
+    for name in frame.columns:
+        series = frame.get_column(name)
+        if name == ROW_INDEX:
+            continue
+        if isinstance(series.dtype, pl.Enum):
+            codes = series.to_physical().cast(pl.Int64).fill_null(-1).to_numpy()
+            data[name] = pd.Categorical.from_codes(codes, categories=list(series.dtype.categories), ordered=True)
+        elif series.dtype == pl.String:
+            # survey strings have a handful of distinct values: build the object array from
+            # codes instead of converting every string on its own
+            uniques = series.drop_nulls().unique(maintain_order=True)
+            codes = series.replace_strict(uniques, range(len(uniques)), default=len(uniques),
+                                          return_dtype=pl.Int64).to_numpy()
+            data[name] = np.array(uniques.to_list() + [np.nan], dtype=object)[codes]
+        else:
+            data[name] = series.to_numpy()
+    index = frame.get_column(ROW_INDEX).to_numpy().astype(np.int64) if ROW_INDEX in frame.columns else None
+    return pd.DataFrame(data, index=index)
+
+
+def collect_survey(path, columns=None, filters=None):
+    """
+    Load and preprocess a survey file with Polars; returns (Polars frame, service attributes)
+    columns: keep only these output columns; filters: {column: value} rows to keep
+    Both are pushed down into the scan, so unused columns and rows are never parsed into memory
+    """
+    pl = _polars()
+    lf, service_attributes = preprocess_lazy(scan_survey(path))
+    if filters:
+        lf = lf.filter(pl.all_horizontal([pl.col(col) == value for col, value in filters.items()]))
+    if columns is not None:
+        names = lf.collect_schema().names()
+        lf = lf.select([ROW_INDEX] + [col for col in columns if col in names])
+    return lf.collect(), service_attributes
+
+
+def load_and_preprocess(path, columns=None, filters=None):
+    """
+    collect_survey converted to pandas: the same (frame, service attributes) as
+    preprocess_airline_data(load_and_validate_data(path))
+    """
+    frame, service_attributes = collect_survey(path, columns, filters)
+    return to_pandas(frame), service_attributes
+
+
+def sample_lazy(lf, sample_size, random_state=42):
+    """
+    The rows DataFrame.sample(n=sample_size, random_state=random_state) picks, in its order
+    """
+    from modules.SqlStore import sample_positions
+    pl = _polars()
+    n_rows = lf.select(pl.len()).collect().item()
+    positions = sample_positions(n_rows, sample_size, random_state)
+    if positions is None:
+        return lf
+    order = pl.LazyFrame({'__position': positions.astype(np.int64), '__order': np.arange(len(positions))})
+    return (lf.with_row_index('__position').with_columns(pl.col('__position').cast(pl.Int64))
+              .join(order, on='__position').sort('__order').drop('__position', '__order'))
+
+
+def group_aggregates(lf, group_col):
+    """
+    Same dict as modules.Aggregates.compute_group_aggregates, from one group_by
+    """
+    pl = _polars()
+    dtype = lf.collect_schema()[group_col]
+    grouped = (lf.filter(pl.col(group_col).is_not_null())
+                 .group_by(group_col, maintain_order=True)
+                 .agg(pl.len().alias('n'),
+                      (pl.col('satisfaction') == 'satisfied').sum().alias('satisfied'),
+                      pl.col('Service_Quality_Score').sum().alias('service_sum'))
+                 .collect())
+    found = {row[0]: row[1:] for row in grouped.iter_rows()}
+    # categorical columns list every category in order, others in order of appearance
+    values = list(dtype.categories) if isinstance(dtype, pl.Enum) else grouped.get_column(group_col).to_list()
+    empty = (0, 0, 0.0)
+    return {
+        'values': values,
+        'labels': [get_display_value(v) for v in values],
+        'n': [int(found.get(v, empty)[0]) for v in values],
+        'satisfied': [int(found.get(v, empty)[1]) for v in values],
+        'service_sum': [round(float(found.get(v, empty)[2]), 6) for v in values]
+    }
+
+
+def summary_aggregates(lf, group_cols):
+    """
+    Same dict as modules.Aggregates.compute_summary_aggregates
+    """
+    pl = _polars()
+    totals = lf.select(pl.len().alias('n'),
+                       (pl.col('satisfaction') == 'satisfied').sum().alias('satisfied'),
+                       pl.col('Service_Quality_Score').sum().alias('service_sum')).collect().row(0)
+    columns = lf.collect_schema().names()
+    return {
+        'total': {'n': int(totals[0]), 'satisfied': int(totals[1]), 'service_sum': round(float(totals[2]), 6)},
+        'groups': {col: group_aggregates(lf, col) for col in group_cols if col in columns}
+    }
+
+
+def build_aggregate_store(lf, group_cols, sample_sizes, random_state=42):
+    """
+    modules.Aggregates.build_aggregate_store over a lazy frame; every sample and group_by runs
+    in the Polars engine
+    """
+    import plotly.express as px
+    samples = {str(size): summary_aggregates(sample_lazy(lf, size, random_state), group_cols)
+               for size in sample_sizes}
+    colors = [c.replace('rgb', 'rgba').replace(')', ',0.7)') for c in px.colors.qualitative.Set1]
+    return {'samples': samples, 'colors': colors}
@@ -0,0 +1,163 @@
+import os
+import time
+import functools
+import threading
+
+# callbacks (by their metrics name) to profile on every call, comma separated, or 'all';
+# 'preprocess_airline_data' covers the preprocessing step
+PROFILE_TARGETS = {name.strip() for name in os.environ.get('AIRLINE_PROFILE', '').split(',') if name.strip()}
+# allow profiling per browser by opening the dashboard with ?profile=1 (or ?profile=name,name)
+PROFILE_URL_FLAG = os.environ.get('AIRLINE_PROFILE_URL', '') == '1'
+# 'auto' uses pyinstrument (sampling) when installed, otherwise cProfile
+PROFILER = os.environ.get('AIRLINE_PROFILER', 'auto')
+PROFILE_DIR = os.environ.get('AIRLINE_PROFILE_DIR', '.profiles')
+# only the newest profiles are kept
+PROFILE_KEEP = int(os.environ.get('AIRLINE_PROFILE_KEEP', '50'))
+# profile one call in every N, so an enabled profiler costs a bounded share of the calls
+PROFILE_EVERY = max(1, int(os.environ.get('AIRLINE_PROFILE_EVERY', '1')))
+
+PROFILE_COOKIE = 'airline_profile'
+PROFILE_COOKIE_AGE = 15 * 60
+
+# one profiler at a time per process; calls arriving meanwhile run unprofiled
+_profile_lock = threading.Lock()
+_call_counts = {}
+
+
+def _profiler_kind():
+    if PROFILER in ('auto', 'pyinstrument'):
+        try:
+            import pyinstrument  # noqa: F401
+            return 'pyinstrument'
+        except ImportError:
+            if PROFILER == 'pyinstrument':
+                print("pyinstrument not installed, profiling with cProfile")
+    return 'cprofile'
+
+
+def _url_requested(name):
+    """
+    Whether the current request comes from a browser that opened the dashboard with ?profile=
+    """
+    from flask import has_request_context, request
+    if not has_request_context():
+        return False
+    flag = request.args.get('profile') or request.cookies.get(PROFILE_COOKIE)
+    if not flag or flag == '0':
+        return False
+    return flag in ('1', 'all') or name in flag.split(',')
+
+
+def _rotate(directory):
+    profiles = sorted((entry for entry in os.scandir(directory) if entry.is_file()),
+                      key=lambda entry: entry.stat().st_mtime, reverse=True)
+    for entry in profiles[PROFILE_KEEP:]:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass
+
+
+def _run_profiled(name, fn, args, kwargs):
+    kind = _profiler_kind()
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    stamp = time.strftime('%Y%m%d-%H%M%S') + f'-{int(time.time() * 1000) % 1000:03d}'
+    base = os.path.join(PROFILE_DIR, f'{stamp}-{name}-{os.getpid()}')
+
+    start = time.perf_counter()
+    if kind == 'pyinstrument':
+        from pyinstrument import Profiler
+        from pyinstrument.renderers import SpeedscopeRenderer
+        profiler = Profiler(interval=0.001)
+        profiler.start()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            profiler.stop()
+            path = base + '.speedscope.json'
+            with open(path, 'w') as f:
+                f.write(profiler.output(renderer=SpeedscopeRenderer()))
+            print(f"[profile] {name}: {time.perf_counter() - start:.3f}s -> {path}")
+            _rotate(PROFILE_DIR)
+
+    import cProfile
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        profiler.disable()
+        path = base + '.prof'
+        profiler.dump_stats(path)
+        print(f"[profile] {name}: {time.perf_counter() - start:.3f}s -> {path}")
+        _rotate(PROFILE_DIR)
+
+
+def profiled(name):
+    """
+    Decorator that runs the function under a profiler when AIRLINE_PROFILE selects it or the
+    request carries the ?profile= flag; returns the function untouched when neither is enabled
+    Writes pstats (.prof) or speedscope (.speedscope.json) files to PROFILE_DIR
+    """
+    def decorator(fn):
+        always = 'all' in PROFILE_TARGETS or name in PROFILE_TARGETS
+        if not always and not PROFILE_URL_FLAG:
+            return fn
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not (always or _url_requested(name)):
+                return fn(*args, **kwargs)
+            count = _call_counts[name] = _call_counts.get(name, 0) + 1
+            if count % PROFILE_EVERY or not _profile_lock.acquire(blocking=False):
+                return fn(*args, **kwargs)
+            try:
+                return _run_profiled(name, fn, args, kwargs)
+            finally:
+                _profile_lock.release()
+        return wrapper
+    return decorator
+
+
+def list_profiles(limit=50):
+    """
+    Newest profiles first, with their size and modification time
+    """
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    profiles = sorted((entry for entry in os.scandir(PROFILE_DIR) if entry.is_file()),
+                      key=lambda entry: entry.stat().st_mtime, reverse=True)
+    return [{
+        'file': entry.name,
+        'bytes': entry.stat().st_size,
+        'modified': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(entry.stat().st_mtime))
+    } for entry in profiles[:limit]]
+
+
+def register_profiling(server):
+    """
+    /profiles lists the recent profiles, /profiles/<file> downloads one; with AIRLINE_PROFILE_URL=1
+    opening any page with ?profile=... stores the flag in a cookie for the callbacks that follow
+    """
+    from flask import request, jsonify, send_from_directory, abort
+
+    @server.route('/profiles')
+    def profiles():
+        return jsonify(list_profiles(request.args.get('limit', default=50, type=int)))
+
+    @server.route('/profiles/<path:filename>')
+    def download_profile(filename):
+        if not any(profile['file'] == filename for profile in list_profiles(PROFILE_KEEP)):
+            abort(404)
+        return send_from_directory(os.path.abspath(PROFILE_DIR), filename, as_attachment=True)
+
+    if PROFILE_URL_FLAG:
+        @server.after_request
+        def remember_profile_flag(response):
+            flag = request.args.get('profile')
+            if flag is not None and not request.path.startswith('/_dash'):
+                if flag == '0':
+                    response.delete_cookie(PROFILE_COOKIE)
+                else:
+                    response.set_cookie(PROFILE_COOKIE, flag, max_age=PROFILE_COOKIE_AGE)
+            return response
@@ -1,7 +1,11 @@
+import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
 from utils import get_display_name
+from modules.Payload import figure_budget
+from modules.FastFigures import figure_from_template
 
+@figure_budget('radar_chart')
 def create_radar_chart(df, service_attributes, subgroup_col, subgroup_values=None):
     """
     Create interactive radar chart for service attributes by subgroup
@@ -73,3 +77,114 @@ def create_radar_chart(df, service_attributes, subgroup_col, subgroup_values=Non
         )
     
     return fig
+
+
+def _radar_template():
+    fig = go.Figure(go.Scatterpolar(
+        r=[0, 0],
+        theta=['', ''],
+        fill='toself',
+        name='',
+        line_color='#000000',
+        opacity=0.7
+    ))
+    fig.update_layout(
+        polar=dict(
+            radialaxis=dict(
+                visible=True,
+                range=[0, 1],
+                tickvals=[0, 1],
+                ticktext=["0", "1"],
+                tickfont=dict(size=20, family="Arial")
+            ),
+            angularaxis=dict(
+                tickfont=dict(size=20, family="Arial"),
+                rotation=0,
+                direction="clockwise"
+            )
+        ),
+        showlegend=False,
+        title=None,
+        height=350,
+        margin=dict(l=20, r=40, t=40, b=40),
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        uirevision='constant',
+        font=dict(size=20, family="Arial")
+    )
+    return fig
+
+
+@figure_budget('radar_chart')
+def create_radar_chart_fast(df, service_attributes, subgroup_col, subgroup_values=None):
+    """
+    Same chart as create_radar_chart, emitted as a plain dict from a validated-once template
+    """
+    if not service_attributes or subgroup_col not in df.columns:
+        return create_radar_chart(df, service_attributes, subgroup_col, subgroup_values)
+    
+    if subgroup_values is None:
+        subgroup_values = df[subgroup_col].unique()[:4]
+    
+    min_score = df[service_attributes].min().min()
+    max_score = df[service_attributes].max().max()
+    if pd.isna(min_score):
+        return create_radar_chart(df, service_attributes, subgroup_col, subgroup_values)
+    
+    # one pass for all subgroup means and sizes
+    selected = df[df[subgroup_col].isin(subgroup_values)]
+    grouped = selected.groupby(subgroup_col, observed=True, sort=False)
+    means = grouped[service_attributes].mean()
+    sizes = grouped.size()
+    return _radar_figure(means, sizes, subgroup_values, service_attributes, min_score, max_score)
+
+
+@figure_budget('radar_chart')
+def create_radar_chart_sql(store, service_attributes, subgroup_col, sample_size, subgroup_values=None):
+    """
+    Same chart as create_radar_chart_fast, with the means and score range queried from a
+    modules.SqlStore.SurveyStore instead of computed on a frame
+    """
+    if not service_attributes or subgroup_col not in store.columns:
+        return create_radar_chart(store.fetch(sample_size=sample_size), service_attributes,
+                                  subgroup_col, subgroup_values)
+    
+    if subgroup_values is None:
+        subgroup_values = store.group_values(subgroup_col, sample_size, ordered_by_appearance=True)[:4]
+    
+    min_score, max_score = store.value_range(service_attributes, sample_size)
+    if pd.isna(min_score):
+        return create_radar_chart(store.fetch(sample_size=sample_size), service_attributes,
+                                  subgroup_col, subgroup_values)
+    
+    means, sizes = store.group_means(subgroup_col, service_attributes, sample_size, values=list(subgroup_values))
+    return _radar_figure(means, sizes, subgroup_values, service_attributes, min_score, max_score)
+
+
+def _radar_figure(means, sizes, subgroup_values, service_attributes, min_score, max_score):
+    colors = px.colors.qualitative.Set1[:len(subgroup_values)]
+    display_attrs = [get_display_name(attr) for attr in service_attributes]
+    theta = display_attrs + [display_attrs[0]]
+    
+    traces = []
+    for i, subgroup in enumerate(subgroup_values):
+        if subgroup not in sizes.index or sizes[subgroup] == 0:
+            continue
+        scores = means.loc[subgroup].tolist()
+        traces.append({
+            'r': scores + [scores[0]],
+            'theta': theta,
+            'name': f'{subgroup} (n={sizes[subgroup]})',
+            'line': {'color': colors[i % len(colors)]}
+        })
+    
+    ticks = list(range(int(min_score), int(max_score) + 1))
+    return figure_from_template('radar_chart', _radar_template, traces, {
+        'polar': {
+            'radialaxis': {
+                'range': [float(min_score), float(max_score)],
+                'tickvals': ticks,
+                'ticktext': [f"{i}" for i in ticks]
+            }
+        }
+    })
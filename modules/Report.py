@@ -0,0 +1,218 @@
+import os
+import re
+import json
+import html
+import time
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import plotly.io as pio
+from utils import get_display_value
+from modules.Aggregates import get_group_values
+from modules.Distribution import create_distribution_chart
+from modules.RaderChart import create_radar_chart, create_radar_chart_fast
+from modules.ServiceFactor import create_service_factors_chart, create_rf_importance_chart_from_results
+from modules.FastFigures import FAST_FIGURES
+from modules.clustering import CustomerSegmentationAnalyzer
+
+MANIFEST_FILE = 'report_manifest.json'
+PLOTLY_JS = 'plotly.min.js'
+# part of every artifact hash: bump when the page template changes so every page is rewritten
+TEMPLATE_VERSION = '1'
+
+# set in the parent right before the pool forks, so the workers inherit the figures
+_report_figures = None
+
+
+def slug(value):
+    """
+    'Senior (>60)' -> 'Senior_60_', safe as a file name
+    """
+    return re.sub(r'[^A-Za-z0-9._-]+', '_', str(value)) or '_'
+
+
+def figure_json(fig):
+    return pio.to_json(fig, validate=False)
+
+
+def content_hash(*parts):
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()[:16]
+
+
+def build_report_figures(df, service_attributes, group_cols, sample_size=5000, rf_results=None, cluster_k=None):
+    """
+    Every figure of the report, each built once: radar and distribution per subgroup column,
+    service factors per subgroup value, cluster charts once for the sample
+    rf_results: modules.Batch.batch_rf_results, used instead of training the Random Forests
+    cluster_k: k for the sample's k-means fit (batch results), found by the k sweep otherwise
+    Returns ({figure key: figure}, [(group_col, value)])
+    """
+    rf_results = rf_results or {}
+    sampled_df = df.sample(n=sample_size, random_state=42) if 0 < sample_size < len(df) else df
+    figures = {}
+    subgroups = []
+
+    analyzer = CustomerSegmentationAnalyzer(sampled_df, service_attributes)
+    analyzer.perform_kmeans_clustering(n_clusters=cluster_k)
+    analyzer.perform_pca_analysis()
+    figures['clusters/pca_scatter'] = analyzer.create_cluster_visualization('pca_scatter')
+    figures['clusters/profiles'] = analyzer.create_cluster_profiles_chart()
+
+    build_radar = create_radar_chart_fast if FAST_FIGURES else create_radar_chart
+    for group_col in group_cols:
+        figures[f'radar/{group_col}'] = build_radar(sampled_df, service_attributes, group_col)
+        figures[f'distribution/{group_col}'] = create_distribution_chart(sampled_df, group_col)
+        for value in get_group_values(df, group_col):
+            rf = rf_results.get((group_col, sample_size, value))
+            if rf is not None:
+                result = create_rf_importance_chart_from_results(*rf)
+            else:
+                result = create_service_factors_chart(sampled_df, service_attributes, group_col=group_col,
+                                                      selected_subgroup=value, chart_type='rf_importance')
+            figures[f'service_factors/{group_col}/{value}'] = result[0] if isinstance(result, tuple) else result
+            subgroups.append((group_col, value))
+    return figures, subgroups
+
+
+def page_figures(group_col, value):
+    return [
+        ('Service quality by subgroup', f'radar/{group_col}'),
+        ('Distribution', f'distribution/{group_col}'),
+        ('Service factor rankings', f'service_factors/{group_col}/{value}'),
+        ('Customer segments', 'clusters/pca_scatter'),
+        ('Segment profiles', 'clusters/profiles')
+    ]
+
+
+def page_path(group_col, value):
+    return os.path.join('subgroups', slug(group_col), f'{slug(value)}.html')
+
+
+def _render_page(title, sections, depth):
+    # charts reference the bundle's single copy of plotly.js, so pages stay small and work offline
+    script = '../' * depth + PLOTLY_JS
+    divs = []
+    for heading, key in sections:
+        chart = pio.to_html(_report_figures[key], include_plotlyjs=False, full_html=False,
+                            div_id=slug(key), validate=False)
+        divs.append(f'<section><h2>{html.escape(heading)}</h2>{chart}</section>')
+    return (f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>{html.escape(title)}</title>'
+            f'<script src="{script}"></script>'
+            '<style>body{font-family:Arial,sans-serif;margin:20px;color:#1a237e}'
+            'section{margin-bottom:30px}</style></head>'
+            f'<body><p><a href="{"../" * depth}index.html">All subgroups</a></p><h1>{html.escape(title)}</h1>'
+            + ''.join(divs) + '</body></html>')
+
+
+def _write(path, content, binary=False):
+    # written next to the target and renamed, so a page is never seen half written
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f'{path}.tmp{os.getpid()}'
+    with open(tmp_path, 'wb' if binary else 'w', **({} if binary else {'encoding': 'utf-8'})) as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def _render_task(output, artifact, task):
+    kind = task[0]
+    path = os.path.join(output, artifact)
+    if kind == 'page':
+        _, title, sections = task
+        _write(path, _render_page(title, sections, depth=artifact.count('/')))
+    elif kind == 'png':
+        _write(path, pio.to_image(_report_figures[task[1]], format='png', validate=False), binary=True)
+    return artifact
+
+
+def plan_report(figures, subgroups, png=False):
+    """
+    {artifact path: (content hash, render task)} for every file of the bundle
+    """
+    hashes = {key: content_hash(figure_json(fig)) for key, fig in figures.items()}
+    artifacts = {}
+    for group_col, value in subgroups:
+        sections = page_figures(group_col, value)
+        title = f'{group_col}: {get_display_value(value)}'
+        artifacts[page_path(group_col, value).replace(os.sep, '/')] = (
+            content_hash(TEMPLATE_VERSION, title, *[heading + hashes[key] for heading, key in sections]),
+            ('page', title, sections))
+    if png:
+        for key in figures:
+            artifacts[f'png/{slug(key.replace("/", "-"))}.png'] = (content_hash('png', hashes[key]), ('png', key))
+    return artifacts
+
+
+def _index_page(subgroups):
+    rows = []
+    for group_col in dict.fromkeys(col for col, _ in subgroups):
+        links = ', '.join(f'<a href="{page_path(col, value).replace(os.sep, "/")}">{html.escape(get_display_value(value))}</a>'
+                          for col, value in subgroups if col == group_col)
+        rows.append(f'<li><b>{html.escape(group_col)}</b>: {links}</li>')
+    return ('<!DOCTYPE html><html><head><meta charset="utf-8"><title>Airline satisfaction report</title>'
+            '<style>body{font-family:Arial,sans-serif;margin:20px;color:#1a237e}</style></head>'
+            '<body><h1>Airline satisfaction report</h1><ul>' + ''.join(rows) + '</ul></body></html>')
+
+
+def render_report(figures, subgroups, output, png=False, workers=None, force=False):
+    """
+    Write the bundle to output: index.html, plotly.min.js, one page per subgroup value and,
+    with png, one image per figure (needs kaleido). Artifacts whose content hash matches
+    the previous run's manifest are kept, files of subgroups that no longer exist removed
+    Returns {'rendered': [...], 'skipped': [...], 'removed': [...]}
+    """
+    global _report_figures
+    if png:
+        try:
+            import kaleido  # noqa: F401
+        except ImportError:
+            raise ImportError("PNG export needs kaleido; install it or leave out --png")
+    os.makedirs(output, exist_ok=True)
+    manifest_path = os.path.join(output, MANIFEST_FILE)
+    previous = {}
+    if os.path.exists(manifest_path) and not force:
+        with open(manifest_path) as f:
+            previous = json.load(f).get('artifacts', {})
+
+    artifacts = plan_report(figures, subgroups, png=png)
+    todo = [artifact for artifact, (digest, _) in artifacts.items()
+            if previous.get(artifact) != digest or not os.path.exists(os.path.join(output, artifact))]
+    skipped = [artifact for artifact in artifacts if artifact not in todo]
+
+    start = time.perf_counter()
+    _report_figures = figures
+    workers = min(workers or os.cpu_count() or 1, max(len(todo), 1))
+    if workers > 1:
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('fork')) as pool:
+            futures = [pool.submit(_render_task, output, artifact, artifacts[artifact][1]) for artifact in todo]
+            for future in as_completed(futures):
+                future.result()
+    else:
+        for artifact in todo:
+            _render_task(output, artifact, artifacts[artifact][1])
+
+    plotly_js = os.path.join(output, PLOTLY_JS)
+    if not os.path.exists(plotly_js) or force:
+        from plotly.offline import get_plotlyjs
+        _write(plotly_js, get_plotlyjs())
+    _write(os.path.join(output, 'index.html'), _index_page(subgroups))
+
+    removed = [artifact for artifact in previous if artifact not in artifacts]
+    for artifact in removed:
+        path = os.path.join(output, artifact)
+        if os.path.exists(path):
+            os.remove(path)
+            try:
+                # drop directories the removal left empty
+                os.removedirs(os.path.dirname(path))
+            except OSError:
+                pass
+    # written last: an interrupted run leaves the old hashes, so its artifacts are redone
+    _write(manifest_path, json.dumps({'artifacts': {artifact: digest for artifact, (digest, _) in artifacts.items()}},
+                                     indent=2))
+    print(f"Report: {len(todo)} rendered, {len(skipped)} unchanged, {len(removed)} removed "
+          f"in {time.perf_counter() - start:.1f}s on {workers} worker{'s' if workers > 1 else ''}")
+    return {'rendered': todo, 'skipped': skipped, 'removed': removed}
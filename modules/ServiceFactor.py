@@ -5,7 +5,11 @@ import numpy as np
 from dash import html
 from plotly.subplots import make_subplots
 from utils import get_display_name
+from modules.Payload import figure_budget
+from modules.FastFigures import FAST_FIGURES, figure_from_template
+from modules.Metrics import stage
 
+@figure_budget('service_factors_chart')
 def create_service_factors_chart(df, service_attributes, group_col='Class', selected_subgroup=None, chart_type='average'):
     """
     Create a chart showing service factor analysis for selected subgroup
@@ -48,10 +52,13 @@ def create_service_factors_chart(df, service_attributes, group_col='Class', sele
     if chart_type == 'average':
         return create_average_ratings_chart(subgroup_data, service_attributes, selected_subgroup)
     elif chart_type == 'rf_importance':
+        if FAST_FIGURES:
+            return create_rf_importance_chart_fast(subgroup_data, service_attributes, selected_subgroup)
         return create_rf_importance_chart(subgroup_data, service_attributes, selected_subgroup)
     #else:
         #return create_combined_chart(subgroup_data, service_attributes, selected_subgroup)
 
+@figure_budget('service_factors_chart')
 def create_average_ratings_chart(subgroup_data, service_attributes, selected_subgroup):
     """
     Create horizontal bar chart showing average ratings
@@ -135,104 +142,137 @@ def create_average_ratings_chart(subgroup_data, service_attributes, selected_sub
     
     return fig
 
-def create_rf_importance_chart(subgroup_data, service_attributes, selected_subgroup):
+@stage('fit', 'random_forest')
+def compute_rf_importance(subgroup_data, service_attributes):
     """
-    Create Random Forest feature importance chart
+    Train the satisfaction Random Forest for a subgroup
+    Returns (factors, importances, accuracy) sorted by importance, or None if there is too little data
     """
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.model_selection import train_test_split
+    
+    # Prepare data for Random Forest
+    X = subgroup_data[service_attributes].copy()
+    
+    # Target variable (satisfaction)
+    if 'satisfaction_binary' in subgroup_data.columns:
+        y = subgroup_data['satisfaction_binary']
+    else:
+        y = (subgroup_data['satisfaction'] == 'satisfied').astype(int)
+    
+    # Check if we have enough samples and both classes
+    if len(subgroup_data) < 30 or len(y.unique()) < 2:
+        return None
+    
+    # Train Random Forest
     try:
-        from sklearn.ensemble import RandomForestClassifier
-        from sklearn.model_selection import train_test_split
-        
-        # Prepare data for Random Forest
-        X = subgroup_data[service_attributes].copy()
-        
-        # Target variable (satisfaction)
-        if 'satisfaction_binary' in subgroup_data.columns:
-            y = subgroup_data['satisfaction_binary']
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=0.3, random_state=42, stratify=y
+        )
+    except ValueError:
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=0.3, random_state=42
+        )
+    
+    rf = RandomForestClassifier(n_estimators=100, random_state=42)
+    rf.fit(X_train, y_train)
+    
+    # feature importance
+    importance_dict = dict(zip(service_attributes, rf.feature_importances_))
+    sorted_importance = sorted(importance_dict.items(), key=lambda x: x[1], reverse=True)
+    factors, importances = zip(*sorted_importance)
+    
+    # Calculate accuracy
+    accuracy = rf.score(X_test, y_test)
+    
+    return list(factors), [float(imp) for imp in importances], accuracy
+
+def _importance_colors(importances):
+    # color scale based on importance
+    colors = []
+    for importance in importances:
+        if importance >= 0.15:
+            colors.append('#FF6B6B')  # very high importance
+        elif importance >= 0.10:
+            colors.append('#FFA726')  # high importance
+        elif importance >= 0.05:
+            colors.append('#FFD54F')  # medium importance
         else:
-            y = (subgroup_data['satisfaction'] == 'satisfied').astype(int)
-        
-        # Check if we have enough samples and both classes
-        if len(subgroup_data) < 30 or len(y.unique()) < 2:
+            colors.append('#81C784')  # lower importance
+    return colors
+
+def build_rf_importance_figure(factors, importances):
+    """
+    Horizontal importance bars as a validated go.Figure
+    """
+    display_factors = [get_display_name(f) for f in factors]
+    colors = _importance_colors(importances)
+    
+    fig = go.Figure(data=[
+        go.Bar(
+            y=display_factors,
+            x=importances,
+            orientation='h',
+            marker=dict(
+                color=colors,
+                line=dict(color='rgba(50,50,50,0.8)', width=1)
+            ),
+            text=[f'{imp:.3f}' for imp in importances],
+            textposition='outside',
+            textfont=dict(size=10, color='black')
+        )
+    ])
+    
+    fig.update_layout(
+        xaxis=dict(
+            title='Feature Importance',
+            range=[0, max(importances) * 1.15],
+            gridcolor='rgba(200,200,200,0.5)',
+            tickfont=dict(size=20),
+            titlefont=dict(size=20)
+        ),
+        yaxis=dict(
+            title='Service Factors',
+            automargin=True,
+            tickfont=dict(size=20),
+            titlefont=dict(size=20)
+        ),
+        height=400,
+        margin=dict(l=20, r=40, t=40, b=40),
+        plot_bgcolor='rgba(240,240,240,0.1)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        showlegend=False,
+        font=dict(size=20)
+    )
+    fig.update_traces(textfont_size=20)
+    
+    return fig
+
+def build_rf_importance_figure_fast(factors, importances):
+    """
+    Same bars as build_rf_importance_figure, as a plain dict from a validated-once template
+    """
+    return figure_from_template('rf_importance_chart', lambda: build_rf_importance_figure(['x'], [1.0]), [{
+        'y': [get_display_name(f) for f in factors],
+        'x': list(importances),
+        'marker': {'color': _importance_colors(importances)},
+        'text': [f'{imp:.3f}' for imp in importances]
+    }], {
+        'xaxis': {'range': [0, max(importances) * 1.15]}
+    })
+
+def _rf_importance_chart(subgroup_data, service_attributes, build_figure):
+    try:
+        result = compute_rf_importance(subgroup_data, service_attributes)
+        if result is None:
             return go.Figure().add_annotation(
                 text="Insufficient data for Random Forest analysis", 
                 xref="paper", yref="paper", x=0.5, y=0.5,
                 showarrow=False, font=dict(size=12)
             )
         
-        # Train Random Forest
-        try:
-            X_train, X_test, y_train, y_test = train_test_split(
-                X, y, test_size=0.3, random_state=42, stratify=y
-            )
-        except ValueError:
-            X_train, X_test, y_train, y_test = train_test_split(
-                X, y, test_size=0.3, random_state=42
-            )
-        
-        rf = RandomForestClassifier(n_estimators=100, random_state=42)
-        rf.fit(X_train, y_train)
-        
-        # feature importance
-        importance_dict = dict(zip(service_attributes, rf.feature_importances_))
-        sorted_importance = sorted(importance_dict.items(), key=lambda x: x[1], reverse=True)
-        factors, importances = zip(*sorted_importance)
-        display_factors = [get_display_name(f) for f in factors]
-        
-        # color scale based on importance
-        colors = []
-        for importance in importances:
-            if importance >= 0.15:
-                colors.append('#FF6B6B')  # very high importance
-            elif importance >= 0.10:
-                colors.append('#FFA726')  # high importance
-            elif importance >= 0.05:
-                colors.append('#FFD54F')  # medium importance
-            else:
-                colors.append('#81C784')  # lower importance
-        
-        # Calculate accuracy
-        accuracy = rf.score(X_test, y_test)
-        
-        fig = go.Figure(data=[
-            go.Bar(
-                y=display_factors,
-                x=importances,
-                orientation='h',
-                marker=dict(
-                    color=colors,
-                    line=dict(color='rgba(50,50,50,0.8)', width=1)
-                ),
-                text=[f'{imp:.3f}' for imp in importances],
-                textposition='outside',
-                textfont=dict(size=10, color='black')
-            )
-        ])
-        
-        fig.update_layout(
-            xaxis=dict(
-                title='Feature Importance',
-                range=[0, max(importances) * 1.15],
-                gridcolor='rgba(200,200,200,0.5)',
-                tickfont=dict(size=20),
-                titlefont=dict(size=20)
-            ),
-            yaxis=dict(
-                title='Service Factors',
-                automargin=True,
-                tickfont=dict(size=20),
-                titlefont=dict(size=20)
-            ),
-            height=400,
-            margin=dict(l=20, r=40, t=40, b=40),
-            plot_bgcolor='rgba(240,240,240,0.1)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            showlegend=False,
-            font=dict(size=20)
-        )
-        fig.update_traces(textfont_size=20)
-        
-        return fig, accuracy
+        factors, importances, accuracy = result
+        return build_figure(factors, importances), accuracy
         
     except ImportError:
         return go.Figure().add_annotation(
@@ -247,6 +287,28 @@ def create_rf_importance_chart(subgroup_data, service_attributes, selected_subgr
             showarrow=False, font=dict(size=12)
         )
 
+@figure_budget('service_factors_chart')
+def create_rf_importance_chart(subgroup_data, service_attributes, selected_subgroup):
+    """
+    Create Random Forest feature importance chart
+    """
+    return _rf_importance_chart(subgroup_data, service_attributes, build_rf_importance_figure)
+
+@figure_budget('service_factors_chart')
+def create_rf_importance_chart_fast(subgroup_data, service_attributes, selected_subgroup):
+    """
+    Same chart as create_rf_importance_chart, with the bars emitted as a plain dict
+    """
+    return _rf_importance_chart(subgroup_data, service_attributes, build_rf_importance_figure_fast)
+
+@figure_budget('service_factors_chart')
+def create_rf_importance_chart_from_results(factors, importances, accuracy):
+    """
+    The Random Forest chart and accuracy for importances computed elsewhere (batch.py results)
+    """
+    build_figure = build_rf_importance_figure_fast if FAST_FIGURES else build_rf_importance_figure
+    return build_figure(factors, importances), accuracy
+
 def generate_service_insights(df, service_attributes, group_col='Class', selected_subgroup=None, chart_type='average'):
     """
     Generate insights text for the selected subgroup's service factors
@@ -0,0 +1,386 @@
+import os
+import json
+import threading
+import sqlite3
+import numpy as np
+import pandas as pd
+
+# off | auto | duckdb | sqlite; auto takes DuckDB when it is installed
+SQL_BACKEND = os.environ.get('AIRLINE_SQL_BACKEND', 'off').lower()
+SQL_PATH = os.environ.get('AIRLINE_SQL_PATH', os.path.join('.dash_cache', 'survey.db'))
+
+TABLE = 'survey'
+META_TABLE = 'survey_meta'
+# position of the row in the preprocessed frame; samples are drawn over it like DataFrame.sample does
+ROW_POS = 'row_pos'
+# index label of the row in the preprocessed frame
+ROW_INDEX = 'row_index'
+# rows written per INSERT batch
+WRITE_CHUNK_ROWS = 100_000
+
+
+def _quote(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def resolve_engine(engine='auto'):
+    """
+    'duckdb' or 'sqlite'; auto picks DuckDB when it can be imported
+    """
+    if engine in ('auto', 'on', '1'):
+        try:
+            import duckdb  # noqa: F401
+            return 'duckdb'
+        except ImportError:
+            return 'sqlite'
+    if engine == 'duckdb':
+        import duckdb  # noqa: F401  raises when it is not installed
+    elif engine != 'sqlite':
+        raise ValueError(f"Unknown SQL engine '{engine}', expected auto, duckdb or sqlite")
+    return engine
+
+
+def sample_positions(n_rows, sample_size, random_state=42):
+    """
+    Positions DataFrame.sample(n=sample_size, random_state=random_state) picks, in its order;
+    None when the sample is the whole table
+    """
+    if sample_size > 0 and n_rows > sample_size:
+        return np.random.RandomState(random_state).choice(n_rows, size=sample_size, replace=False)
+    return None
+
+
+def _categorical_columns(df):
+    return [col for col in df.columns if isinstance(df[col].dtype, pd.CategoricalDtype)]
+
+
+def _frame_meta(df):
+    return {
+        'columns': [str(c) for c in df.columns],
+        'categories': {col: {'values': df[col].cat.categories.tolist(), 'ordered': bool(df[col].cat.ordered)}
+                       for col in _categorical_columns(df)}
+    }
+
+
+def _plain_frame(df, first_row):
+    # categories are stored as their values; their order lives in the meta table
+    categorical = set(_categorical_columns(df))
+    plain = pd.DataFrame({col: df[col].astype(object) if col in categorical else df[col] for col in df.columns})
+    plain.insert(0, ROW_INDEX, df.index.to_numpy())
+    plain.insert(0, ROW_POS, np.arange(first_row, first_row + len(df)))
+    return plain
+
+
+def _remove_files(path):
+    """
+    Delete a database file and the journal files its engine may have left next to it
+    """
+    # SQLite: -wal, -shm and -journal; DuckDB: .wal
+    for suffix in ('', '-wal', '-shm', '-journal', '.wal'):
+        try:
+            os.remove(path + suffix)
+        except FileNotFoundError:
+            pass
+
+
+class SurveyStore:
+    """
+    The preprocessed survey in an embedded database file (DuckDB, or SQLite as a fallback)
+    Aggregates, filters and samples run as SQL, so only their results are loaded into pandas;
+    samples reproduce DataFrame.sample(random_state=42) row for row, so every number matches
+    the pandas path
+    """
+
+    def __init__(self, path, engine='auto'):
+        self.path = path
+        self.engine = resolve_engine(engine)
+        self._local = threading.local()
+        meta = dict(self._query(f'SELECT key, value FROM {META_TABLE}'))
+        self.meta = {key: json.loads(value) for key, value in meta.items()}
+        self.columns = self.meta['frame']['columns']
+        self.categories = self.meta['frame']['categories']
+        self.n_rows = self.meta['n_rows']
+        self.fingerprint = self.meta.get('fingerprint')
+
+    # ----- writing -----
+
+    @staticmethod
+    def _temp_path(path):
+        # unique per writer: processes building the same store never write to one file
+        return f'{path}.{os.getpid()}-{threading.get_ident()}.tmp'
+
+    @staticmethod
+    def _writer(path, engine):
+        """
+        Connection to a new database at path, a temporary file that _publish later renames
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        _remove_files(path)
+        if engine == 'duckdb':
+            import duckdb
+            return duckdb.connect(path)
+        return sqlite3.connect(path)
+
+    @staticmethod
+    def _publish(temp_path, path):
+        # readers of the file being replaced keep their open connections to it; new ones
+        # open the complete new file, never a partly written one
+        os.replace(temp_path, path)
+
+    @staticmethod
+    def _append(con, engine, plain, create):
+        if engine == 'duckdb':
+            con.register('survey_chunk', plain)
+            statement = 'CREATE TABLE {} AS SELECT * FROM survey_chunk' if create else 'INSERT INTO {} SELECT * FROM survey_chunk'
+            con.execute(statement.format(TABLE))
+            con.unregister('survey_chunk')
+        else:
+            plain.to_sql(TABLE, con, if_exists='replace' if create else 'append', index=False,
+                         chunksize=WRITE_CHUNK_ROWS)
+
+    @staticmethod
+    def _finish(con, engine, meta, group_cols):
+        con.execute(f'CREATE TABLE {META_TABLE} (key TEXT, value TEXT)')
+        con.executemany(f'INSERT INTO {META_TABLE} VALUES (?, ?)', [(k, json.dumps(v)) for k, v in meta.items()])
+        con.execute(f'CREATE UNIQUE INDEX survey_row_pos ON {TABLE} ({ROW_POS})')
+        if engine == 'sqlite':
+            # filters on the group-by columns (subgroup selection) use an index instead of a scan
+            for i, col in enumerate(group_cols):
+                if col in meta['frame']['columns']:
+                    con.execute(f'CREATE INDEX survey_group_{i} ON {TABLE} ({_quote(col)})')
+            con.execute('ANALYZE')
+        con.commit()
+        con.close()
+
+    @classmethod
+    def build(cls, df, path=SQL_PATH, engine='auto', fingerprint=None, group_cols=()):
+        """
+        Write a preprocessed frame to path and open it
+        """
+        engine = resolve_engine(engine)
+        temp_path = cls._temp_path(path)
+        try:
+            con = cls._writer(temp_path, engine)
+            for start in range(0, max(len(df), 1), WRITE_CHUNK_ROWS):
+                cls._append(con, engine, _plain_frame(df.iloc[start:start + WRITE_CHUNK_ROWS], start), start == 0)
+            meta = {'frame': _frame_meta(df), 'n_rows': int(len(df)), 'fingerprint': fingerprint}
+            cls._finish(con, engine, meta, group_cols)
+            cls._publish(temp_path, path)
+        finally:
+            _remove_files(temp_path)
+        return cls(path, engine)
+
+    @classmethod
+    def from_csv(cls, csv_path, path=SQL_PATH, engine='auto', chunk_rows=1_000_000, group_cols=()):
+        """
+        Preprocess a survey CSV chunk by chunk into path, for files that do not fit in memory
+        Preprocessing is row-wise, so the table equals preprocessing the whole file at once
+        """
+        import contextlib
+        import io
+        from preprocess import preprocess_airline_data
+        engine = resolve_engine(engine)
+        temp_path = cls._temp_path(path)
+        try:
+            con = cls._writer(temp_path, engine)
+            n_rows = 0
+            meta = None
+            for chunk in pd.read_csv(csv_path, chunksize=chunk_rows):
+                chunk.index = chunk.index - chunk.index[0] + n_rows
+                with contextlib.redirect_stdout(io.StringIO()):
+                    processed, _ = preprocess_airline_data(chunk, copy=False)
+                cls._append(con, engine, _plain_frame(processed, n_rows), meta is None)
+                meta = meta or _frame_meta(processed)
+                n_rows += len(processed)
+            stat = os.stat(csv_path)
+            cls._finish(con, engine, {'frame': meta, 'n_rows': n_rows,
+                                      'fingerprint': f'{os.path.abspath(csv_path)}:{stat.st_size}:{stat.st_mtime_ns}'},
+                        group_cols)
+            cls._publish(temp_path, path)
+        finally:
+            _remove_files(temp_path)
+        return cls(path, engine)
+
+    # ----- querying -----
+
+    def _connection(self):
+        # one read-only connection per thread and process (forked background jobs open their own)
+        pid = os.getpid()
+        if getattr(self._local, 'pid', None) != pid:
+            if self.engine == 'duckdb':
+                import duckdb
+                self._local.con = duckdb.connect(self.path, read_only=True)
+            else:
+                self._local.con = sqlite3.connect(f'file:{os.path.abspath(self.path)}?mode=ro', uri=True)
+            self._local.pid = pid
+            self._local.samples = set()
+        return self._local.con
+
+    def _query(self, sql, params=()):
+        return self._connection().execute(sql, params).fetchall()
+
+    def _frame(self, sql, params=()):
+        con = self._connection()
+        if self.engine == 'duckdb':
+            return con.execute(sql, params).df()
+        return pd.read_sql_query(sql, con, params=params)
+
+    def _source(self, sample_size, random_state=42):
+        """
+        FROM clause and ordering column for the whole table or a sample of it; the sample is
+        a temporary table of (ord, row_pos), created once per connection
+        """
+        positions = sample_positions(self.n_rows, sample_size, random_state)
+        if positions is None:
+            return f'{TABLE} s', f's.{ROW_POS}'
+        name = f'sample_{sample_size}_{random_state}'
+        con = self._connection()
+        if name not in self._local.samples:
+            frame = pd.DataFrame({'ord': np.arange(len(positions)), ROW_POS: positions})
+            if self.engine == 'duckdb':
+                con.register(f'{name}_frame', frame)
+                con.execute(f'CREATE TEMP TABLE {name} AS SELECT * FROM {name}_frame')
+                con.unregister(f'{name}_frame')
+            else:
+                con.execute(f'CREATE TEMP TABLE {name} (ord INTEGER PRIMARY KEY, {ROW_POS} INTEGER)')
+                con.executemany(f'INSERT INTO {name} VALUES (?, ?)', frame.itertuples(index=False, name=None))
+            self._local.samples.add(name)
+        return f'{name} p JOIN {TABLE} s ON s.{ROW_POS} = p.{ROW_POS}', 'p.ord'
+
+    @staticmethod
+    def _where(filters):
+        if not filters:
+            return '', []
+        return ' WHERE ' + ' AND '.join(f's.{_quote(col)} = ?' for col in filters), list(filters.values())
+
+    def _restore(self, frame):
+        frame = frame.set_index(ROW_INDEX)
+        frame.index.name = None
+        for col, spec in self.categories.items():
+            if col in frame.columns:
+                frame[col] = pd.Categorical(frame[col], categories=spec['values'], ordered=spec['ordered'])
+        return frame
+
+    def fetch(self, columns=None, sample_size=-1, filters=None, random_state=42):
+        """
+        The (sampled, filtered) rows as a DataFrame, in the order DataFrame.sample returns them
+        columns: projection, all columns by default; filters: {column: value} equality filters
+        """
+        columns = self.columns if columns is None else [c for c in self.columns if c in columns]
+        source, order = self._source(sample_size, random_state)
+        where, params = self._where(filters)
+        select = ', '.join([f's.{ROW_INDEX}'] + [f's.{_quote(c)}' for c in columns])
+        frame = self._frame(f'SELECT {select} FROM {source}{where} ORDER BY {order}', params)
+        return self._restore(frame)[columns]
+
+    def group_values(self, group_col, sample_size=-1, ordered_by_appearance=False):
+        """
+        Values of group_col like get_group_values: the categories of a categorical column,
+        otherwise the values in order of first appearance in the sample
+        """
+        if group_col in self.categories and not ordered_by_appearance:
+            return list(self.categories[group_col]['values'])
+        source, order = self._source(sample_size)
+        col = f's.{_quote(group_col)}'
+        rows = self._query(f'SELECT {col} FROM {source} WHERE {col} IS NOT NULL '
+                           f'GROUP BY {col} ORDER BY MIN({order})')
+        return [row[0] for row in rows]
+
+    def group_aggregates(self, group_col, sample_size=-1):
+        """
+        Same dict as modules.Aggregates.compute_group_aggregates, computed in one GROUP BY
+        """
+        from utils import get_display_value
+        values = self.group_values(group_col, sample_size)
+        source, _ = self._source(sample_size)
+        col = f's.{_quote(group_col)}'
+        rows = self._query(f"SELECT {col}, COUNT(*), SUM(CASE WHEN s.satisfaction = 'satisfied' THEN 1 ELSE 0 END), "
+                           f"SUM(s.{_quote('Service_Quality_Score')}) FROM {source} GROUP BY {col}")
+        by_value = {row[0]: row[1:] for row in rows}
+        empty = (0, 0, 0.0)
+        return {
+            'values': values,
+            'labels': [get_display_value(v) for v in values],
+            'n': [int(by_value.get(v, empty)[0]) for v in values],
+            'satisfied': [int(by_value.get(v, empty)[1]) for v in values],
+            'service_sum': [round(float(by_value.get(v, empty)[2] or 0.0), 6) for v in values]
+        }
+
+    def summary_aggregates(self, group_cols, sample_size=-1):
+        """
+        Same dict as modules.Aggregates.compute_summary_aggregates
+        """
+        source, _ = self._source(sample_size)
+        n, satisfied, service_sum = self._query(
+            f"SELECT COUNT(*), SUM(CASE WHEN s.satisfaction = 'satisfied' THEN 1 ELSE 0 END), "
+            f"SUM(s.{_quote('Service_Quality_Score')}) FROM {source}")[0]
+        return {
+            'total': {'n': int(n), 'satisfied': int(satisfied or 0), 'service_sum': round(float(service_sum or 0.0), 6)},
+            'groups': {col: self.group_aggregates(col, sample_size) for col in group_cols if col in self.columns}
+        }
+
+    def group_means(self, group_col, columns, sample_size=-1, values=None):
+        """
+        (means DataFrame indexed by group value, sizes Series) for the given groups of the sample
+        """
+        source, _ = self._source(sample_size)
+        col = f's.{_quote(group_col)}'
+        averages = ', '.join(f'AVG(s.{_quote(c)})' for c in columns)
+        where, params = '', []
+        if values is not None:
+            where = f" WHERE {col} IN ({', '.join('?' * len(values))})"
+            params = [v.item() if hasattr(v, 'item') else v for v in values]
+        rows = self._query(f'SELECT {col}, COUNT(*), {averages} FROM {source}{where} GROUP BY {col}', params)
+        means = pd.DataFrame([row[2:] for row in rows], index=[row[0] for row in rows], columns=columns, dtype=float)
+        sizes = pd.Series([row[1] for row in rows], index=means.index, dtype=np.int64)
+        return means, sizes
+
+    def value_range(self, columns, sample_size=-1):
+        """
+        Smallest and largest value over the given columns of the sample
+        """
+        source, _ = self._source(sample_size)
+        bounds = ', '.join(f'MIN(s.{_quote(c)}), MAX(s.{_quote(c)})' for c in columns)
+        row = self._query(f'SELECT {bounds} FROM {source}')[0]
+        lows = [v for v in row[0::2] if v is not None]
+        highs = [v for v in row[1::2] if v is not None]
+        return (min(lows) if lows else np.nan), (max(highs) if highs else np.nan)
+
+
+def versioned_path(path, version):
+    """
+    .dash_cache/survey.db -> .dash_cache/survey-<version>.db
+    """
+    root, ext = os.path.splitext(path)
+    return f'{root}-{version}{ext}'
+
+
+def remove_versioned_stores(path, keep):
+    """
+    Delete the versioned_path(path, version) files of every version not in keep
+    """
+    import glob
+    root, ext = os.path.splitext(path)
+    for versioned in glob.glob(f'{glob.escape(root)}-*{ext}'):
+        if versioned[len(root) + 1:len(versioned) - len(ext)] not in keep:
+            print(f"SQL store: removing {versioned}")
+            _remove_files(versioned)
+
+
+def open_survey_store(df, fingerprint, group_cols=(), engine=SQL_BACKEND, path=SQL_PATH):
+    """
+    The store for this frame: reused when the file was built from the same data, rebuilt otherwise
+    """
+    engine = resolve_engine(engine)
+    if os.path.exists(path):
+        try:
+            store = SurveyStore(path, engine)
+            if store.fingerprint == fingerprint and store.n_rows == len(df):
+                print(f"SQL store: reusing {path} ({store.engine})")
+                return store
+        except Exception as e:
+            print(f"SQL store: rebuilding {path} ({e})")
+    print(f"SQL store: writing {len(df):,} rows to {path} ({engine})")
+    return SurveyStore.build(df, path, engine, fingerprint=fingerprint, group_cols=group_cols)
@@ -9,6 +9,9 @@ import plotly.express as px
 from plotly.subplots import make_subplots
 from dash import html
 import warnings
+from modules.Payload import figure_budget
+from modules.Metrics import stage
+from modules.Memory import ANALYZER_COPY_FREE
 warnings.filterwarnings('ignore')
 
 class SubgroupRFAnalyzer:
@@ -17,7 +20,8 @@ class SubgroupRFAnalyzer:
     """
     
     def __init__(self, df, service_attributes):
-        self.df = df.copy()
+        # only ever read, so copy-free mode keeps the caller's frame
+        self.df = df if ANALYZER_COPY_FREE else df.copy()
         self.service_attributes = service_attributes
         self.rf_models = {}
         self.feature_importance_results = {}
@@ -36,6 +40,7 @@ class SubgroupRFAnalyzer:
         
         return X, y
     
+    @stage('fit', 'subgroup_random_forest')
     def train_rf_for_subgroup(self, subgroup_data, subgroup_name, min_samples=50):
         """
         Train Random Forest for a specific subgroup
@@ -119,6 +124,7 @@ class SubgroupRFAnalyzer:
             else:
                 print("Could not train model (insufficient data or no variation)")
     
+    @figure_budget('rf_comparison_chart')
     def create_feature_importance_comparison_chart(self, group_col='Class', top_n=8):
         """
         Create a comparison chart showing feature importance across subgroups
@@ -190,6 +196,7 @@ class SubgroupRFAnalyzer:
         
         return fig
     
+    @figure_budget('rf_subgroup_chart')
     def create_single_subgroup_chart(self, selected_subgroup, group_col='Class'):
         """
         Create detailed chart for a single selected subgroup
@@ -363,6 +370,7 @@ class SubgroupRFAnalyzer:
         
         return summary
 
+@figure_budget('rf_subgroup_chart')
 def create_rf_analysis_for_dashboard(df, service_attributes, group_col='Class', selected_subgroup=None):
     """
     Main function to create Random Forest analysis for the dashboard
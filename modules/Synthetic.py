@@ -0,0 +1,252 @@
+import os
+import shutil
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr, ndtri
+
+CATEGORICAL_COLUMNS = ['Gender', 'Customer Type', 'Type of Travel', 'Class', 'satisfaction']
+RATING_COLUMNS = [
+    'Inflight wifi service', 'Departure/Arrival time convenient',
+    'Ease of Online booking', 'Gate location', 'Food and drink',
+    'Online boarding', 'Seat comfort', 'Inflight entertainment',
+    'On-board service', 'Leg room service', 'Baggage handling',
+    'Checkin service', 'Inflight service', 'Cleanliness'
+]
+# ratings are modelled per combination of these, with their correlations kept through a Gaussian copula
+RATING_CONDITIONS = ['Class', 'Type of Travel', 'satisfaction']
+AGE_CONDITIONS = ['Customer Type', 'Type of Travel']
+DISTANCE_CONDITIONS = ['Class', 'Type of Travel']
+DELAY_CONDITIONS = ['satisfaction']
+DEPARTURE_DELAY = 'Departure Delay in Minutes'
+ARRIVAL_DELAY = 'Arrival Delay in Minutes'
+
+# cells with fewer rows fall back to the next coarser condition
+MIN_CELL_ROWS = 50
+# quantile grid for continuous columns; finer in the tail where delays and distances are sparse
+QUANTILE_LEVELS = np.unique(np.concatenate([np.linspace(0, 0.95, 96), np.linspace(0.95, 1, 501)]))
+# rows per generated chunk; fixed so the output for a seed does not depend on the worker count
+CHUNK_ROWS = 1_000_000
+
+
+def _quantiles(values):
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    return np.quantile(values, QUANTILE_LEVELS) if len(values) else np.zeros(len(QUANTILE_LEVELS))
+
+
+def _rating_cell(ratings):
+    """
+    Per-rating cumulative pmf over the observed values and the correlation of the normal scores
+    """
+    values = np.unique(ratings)
+    cum_pmf = np.stack([np.searchsorted(np.sort(ratings[:, j]), values, side='right') / len(ratings)
+                        for j in range(ratings.shape[1])])
+    # mid-rank normal scores give the copula correlation for discrete ratings
+    ranks = pd.DataFrame(ratings).rank(method='average').to_numpy()
+    scores = ndtri((ranks - 0.5) / len(ratings))
+    corr = np.corrcoef(scores, rowvar=False)
+    corr = np.nan_to_num(corr)
+    np.fill_diagonal(corr, 1.0)
+    # nearest positive definite matrix, so the Cholesky factor exists
+    eigenvalues, eigenvectors = np.linalg.eigh(corr)
+    corr = eigenvectors @ np.diag(np.clip(eigenvalues, 1e-6, None)) @ eigenvectors.T
+    scale = np.sqrt(np.diag(corr))
+    corr = corr / np.outer(scale, scale)
+    return {'values': values, 'cum_pmf': cum_pmf, 'cholesky': np.linalg.cholesky(corr)}
+
+
+def _conditional(df, columns, fit, fallback_columns=()):
+    """
+    {cell tuple: fit(rows)} for every combination of columns, plus fallbacks for small cells
+    """
+    cells = {key if isinstance(key, tuple) else (key,): fit(rows)
+             for key, rows in df.groupby(columns, observed=True) if len(rows) >= MIN_CELL_ROWS}
+    fallback = {key if isinstance(key, tuple) else (key,): fit(rows)
+                for key, rows in df.groupby(list(fallback_columns), observed=True)} if fallback_columns else {}
+    return {'columns': list(columns), 'cells': cells, 'fallback_columns': list(fallback_columns),
+            'fallback': fallback, 'overall': fit(df)}
+
+
+def fit_survey_model(df):
+    """
+    Distributions of the raw survey columns, from which generate_survey draws new rows:
+    the joint distribution of the categorical columns, the 14 ratings per class, travel type and
+    satisfaction (with their correlations), and age, distance and delays from quantile grids
+    """
+    joint = df[CATEGORICAL_COLUMNS].value_counts(normalize=True, sort=False)
+    ratings = [c for c in RATING_COLUMNS if c in df.columns]
+
+    departure = df[DEPARTURE_DELAY].to_numpy(dtype=np.float64)
+    arrival = df[ARRIVAL_DELAY].to_numpy(dtype=np.float64)
+    both = ~np.isnan(arrival)
+
+    def delay_fit(rows):
+        dep = rows[DEPARTURE_DELAY].to_numpy(dtype=np.float64)
+        return {'p_zero': float((dep == 0).mean()), 'positive': _quantiles(dep[dep > 0])}
+
+    return {
+        'columns': list(df.columns),
+        'joint_cells': [tuple(cell) for cell in joint.index],
+        'joint_probabilities': joint.to_numpy(),
+        'ratings': ratings,
+        'rating_cells': _conditional(df, RATING_CONDITIONS, lambda rows: _rating_cell(rows[ratings].to_numpy()),
+                                     ['satisfaction']),
+        'age': _conditional(df, AGE_CONDITIONS, lambda rows: _quantiles(rows['Age'])),
+        'distance': _conditional(df, DISTANCE_CONDITIONS, lambda rows: _quantiles(rows['Flight Distance'])),
+        'departure_delay': _conditional(df, DELAY_CONDITIONS, delay_fit),
+        # arrival delay given the departure delay
+        'arrival_on_time': {
+            'p_zero': float((arrival[both & (departure == 0)] == 0).mean()),
+            'positive': _quantiles(arrival[both & (departure == 0) & (arrival > 0)])
+        },
+        'arrival_offset': _quantiles((arrival - departure)[both & (departure > 0)]),
+        'arrival_missing': float((~both).mean())
+    }
+
+
+def _cell_model(conditional, key):
+    if key in conditional['cells']:
+        return conditional['cells'][key]
+    if conditional['fallback_columns']:
+        fallback_key = tuple(key[conditional['columns'].index(c)] for c in conditional['fallback_columns'])
+        if fallback_key in conditional['fallback']:
+            return conditional['fallback'][fallback_key]
+    return conditional['overall']
+
+
+def _draw_quantiles(rng, grid, n):
+    return np.interp(rng.random(n), QUANTILE_LEVELS, grid)
+
+
+def _condition_key(cell, columns):
+    values = dict(zip(CATEGORICAL_COLUMNS, cell))
+    return tuple(values[c] for c in columns)
+
+
+def generate_chunk(model, n_rows, seed, chunk_index=0, first_row=0):
+    """
+    n_rows synthetic rows; the random stream depends only on seed and chunk_index
+    Rows are drawn cell by cell of the categorical joint distribution into contiguous slices
+    and shuffled once at the end
+    """
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(chunk_index,)))
+    cells = model['joint_cells']
+    counts = rng.multinomial(n_rows, model['joint_probabilities'])
+    bounds = np.concatenate([[0], np.cumsum(counts)])
+    n_ratings = len(model['ratings'])
+
+    age = np.empty(n_rows)
+    distance = np.empty(n_rows)
+    departure = np.zeros(n_rows)
+    # one row per rating, so every rating column is contiguous
+    ratings = np.empty((n_ratings, n_rows), dtype=np.int64)
+
+    for i, cell in enumerate(cells):
+        start, end = bounds[i], bounds[i + 1]
+        n = end - start
+        if n == 0:
+            continue
+        age[start:end] = _draw_quantiles(rng, _cell_model(model['age'], _condition_key(cell, AGE_CONDITIONS)), n)
+        distance[start:end] = _draw_quantiles(
+            rng, _cell_model(model['distance'], _condition_key(cell, DISTANCE_CONDITIONS)), n)
+
+        rating_cell = _cell_model(model['rating_cells'], _condition_key(cell, RATING_CONDITIONS))
+        uniform = ndtr(rating_cell['cholesky'] @ rng.standard_normal((n_ratings, n)))
+        for j in range(n_ratings):
+            positions = np.minimum(np.searchsorted(rating_cell['cum_pmf'][j], uniform[j], side='right'),
+                                   len(rating_cell['values']) - 1)
+            ratings[j, start:end] = rating_cell['values'][positions]
+
+        delay_cell = _cell_model(model['departure_delay'], _condition_key(cell, DELAY_CONDITIONS))
+        delayed = rng.random(n) >= delay_cell['p_zero']
+        departure[start:end][delayed] = _draw_quantiles(rng, delay_cell['positive'], int(delayed.sum()))
+    departure = np.round(departure)
+
+    on_time = model['arrival_on_time']
+    arrival = np.maximum(departure + np.round(_draw_quantiles(rng, model['arrival_offset'], n_rows)), 0)
+    zero_departure = np.flatnonzero(departure == 0)
+    late = zero_departure[rng.random(len(zero_departure)) >= on_time['p_zero']]
+    arrival[zero_departure] = 0
+    arrival[late] = np.round(_draw_quantiles(rng, on_time['positive'], len(late)))
+    arrival[rng.random(n_rows) < model['arrival_missing']] = np.nan
+
+    order = rng.permutation(n_rows)
+    cell_codes = np.repeat(np.arange(len(cells)), counts)[order]
+    generated = {
+        'Unnamed: 0': np.arange(first_row, first_row + n_rows),
+        'id': np.arange(first_row + 1, first_row + n_rows + 1),
+        'Age': np.round(age[order]).astype(np.int64),
+        'Flight Distance': np.round(distance[order]).astype(np.int64),
+        DEPARTURE_DELAY: departure[order].astype(np.int64),
+        ARRIVAL_DELAY: arrival[order]
+    }
+    for j, col in enumerate(model['ratings']):
+        generated[col] = ratings[j][order]
+    for i, col in enumerate(CATEGORICAL_COLUMNS):
+        generated[col] = np.array([cell[i] for cell in cells], dtype=object)[cell_codes]
+    return pd.DataFrame({col: generated[col] for col in model['columns'] if col in generated})
+
+
+def _chunks(n_rows, chunk_rows):
+    return [(i, start, min(chunk_rows, n_rows - start)) for i, start in enumerate(range(0, n_rows, chunk_rows))]
+
+
+def generate_survey(model, n_rows, seed=42, chunk_rows=CHUNK_ROWS):
+    """
+    In-memory synthetic survey with the columns of the fitted data
+    """
+    return pd.concat([generate_chunk(model, size, seed, i, start) for i, start, size in _chunks(n_rows, chunk_rows)],
+                     ignore_index=True)
+
+
+def _write_part(model, seed, chunk_index, first_row, n_rows, path, fmt):
+    chunk = generate_chunk(model, n_rows, seed, chunk_index, first_row)
+    if fmt == 'parquet':
+        chunk.to_parquet(path, index=False)
+    else:
+        chunk.to_csv(path, index=False, header=chunk_index == 0)
+    return path
+
+
+def write_survey(model, n_rows, path, fmt='csv', seed=42, workers=None, chunk_rows=CHUNK_ROWS, first_row=0):
+    """
+    Generate n_rows in chunks on a process pool and write them to path: one CSV file, or for
+    'parquet' a directory of part files (needs pyarrow)
+    first_row: row number of the first row, so files written one after another (partitions)
+    get consecutive 'Unnamed: 0' and 'id' values
+    """
+    if fmt == 'parquet':
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ImportError("Writing parquet needs pyarrow; install it or use fmt='csv'")
+    workers = workers or os.cpu_count() or 1
+    chunks = _chunks(n_rows, chunk_rows)
+
+    part_dir = path if fmt == 'parquet' else tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(path)))
+    os.makedirs(part_dir, exist_ok=True)
+    part_paths = [os.path.join(part_dir, f'part-{i:05d}.{fmt}') for i, _, _ in chunks]
+    jobs = [(model, seed, i, first_row + start, size, part_path, fmt)
+            for (i, start, size), part_path in zip(chunks, part_paths)]
+
+    try:
+        if workers > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(min(workers, len(jobs)), mp_context=multiprocessing.get_context('fork')) as pool:
+                list(pool.map(_write_part, *zip(*jobs)))
+        else:
+            for job in jobs:
+                _write_part(*job)
+
+        if fmt == 'csv':
+            # parts are written in parallel and joined in order; only the first has the header
+            with open(path, 'wb') as out:
+                for part_path in part_paths:
+                    with open(part_path, 'rb') as part:
+                        shutil.copyfileobj(part, out, 16 * 1024 * 1024)
+    finally:
+        if fmt == 'csv':
+            shutil.rmtree(part_dir, ignore_errors=True)
+    return path
@@ -0,0 +1,217 @@
+import os
+import time
+import atexit
+import weakref
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from modules.Metrics import record_cache, flush_metrics
+
+# 'off', 'default' (default group-by for every sample size plus the most used combinations) or 'all'
+WARMUP_MODE = os.environ.get('AIRLINE_WARMUP', 'default')
+# > 0 runs the warm-up tasks in a process pool of that size
+WARMUP_WORKERS = int(os.environ.get('AIRLINE_WARMUP_WORKERS', '0'))
+# how many of the most used combinations from earlier runs to warm as well
+WARMUP_TOP_USED = int(os.environ.get('AIRLINE_WARMUP_TOP_USED', '10'))
+# seconds a process counts combination uses in memory before adding them to the shared cache
+USAGE_FLUSH_INTERVAL = float(os.environ.get('AIRLINE_USAGE_FLUSH_INTERVAL', 30))
+# combinations kept per callback in the usage counts; the least used are dropped beyond that
+MAX_USAGE_ENTRIES = int(os.environ.get('AIRLINE_MAX_USAGE_ENTRIES', 500))
+
+# set in the parent right before the pool forks, so the workers inherit the compute function
+_pool_compute = None
+# figure caches with usage counts not yet written, flushed at exit
+_figure_caches = weakref.WeakSet()
+
+
+def flush_usage():
+    """
+    Write the combination uses every figure cache of this process still holds
+    """
+    for figure_cache in list(_figure_caches):
+        figure_cache.flush_usage()
+
+
+atexit.register(flush_usage)
+
+
+def _run_pooled_task(name, inputs):
+    _pool_compute(name, inputs)
+    # pool workers exit without running atexit handlers
+    flush_metrics()
+    return name, inputs
+
+
+class FigureCache:
+    """
+    Figures and models keyed by callback name and inputs, plus how often each combination
+    was requested; kept in the shared disk cache so every process sees the same entries
+    """
+
+    def __init__(self, cache, data_version, expire=None, flush_interval=USAGE_FLUSH_INTERVAL):
+        self.cache = cache
+        self.data_version = data_version
+        self.expire = expire
+        self.flush_interval = flush_interval
+        self._usage_lock = threading.Lock()
+        self._reset_usage()
+        _figure_caches.add(self)
+
+    def _reset_usage(self):
+        # {name: {inputs: uses}} counted in this process since the last flush
+        self._usage = {}
+        self._usage_pid = os.getpid()
+        self._last_flush = time.monotonic()
+
+    def _key(self, name, inputs):
+        return ('figure', self.data_version, name, tuple(inputs))
+
+    def get(self, name, inputs, track=True):
+        value = self.cache.get(self._key(name, inputs))
+        if track:
+            record_cache(name, value is not None)
+        return value
+
+    def set(self, name, inputs, value):
+        self.cache.set(self._key(name, inputs), value, expire=self.expire)
+
+    def record_use(self, name, inputs):
+        """
+        Count a request for a combination; counts collect in memory and reach the shared
+        cache at most every flush_interval seconds, so requests never wait on its write lock
+        """
+        with self._usage_lock:
+            if self._usage_pid != os.getpid():
+                # a forked child starts with the parent's unwritten counts; they are the parent's to write
+                self._reset_usage()
+            counts = self._usage.setdefault(name, {})
+            counts[tuple(inputs)] = counts.get(tuple(inputs), 0) + 1
+            due = time.monotonic() - self._last_flush >= self.flush_interval
+        if due:
+            self.flush_usage()
+
+    def flush_usage(self):
+        """
+        Add this process's counts to the shared ones in one transaction, keeping the
+        MAX_USAGE_ENTRIES most used combinations per callback
+        """
+        with self._usage_lock:
+            if self._usage_pid != os.getpid():
+                self._reset_usage()
+            pending = self._usage
+            self._reset_usage()
+        if not pending:
+            return
+        try:
+            with self.cache.transact():
+                for name, counts in pending.items():
+                    usage_key = ('usage', self.data_version, name)
+                    usage = self.cache.get(usage_key, {})
+                    for inputs, uses in counts.items():
+                        usage[inputs] = usage.get(inputs, 0) + uses
+                    if len(usage) > MAX_USAGE_ENTRIES:
+                        usage = dict(sorted(usage.items(), key=lambda item: -item[1])[:MAX_USAGE_ENTRIES])
+                    self.cache.set(usage_key, usage, expire=self.expire)
+        except Exception as e:
+            print(f"Could not write combination usage: {e}")
+
+    def most_used(self, name, n):
+        self.flush_usage()
+        usage = self.cache.get(('usage', self.data_version, name), {})
+        return [inputs for inputs, _ in sorted(usage.items(), key=lambda item: -item[1])[:n]]
+
+
+class WarmUp:
+    """
+    Runs compute(name, inputs) for every task in a background thread, optionally fanned out to
+    a process pool; progress is kept in the disk cache so callbacks in any process can tell
+    whether a combination is still being prepared
+    """
+
+    def __init__(self, figure_cache, tasks, compute, workers=0):
+        self.figure_cache = figure_cache
+        self.compute = compute
+        self.workers = workers
+        # de-duplicate while keeping the order, defaults first
+        self.tasks = list(dict.fromkeys((name, tuple(inputs)) for name, inputs in tasks))
+        self._status_key = ('warmup', figure_cache.data_version)
+        self._thread = None
+        # a previous process may have stopped mid warm-up and left its status behind
+        figure_cache.cache.delete(self._status_key)
+
+    def start(self):
+        """
+        Start warming in a daemon thread; the server keeps answering meanwhile
+        """
+        if not self.tasks:
+            return self
+        with self.figure_cache.cache.transact():
+            self.figure_cache.cache.set(self._status_key, {'pending': set(self.tasks), 'total': len(self.tasks)})
+        self._thread = threading.Thread(target=self.run, name='warmup', daemon=True)
+        self._thread.start()
+        return self
+
+    def _mark_done(self, task):
+        cache = self.figure_cache.cache
+        with cache.transact():
+            status = cache.get(self._status_key)
+            if status is not None:
+                status['pending'].discard(task)
+                cache.set(self._status_key, status)
+
+    def run(self):
+        global _pool_compute
+        print(f"Warm-up: {len(self.tasks)} combinations, {self.workers or 'no'} pool workers")
+        start = time.perf_counter()
+
+        if self.workers > 0:
+            _pool_compute = self.compute
+            with ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('fork')) as pool:
+                futures = [pool.submit(_run_pooled_task, name, inputs) for name, inputs in self.tasks]
+                for future in as_completed(futures):
+                    try:
+                        self._mark_done(future.result())
+                    except Exception as e:
+                        print(f"Warm-up task failed: {e}")
+            # failed tasks are computed on demand instead
+            for task in self.tasks:
+                self._mark_done(task)
+        else:
+            for task in self.tasks:
+                try:
+                    self.compute(*task)
+                except Exception as e:
+                    print(f"Warm-up task {task} failed: {e}")
+                self._mark_done(task)
+
+        print(f"Warm-up finished in {time.perf_counter() - start:.1f}s")
+
+    def pending(self):
+        status = self.figure_cache.cache.get(self._status_key)
+        return status['pending'] if status else set()
+
+    def is_ready(self):
+        return not self.pending()
+
+    def is_pending(self, name, inputs):
+        return (name, tuple(inputs)) in self.pending()
+
+
+def placeholder_figure(text="Preparing chart..."):
+    """
+    Empty figure with a message, shown while the warm-up has not reached this combination yet
+    """
+    return {
+        'data': [],
+        'layout': {
+            'xaxis': {'visible': False},
+            'yaxis': {'visible': False},
+            'annotations': [{
+                'text': text,
+                'xref': 'paper', 'yref': 'paper', 'x': 0.5, 'y': 0.5,
+                'showarrow': False, 'font': {'size': 18, 'color': '#666'}
+            }],
+            'paper_bgcolor': 'rgba(0,0,0,0)',
+            'plot_bgcolor': 'rgba(0,0,0,0)'
+        }
+    }
@@ -7,27 +7,71 @@ from sklearn.metrics import silhouette_score, calinski_harabasz_score
 import plotly.graph_objects as go
 import plotly.express as px
 from plotly.subplots import make_subplots
+from sklearn.neighbors import NearestNeighbors
+import time
 import warnings
 from utils import get_display_name
+from modules.NeighborIndex import PassengerNeighborIndex
+from modules.Payload import figure_budget
+from modules.Metrics import stage
+from modules.Memory import ANALYZER_COPY_FREE
 warnings.filterwarnings('ignore')
 
+# passenger count above which the PCA scatter switches from WebGL markers to a binned density image
+DENSITY_POINT_THRESHOLD = 20000
+DENSITY_BINS = (120, 80)
+NOISE_COLOR = 'rgb(211,211,211)'
+# derived label column of each clustering method
+FITTED_LABEL_COLUMNS = {'kmeans': 'Cluster', 'dbscan': 'DBSCAN_Cluster'}
+
+
+def _parse_rgb(color):
+    return [int(c) for c in color[color.index('(') + 1:color.index(')')].split(',')[:3]]
+
 class CustomerSegmentationAnalyzer:
     """
     Advanced clustering analysis for customer segmentation
     """
     
     def __init__(self, df, service_attributes):
-        self.df = df.copy()
+        # copy-free mode only reads the caller's frame; derived columns never go into it
+        self.df = df if ANALYZER_COPY_FREE else df.copy()
         self.service_attributes = service_attributes
+        # per-row arrays computed here (encoded categoricals, PCA coordinates, cluster labels),
+        # aligned with the rows of self.df
+        self.derived = {}
         self.scaled_features = None
+        self.clustering_features = None
+        self.scaler = None
+        self._scaled_with_categorical = None
         self.cluster_results = {}
         self.pca_components = None
         self.feature_encoders = {}
+        self.neighbor_index = None
+        self.cluster_aggregates = None
+        self._density_grids = {}
+    
+    def has_column(self, name):
+        """
+        Whether name is a derived column or a column of the passenger frame
+        """
+        return name in self.derived or name in self.df.columns
+    
+    def column(self, name):
+        """
+        Values of a derived column or a passenger frame column as an array
+        """
+        if name in self.derived:
+            return self.derived[name]
+        return self.df[name].to_numpy()
         
     def prepare_clustering_features(self, include_categorical=True):
         """
-        Prepare features for clustering analysis
+        Prepare features for clustering analysis (cached after the first call)
         """
+        if self.scaled_features is not None and self._scaled_with_categorical == include_categorical:
+            return self.clustering_features, self.scaled_features
+        
         clustering_features = []
         clustering_features.extend(self.service_attributes)
         numerical_features = [
@@ -49,23 +93,27 @@ class CustomerSegmentationAnalyzer:
                 if feature in self.df.columns:
                     le = LabelEncoder()
                     encoded_col = f'{feature}_encoded'
-                    self.df[encoded_col] = le.fit_transform(self.df[feature].astype(str))
+                    self.derived[encoded_col] = le.fit_transform(self.df[feature].astype(str))
                     clustering_features.append(encoded_col)
                     self.feature_encoders[feature] = le
         
         # feature matrix
-        X = self.df[clustering_features].copy()
+        X = pd.DataFrame({feature: self.column(feature) for feature in clustering_features})
         X = X.fillna(X.mean())
         
         # Scale features
         scaler = StandardScaler()
         self.scaled_features = scaler.fit_transform(X)
+        self.scaler = scaler
+        self.clustering_features = clustering_features
+        self._scaled_with_categorical = include_categorical
         
         return clustering_features, self.scaled_features
     
-    def find_optimal_clusters(self, max_clusters=8):
+    def find_optimal_clusters(self, max_clusters=8, progress_callback=None):
         """
         Find optimal number of clusters using multiple metrics
+        progress_callback(done, total) is called after each k is evaluated
         """
         _, X_scaled = self.prepare_clustering_features()
         
@@ -81,6 +129,9 @@ class CustomerSegmentationAnalyzer:
             inertias.append(kmeans.inertia_)
             silhouette_scores.append(silhouette_score(X_scaled, cluster_labels))
             calinski_scores.append(calinski_harabasz_score(X_scaled, cluster_labels))
+            
+            if progress_callback is not None:
+                progress_callback(n_clusters - 1, len(cluster_range))
         
         # Find optimal clusters (highest silhouette score)
         optimal_k = cluster_range[np.argmax(silhouette_scores)]
@@ -93,28 +144,26 @@ class CustomerSegmentationAnalyzer:
             'optimal_k': optimal_k
         }
     
-    def perform_kmeans_clustering(self, n_clusters=None):
+    @stage('fit', 'kmeans')
+    def perform_kmeans_clustering(self, n_clusters=None, progress_callback=None):
         """
         K-means clustering
         """
         features, X_scaled = self.prepare_clustering_features()
         
         if n_clusters is None:
-            optimal_results = self.find_optimal_clusters()
+            optimal_results = self.find_optimal_clusters(progress_callback=progress_callback)
             n_clusters = optimal_results['optimal_k']
         
         kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
         cluster_labels = kmeans.fit_predict(X_scaled)
-        self.df['Cluster'] = cluster_labels
+        self.derived['Cluster'] = cluster_labels
+        self.cluster_aggregates = None
+        self._density_grids.pop('Cluster', None)
         
         # cluster centers in original space
-        cluster_centers = []
-        for i in range(n_clusters):
-            cluster_data = self.df[self.df['Cluster'] == i]
-            center = {}
-            for feature in self.service_attributes:
-                center[feature] = cluster_data[feature].mean()
-            cluster_centers.append(center)
+        service_means = self.compute_cluster_aggregates()['service_means']
+        cluster_centers = [service_means.loc[i].to_dict() for i in range(n_clusters)]
         
         self.cluster_results['kmeans'] = {
             'model': kmeans,
@@ -126,6 +175,34 @@ class CustomerSegmentationAnalyzer:
         
         return cluster_labels
     
+    def fitted_results(self):
+        """
+        Cluster labels and fit statistics of the k-means and DBSCAN fits, without models or
+        frames: small enough to hand to another process through the shared cache
+        """
+        fitted = {}
+        for method, label_col in FITTED_LABEL_COLUMNS.items():
+            if method in self.cluster_results:
+                results = {key: value for key, value in self.cluster_results[method].items() if key != 'model'}
+                results['labels'] = np.asarray(results['labels'], dtype=np.int32)
+                fitted[method] = results
+        return fitted
+    
+    def attach_fitted_results(self, fitted):
+        """
+        Use fits made by another analyzer of the same rows (fitted_results) instead of fitting again
+        """
+        for method, results in fitted.items():
+            label_col = FITTED_LABEL_COLUMNS[method]
+            if self.has_column(label_col):
+                continue
+            self.cluster_results[method] = dict(results, model=None)
+            self.derived[label_col] = results['labels']
+            self._density_grids.pop(label_col, None)
+            if method == 'kmeans':
+                self.cluster_aggregates = None
+    
+    @stage('fit', 'pca')
     def perform_pca_analysis(self, n_components=2):
         """
         PCA for dimensionality reduction and visualization
@@ -135,50 +212,208 @@ class CustomerSegmentationAnalyzer:
         pca = PCA(n_components=n_components)
         self.pca_components = pca.fit_transform(X_scaled)
         
-        # Add PCA components to dataframe
+        # PCA columns are views into the component matrix
         for i in range(n_components):
-            self.df[f'PCA_{i+1}'] = self.pca_components[:, i]
+            self.derived[f'PCA_{i+1}'] = self.pca_components[:, i]
+        self._density_grids = {}
         
         return pca, self.pca_components
     
+    @stage('fit', 'neighbor_index')
+    def build_neighbor_index(self, algorithm='auto', leaf_size=40):
+        """
+        Build a nearest-neighbour index over the cached scaled feature matrix
+        Cluster labels are attached when k-means has already been run
+        """
+        self.neighbor_index = PassengerNeighborIndex.from_analyzer(
+            self, algorithm=algorithm, leaf_size=leaf_size
+        )
+        return self.neighbor_index
+    
+    def estimate_dbscan_eps(self, min_samples=10, sample_size=5000, neighbors=None, X=None, random_state=42):
+        """
+        Pick DBSCAN eps from the knee of a sampled k-distance curve
+        """
+        if X is None:
+            _, X = self.prepare_clustering_features()
+        if neighbors is None:
+            neighbors = NearestNeighbors().fit(X)
+        
+        rng = np.random.RandomState(random_state)
+        if len(X) > sample_size:
+            sample = X[rng.choice(len(X), sample_size, replace=False)]
+        else:
+            sample = X
+        
+        # distance to the min_samples-th neighbour (the point itself counts, as in DBSCAN)
+        distances, _ = neighbors.kneighbors(sample, n_neighbors=min(min_samples, len(X)))
+        k_distances = np.sort(distances[:, -1])
+        # the extreme tail would flatten the normalised curve and push the knee into it
+        k_distances = k_distances[:max(2, int(len(k_distances) * 0.99))]
+        
+        # knee = point of the sorted curve furthest from the chord joining its ends
+        x = np.linspace(0, 1, len(k_distances))
+        span = k_distances[-1] - k_distances[0]
+        if span <= 0:
+            return float(k_distances[-1]) or 1e-6
+        y = (k_distances - k_distances[0]) / span
+        knee = np.argmax(x - y)
+        return float(k_distances[knee])
+    
+    @stage('fit', 'dbscan')
+    def perform_dbscan_clustering(self, eps=None, min_samples=10, max_fit_samples=20000, random_state=42):
+        """
+        Density-based clustering; passengers outside every dense region are labelled noise (-1)
+        Large datasets are fitted on a sample and the remaining passengers are assigned to
+        the nearest core point within eps
+        """
+        start = time.perf_counter()
+        _, X_scaled = self.prepare_clustering_features()
+        n_rows = len(X_scaled)
+        
+        sampled = n_rows > max_fit_samples
+        if sampled:
+            rng = np.random.RandomState(random_state)
+            fit_idx = rng.choice(n_rows, max_fit_samples, replace=False)
+            X_fit = X_scaled[fit_idx]
+            neighbors = NearestNeighbors().fit(X_fit)
+        else:
+            X_fit = X_scaled
+            if self.neighbor_index is None:
+                self.build_neighbor_index()
+            neighbors = self.neighbor_index.nn
+        
+        if eps is None:
+            eps = self.estimate_dbscan_eps(min_samples, neighbors=neighbors, X=X_fit, random_state=random_state)
+        
+        # DBSCAN on the sparse eps-neighbourhood graph from the index
+        radius_graph = neighbors.radius_neighbors_graph(radius=eps, mode='distance')
+        dbscan = DBSCAN(eps=eps, min_samples=min_samples, metric='precomputed')
+        fit_labels = dbscan.fit_predict(radius_graph)
+        
+        if sampled:
+            # assign every passenger to its nearest core point, or noise if none is within eps
+            core_idx = dbscan.core_sample_indices_
+            cluster_labels = np.full(n_rows, -1, dtype=int)
+            if len(core_idx) > 0:
+                core_neighbors = NearestNeighbors(n_neighbors=1).fit(X_fit[core_idx])
+                distances, nearest = core_neighbors.kneighbors(X_scaled)
+                within = distances[:, 0] <= eps
+                cluster_labels[within] = fit_labels[core_idx][nearest[within, 0]]
+            cluster_labels[fit_idx] = fit_labels
+        else:
+            cluster_labels = fit_labels
+        
+        self.derived['DBSCAN_Cluster'] = cluster_labels
+        self._density_grids.pop('DBSCAN_Cluster', None)
+        runtime = time.perf_counter() - start
+        noise_fraction = float((cluster_labels == -1).mean())
+        n_clusters = len(set(cluster_labels.tolist()) - {-1})
+        
+        self.cluster_results['dbscan'] = {
+            'model': dbscan,
+            'eps': eps,
+            'min_samples': min_samples,
+            'n_clusters': n_clusters,
+            'labels': cluster_labels,
+            'noise_fraction': noise_fraction,
+            'n_core_points': len(dbscan.core_sample_indices_),
+            'fit_rows': len(X_fit),
+            'sampled': sampled,
+            'runtime_seconds': runtime
+        }
+        print(f"DBSCAN: eps={eps:.3f}, {n_clusters} clusters, "
+              f"noise {noise_fraction:.1%}, {runtime:.2f}s on {len(X_fit):,}/{n_rows:,} rows")
+        
+        return cluster_labels
+    
+    @stage('aggregate', 'cluster')
+    def compute_cluster_aggregates(self):
+        """
+        Per-cluster sizes, satisfaction, service means, categorical modes and age range
+        computed in one vectorized pass over the k-means labels; cached until the next fit
+        """
+        if self.cluster_aggregates is not None:
+            return self.cluster_aggregates
+        if not self.has_column('Cluster'):
+            self.perform_kmeans_clustering()
+            return self.cluster_aggregates
+        
+        labels = self.column('Cluster')
+        n_clusters = int(labels.max()) + 1
+        sizes = np.bincount(labels, minlength=n_clusters)
+        
+        satisfied = (self.df['satisfaction'] == 'satisfied').to_numpy()
+        satisfied_counts = np.bincount(labels, weights=satisfied, minlength=n_clusters)
+        
+        # means of every numeric column in one groupby
+        mean_cols = list(self.service_attributes)
+        if 'Age' in self.df.columns:
+            mean_cols.append('Age')
+        grouped = self.df[mean_cols].groupby(labels)
+        means = grouped.mean().reindex(range(n_clusters))
+        
+        # modes from bincounts of the categorical codes; ties resolve to the smallest value like Series.mode()
+        modes = {}
+        for feature in ['Gender', 'Customer Type', 'Type of Travel', 'Class']:
+            if feature in self.df.columns:
+                codes, uniques = pd.factorize(self.df[feature], sort=True)
+                valid = codes >= 0
+                counts = np.bincount(
+                    labels[valid] * len(uniques) + codes[valid],
+                    minlength=n_clusters * len(uniques)
+                ).reshape(n_clusters, len(uniques))
+                modes[feature] = [
+                    uniques[counts[i].argmax()] if counts[i].any() else None
+                    for i in range(n_clusters)
+                ]
+        
+        aggregates = {
+            'n_clusters': n_clusters,
+            'sizes': sizes,
+            'satisfaction_rate': satisfied_counts / np.maximum(sizes, 1) * 100,
+            'service_means': means[list(self.service_attributes)],
+            'modes': modes
+        }
+        if 'Age' in self.df.columns:
+            age_range = self.df['Age'].groupby(labels).agg(['min', 'max']).reindex(range(n_clusters))
+            aggregates['age_mean'] = means['Age']
+            aggregates['age_min'] = age_range['min']
+            aggregates['age_max'] = age_range['max']
+        
+        self.cluster_aggregates = aggregates
+        return aggregates
+    
     def analyze_cluster_characteristics(self):
         """
         Analyze characteristics of each cluster
         """
-        if 'Cluster' not in self.df.columns:
-            self.perform_kmeans_clustering()
+        aggregates = self.compute_cluster_aggregates()
         
         cluster_analysis = {}
-        n_clusters = self.df['Cluster'].nunique()
+        total = len(self.df)
         
-        for cluster_id in range(n_clusters):
-            cluster_data = self.df[self.df['Cluster'] == cluster_id]
+        for cluster_id in range(aggregates['n_clusters']):
+            size = int(aggregates['sizes'][cluster_id])
             
             # basic statistics
             analysis = {
-                'size': len(cluster_data),
-                'size_percentage': len(cluster_data) / len(self.df) * 100,
-                'satisfaction_rate': (cluster_data['satisfaction'] == 'satisfied').mean() * 100,
-                'avg_service_scores': {},
+                'size': size,
+                'size_percentage': size / total * 100,
+                'satisfaction_rate': aggregates['satisfaction_rate'][cluster_id],
+                'avg_service_scores': aggregates['service_means'].loc[cluster_id].to_dict(),
                 'dominant_characteristics': {}
             }
             
-            # service scores
-            for attr in self.service_attributes:
-                analysis['avg_service_scores'][attr] = cluster_data[attr].mean()
-            
             # dominant characteristics
-            categorical_features = ['Gender', 'Customer Type', 'Type of Travel', 'Class']
-            for feature in categorical_features:
-                if feature in cluster_data.columns:
-                    mode_value = cluster_data[feature].mode()
-                    if len(mode_value) > 0:
-                        analysis['dominant_characteristics'][feature] = mode_value[0]
+            for feature, feature_modes in aggregates['modes'].items():
+                if feature_modes[cluster_id] is not None:
+                    analysis['dominant_characteristics'][feature] = feature_modes[cluster_id]
             
             # age statistics
-            if 'Age' in cluster_data.columns:
-                analysis['avg_age'] = cluster_data['Age'].mean()
-                analysis['age_range'] = f"{cluster_data['Age'].min()}-{cluster_data['Age'].max()}"
+            if 'age_mean' in aggregates:
+                analysis['avg_age'] = aggregates['age_mean'][cluster_id]
+                analysis['age_range'] = f"{aggregates['age_min'][cluster_id]}-{aggregates['age_max'][cluster_id]}"
             
             cluster_analysis[cluster_id] = analysis
         
@@ -194,44 +429,61 @@ class CustomerSegmentationAnalyzer:
             return self.create_cluster_comparison_chart()
         elif chart_type == 'cluster_profiles':
             return self.create_cluster_profiles_chart()
+        elif chart_type == 'dbscan_scatter':
+            return self.create_dbscan_scatter_plot()
         else:
             return self.create_pca_scatter_plot()
     
-    def create_pca_scatter_plot(self):
+    @figure_budget('cluster_scatter')
+    def create_pca_scatter_plot(self, render_mode='auto', density_threshold=None):
         """
         Create PCA scatter plot with cluster colors
+        render_mode: 'svg', 'webgl', 'density' or 'auto' (WebGL up to density_threshold points, density above)
+        """
+        if not self.has_column('Cluster'):
+            self.perform_kmeans_clustering()
+        return self._create_label_scatter_plot('Cluster', render_mode=render_mode,
+                                               density_threshold=density_threshold)
+    
+    @figure_budget('cluster_scatter')
+    def create_dbscan_scatter_plot(self, render_mode='auto', density_threshold=None):
+        """
+        Create PCA scatter plot coloured by density-based clusters, with noise in grey
+        """
+        if not self.has_column('DBSCAN_Cluster'):
+            self.perform_dbscan_clustering()
+        
+        results = self.cluster_results['dbscan']
+        title = (f"{results['n_clusters']} dense segments, "
+                 f"noise {results['noise_fraction']:.1%}, "
+                 f"eps {results['eps']:.2f}, {results['runtime_seconds']:.2f}s")
+        return self._create_label_scatter_plot('DBSCAN_Cluster', title=title, render_mode=render_mode,
+                                               density_threshold=density_threshold)
+    
+    def _label_style(self, cluster_id):
+        palette = px.colors.qualitative.Set3
+        if cluster_id == -1:
+            return NOISE_COLOR, 'Noise'
+        return palette[cluster_id % len(palette)], f'Cluster {cluster_id}'
+    
+    def _create_label_scatter_plot(self, label_col, title=None, render_mode='auto', density_threshold=None):
+        """
+        Scatter the passengers on the first two principal components, one trace per label
         """
         if self.pca_components is None:
             self.perform_pca_analysis()
         
-        # Create scatter plot
-        fig = go.Figure()
-        
-        n_clusters = self.df['Cluster'].nunique()
-        colors = px.colors.qualitative.Set3[:n_clusters]
+        if density_threshold is None:
+            density_threshold = DENSITY_POINT_THRESHOLD
+        if render_mode == 'auto':
+            render_mode = 'density' if len(self.df) > density_threshold else 'webgl'
         
-        for cluster_id in range(n_clusters):
-            cluster_data = self.df[self.df['Cluster'] == cluster_id]
-            
-            fig.add_trace(go.Scatter(
-                x=cluster_data['PCA_1'],
-                y=cluster_data['PCA_2'],
-                mode='markers',
-                marker=dict(
-                    color=colors[cluster_id],
-                    size=6,
-                    opacity=0.7,
-                    line=dict(width=1, color='DarkSlateGrey')
-                ),
-                name=f'Cluster {cluster_id}',
-                text=[f'Satisfaction: {sat}<br>Service Score: {score:.2f}' 
-                      for sat, score in zip(cluster_data['satisfaction'], 
-                                          cluster_data['Service_Quality_Score'])],
-                hovertemplate='<b>%{fullData.name}</b><br>' +
-                            'PCA 1: %{x:.2f}<br>' +
-                            'PCA 2: %{y:.2f}<br>' +
-                            '%{text}<extra></extra>'
-            ))
+        if render_mode == 'density':
+            fig = self._create_density_figure(label_col)
+        elif render_mode == 'webgl':
+            fig = self._create_webgl_figure(label_col)
+        else:
+            fig = self._create_svg_figure(label_col)
         
         fig.update_layout(
             xaxis_title='PC1',
@@ -260,30 +512,214 @@ class CustomerSegmentationAnalyzer:
             plot_bgcolor='rgba(0,0,0,0)',
             paper_bgcolor='rgba(0,0,0,0)'
         )
+        if title:
+            fig.update_layout(title={
+                'text': title,
+                'x': 0.5,
+                'xanchor': 'center',
+                'font': {'size': 16, 'color': '#1a237e', 'family': 'Arial'}
+            })
         fig.update_xaxes(automargin=True, zeroline=False)
         fig.update_yaxes(automargin=True, zeroline=False)
         return fig
     
+    def _create_svg_figure(self, label_col):
+        """
+        One SVG trace per label with a hover string for every passenger
+        """
+        fig = go.Figure()
+        
+        labels = self.column(label_col)
+        for cluster_id in sorted(np.unique(labels)):
+            mask = labels == cluster_id
+            cluster_data = self.df[mask]
+            color, name = self._label_style(cluster_id)
+            
+            fig.add_trace(go.Scatter(
+                x=self.column('PCA_1')[mask],
+                y=self.column('PCA_2')[mask],
+                mode='markers',
+                marker=dict(
+                    color=color,
+                    size=6,
+                    opacity=0.7,
+                    line=dict(width=1, color='DarkSlateGrey')
+                ),
+                name=name,
+                text=[f'Satisfaction: {sat}<br>Service Score: {score:.2f}' 
+                      for sat, score in zip(cluster_data['satisfaction'], 
+                                          cluster_data['Service_Quality_Score'])],
+                hovertemplate='<b>%{fullData.name}</b><br>' +
+                            'PCA 1: %{x:.2f}<br>' +
+                            'PCA 2: %{y:.2f}<br>' +
+                            '%{text}<extra></extra>'
+            ))
+        return fig
+    
+    def _create_webgl_figure(self, label_col):
+        """
+        One Scattergl trace per label from float32 coordinates; the row position rides along
+        as int32 customdata so hover detail can be looked up on demand
+        """
+        fig = go.Figure()
+        
+        labels = self.column(label_col)
+        x = self.column('PCA_1').astype(np.float32)
+        y = self.column('PCA_2').astype(np.float32)
+        
+        # group row positions by label with one sort instead of a boolean mask per label
+        order = np.argsort(labels, kind='stable').astype(np.int32)
+        cluster_ids, starts = np.unique(labels[order], return_index=True)
+        ends = np.append(starts[1:], len(order))
+        
+        for cluster_id, start, end in zip(cluster_ids, starts, ends):
+            positions = order[start:end]
+            color, name = self._label_style(int(cluster_id))
+            fig.add_trace(go.Scattergl(
+                x=x[positions],
+                y=y[positions],
+                customdata=positions,
+                mode='markers',
+                marker=dict(color=color, size=6, opacity=0.7),
+                name=name,
+                hovertemplate='<b>%{fullData.name}</b><br>' +
+                            'PCA 1: %{x:.2f}<br>' +
+                            'PCA 2: %{y:.2f}<extra></extra>'
+            ))
+        return fig
+    
+    @stage('aggregate', 'density_grid')
+    def compute_density_grid(self, label_col='Cluster', bins=None):
+        """
+        Server-side 2D binning of the PCA coordinates: passenger counts per cell and label
+        Cached per label column
+        """
+        if label_col in self._density_grids:
+            return self._density_grids[label_col]
+        if self.pca_components is None:
+            self.perform_pca_analysis()
+        
+        nx, ny = bins or DENSITY_BINS
+        labels = self.column(label_col)
+        x = self.column('PCA_1')
+        y = self.column('PCA_2')
+        
+        x_min, y_min = x.min(), y.min()
+        dx = (x.max() - x_min) / nx or 1.0
+        dy = (y.max() - y_min) / ny or 1.0
+        bin_x = np.clip(((x - x_min) / dx).astype(np.int64), 0, nx - 1)
+        bin_y = np.clip(((y - y_min) / dy).astype(np.int64), 0, ny - 1)
+        
+        codes, cluster_ids = pd.factorize(labels, sort=True)
+        k = len(cluster_ids)
+        counts = np.bincount(
+            (bin_y * nx + bin_x) * k + codes, minlength=nx * ny * k
+        ).reshape(ny, nx, k)
+        
+        grid = {
+            'x_min': x_min, 'dx': dx, 'nx': nx,
+            'y_min': y_min, 'dy': dy, 'ny': ny,
+            'counts': counts,
+            'cluster_ids': cluster_ids
+        }
+        self._density_grids[label_col] = grid
+        return grid
+    
+    def _create_density_figure(self, label_col):
+        """
+        Each cell of the density grid is coloured by its majority cluster and shaded by
+        log passenger count, so the payload depends on the grid size only
+        """
+        grid = self.compute_density_grid(label_col)
+        counts, cluster_ids = grid['counts'], grid['cluster_ids']
+        x_min, dx, y_min, dy = grid['x_min'], grid['dx'], grid['y_min'], grid['dy']
+        total = counts.sum(axis=2)
+        majority = counts.argmax(axis=2)
+        
+        styles = [self._label_style(int(cid)) for cid in cluster_ids]
+        rgb = np.array([_parse_rgb(color) for color, _ in styles], dtype=np.uint8)
+        alpha = np.zeros(total.shape, dtype=np.uint8)
+        occupied = total > 0
+        alpha[occupied] = 64 + 191 * np.log1p(total[occupied]) / np.log1p(total.max())
+        rgba = np.concatenate([rgb[majority], alpha[..., None]], axis=2)
+        
+        fig = go.Figure(go.Image(
+            z=rgba,
+            colormodel='rgba256',
+            x0=x_min + dx / 2, dx=dx,
+            y0=y_min + dy / 2, dy=dy,
+            hoverinfo='none'
+        ))
+        # legend-only marker traces
+        for color, name in styles:
+            fig.add_trace(go.Scattergl(
+                x=[None], y=[None], mode='markers',
+                marker=dict(color=color, size=10), name=name
+            ))
+        fig.update_layout(yaxis=dict(scaleanchor=False, autorange=True))
+        return fig
+    
+    def describe_hover_point(self, point, label_col='Cluster'):
+        """
+        On-demand hover detail for a point of the PCA scatter coloured by label_col:
+        a passenger for marker traces, a bin breakdown for the density image
+        """
+        if not self.has_column(label_col):
+            if label_col == 'DBSCAN_Cluster':
+                self.perform_dbscan_clustering()
+            else:
+                self.perform_kmeans_clustering()
+        
+        customdata = point.get('customdata')
+        if customdata is not None:
+            position = int(customdata[0] if isinstance(customdata, list) else customdata)
+            if not 0 <= position < len(self.df):
+                return None
+            row = self.df.iloc[position]
+            return {
+                'kind': 'passenger',
+                'name': self._label_style(int(self.column(label_col)[position]))[1],
+                'passenger_id': row['id'] if 'id' in row.index else self.df.index[position],
+                'satisfaction': row['satisfaction'],
+                'service_score': row['Service_Quality_Score']
+            }
+        
+        if 'x' in point and 'y' in point:
+            grid = self.compute_density_grid(label_col)
+            bx = int(np.clip((point['x'] - grid['x_min']) // grid['dx'], 0, grid['nx'] - 1))
+            by = int(np.clip((point['y'] - grid['y_min']) // grid['dy'], 0, grid['ny'] - 1))
+            cell = grid['counts'][by, bx]
+            return {
+                'kind': 'bin',
+                'count': int(cell.sum()),
+                'clusters': {
+                    self._label_style(int(cid))[1]: int(n)
+                    for cid, n in zip(grid['cluster_ids'], cell) if n > 0
+                }
+            }
+        return None
+    
+    @figure_budget('cluster_profiles_chart')
     def create_cluster_profiles_chart(self):
         """
         Create radar chart showing service profiles for each cluster
         """
-        if 'Cluster' not in self.df.columns:
+        if not self.has_column('Cluster'):
             self.perform_kmeans_clustering()
         
         # mean service scores for each cluster
+        aggregates = self.compute_cluster_aggregates()
+        service_means = aggregates['service_means']
         cluster_profiles = []
-        for cluster_id in sorted(self.df['Cluster'].unique()):
-            cluster_data = self.df[self.df['Cluster'] == cluster_id]
+        for cluster_id in range(aggregates['n_clusters']):
             profile = {
                 'Cluster': f'Cluster {cluster_id}',
-                'Size': len(cluster_data),
-                'Satisfaction': (cluster_data['satisfaction'] == 'satisfied').mean() * 100
+                'Size': int(aggregates['sizes'][cluster_id]),
+                'Satisfaction': aggregates['satisfaction_rate'][cluster_id]
             }
             
             # add service scores
-            for attr in self.service_attributes:
-                profile[attr] = cluster_data[attr].mean()
+            profile.update(service_means.loc[cluster_id].to_dict())
             
             cluster_profiles.append(profile)
         
@@ -325,6 +761,7 @@ class CustomerSegmentationAnalyzer:
         
         return fig
     
+    @figure_budget('cluster_comparison_chart')
     def create_cluster_comparison_chart(self):
         """
         Create bar chart comparing clusters on key metrics
@@ -1,13 +1,18 @@
 import pandas as pd
+from modules.Profiling import profiled
+from modules.Memory import track_memory
 
-def preprocess_airline_data(df):
+@profiled('preprocess_airline_data')
+@track_memory('preprocess_airline_data')
+def preprocess_airline_data(df, copy=True):
     """
     Robust data preprocessing with error handling
+    copy=False modifies df itself instead of working on a copy
     """
     if df is None:
         return None, None
     
-    df_processed = df.copy()
+    df_processed = df.copy() if copy else df
     
     print("=== DATA PREPROCESSING ===")
     print(f"Original shape: {df_processed.shape}")
@@ -23,11 +28,15 @@ def preprocess_airline_data(df):
         
     # Remove rows with missing satisfaction data (critical for analysis)
     if 'satisfaction' in df_processed.columns:
-        before_drop = len(df_processed)
-        df_processed = df_processed.dropna(subset=['satisfaction'])
-        after_drop = len(df_processed)
-        if before_drop != after_drop:
-            print(f"Dropped {before_drop - after_drop} rows with missing satisfaction data")
+        missing = df_processed['satisfaction'].isnull().to_numpy()
+        if missing.any():
+            # dropped in place: a dropna() result is flagged as a copy of the caller's frame
+            # and every column assigned below would raise a SettingWithCopyWarning
+            if df_processed.index.is_unique:
+                df_processed.drop(index=df_processed.index[missing], inplace=True)
+            else:
+                df_processed = df_processed[~missing].copy()
+            print(f"Dropped {int(missing.sum())} rows with missing satisfaction data")
     
     # 2. Data type conversions and cleaning
     print(f"\nProcessed shape: {df_processed.shape}")
@@ -1,16 +1,39 @@
+import os
+import hashlib
 import pandas as pd
 import numpy as np
+import diskcache
 import dash
-from dash import dcc, html, Input, Output, callback
+from dash import dcc, html, Input, Output, State, callback, DiskcacheManager, ClientsideFunction
 import dash_bootstrap_components as dbc
+from flask import request, jsonify, Response
 
-from layout import create_compact_layout
+from layout import create_compact_layout, SAMPLE_SIZE_OPTIONS, DEFAULT_PC_DIMENSIONS
 from preprocess import preprocess_airline_data
-from modules.RaderChart import create_radar_chart
-from modules.Distribution import create_distribution_chart
-from modules.ParallelCategories import create_parallel_categories_chart
-from modules.ServiceFactor import create_service_factors_chart, generate_subgroup_info_header
+from modules.RaderChart import create_radar_chart, create_radar_chart_fast, create_radar_chart_sql
+from modules.ParallelCategories import create_parallel_categories_chart, parallel_categories_columns
+from modules.ServiceFactor import create_service_factors_chart, create_rf_importance_chart_from_results
+from modules.FastFigures import FAST_FIGURES
+from modules.Executor import run_builders
 from modules.clustering import CustomerSegmentationAnalyzer
+from modules.NeighborIndex import parse_k, parse_passenger_ids
+from modules.DelayScatter import DistanceDelayBinner, create_distance_delay_chart, parse_relayout_ranges
+from modules.Aggregates import build_aggregate_store, get_group_values
+from modules.Payload import configure_serialization, register_payload_logging
+from modules.Metrics import configure_metrics, render_prometheus, timed_callback, record_cache, stage
+from modules.Profiling import profiled, register_profiling
+from modules.Memory import track_memory, report_object_memory, MEMORY_TRACKING
+from modules.SqlStore import SQL_BACKEND, SQL_PATH, open_survey_store, remove_versioned_stores, versioned_path
+from modules.PolarsBackend import POLARS_BACKEND, collect_survey, to_pandas
+from modules.PolarsBackend import build_aggregate_store as build_polars_aggregate_store
+from modules.Partitions import (PartitionedData, PARTITION_FILTER, discover_partitions, parse_partition_filter,
+                                prune_partitions, read_partitions)
+from modules.Batch import (BATCH_RESULTS, load_matching_batch_results, batch_cluster_counts, batch_rf_results,
+                           cluster_profile_records)
+from modules.AggregateApi import register_aggregate_api, summary_records, sort_histogram_records, TableNotComputed
+from modules.HotReload import DashboardState, StateHolder, RELOAD_TOKEN
+from modules.WarmUp import (FigureCache, WarmUp, placeholder_figure,
+                            WARMUP_MODE, WARMUP_WORKERS, WARMUP_TOP_USED)
 
 def generate_subgroup_info_header_simple(df, group_col='Class', selected_subgroup=None):
     """
@@ -69,32 +92,48 @@ def load_and_validate_data(file_path):
         print(f"Error loading data: {e}")
         return None
 
-def create_dash_app(df, service_attributes):
+# disk-backed store for background callback jobs, their cached results and fitted models;
+# shared by every process that points at the same directory
+BACKGROUND_CACHE_DIR = os.environ.get('AIRLINE_CACHE_DIR', '.dash_cache')
+BACKGROUND_CACHE_EXPIRE = 24 * 3600
+
+# group-by options, for the columns the data has
+POTENTIAL_SUBGROUPS = [
+    ('Gender', 'Gender'),
+    ('Customer Type', 'Customer Type'),
+    ('Age Group', 'Age_Group'),
+    ('Travel Class', 'Class'),
+    ('Type of Travel', 'Type of Travel'),
+    ('Travel Experience', 'Travel_Experience')
+]
+
+def subgroup_options_for(df, partition_keys=()):
+    """
+    Group-by dropdown options: the subgroup columns df has, then the partition keys
+    """
+    options = [{'label': label, 'value': value} for label, value in POTENTIAL_SUBGROUPS if value in df.columns]
+    return options + [{'label': key.replace('_', ' ').title(), 'value': key} for key in partition_keys]
+
+def dataset_fingerprint(df):
+    """
+    Short content hash of the data, used to key cached results
+    """
+    row_hashes = pd.util.hash_pandas_object(df, index=True).values
+    return hashlib.sha1(row_hashes.tobytes()).hexdigest()[:16]
+
+def create_dash_app(df, service_attributes, precompute=False, polars_frame=None, partitions=None, source=None):
     """
     Create comprehensive Dash application with error handling
+    precompute: fit the clustering models for every sample size up front instead of on first use
+    polars_frame: the same data as a Polars frame, to compute the aggregate store with Polars
+    partitions: (partitions, index ranges) from modules.Partitions.read_partitions when df holds
+    a partitioned dataset; the dataset selector then scopes the charts to some of them
+    source: the file or partition directory df was loaded from; when given, the data is
+    reloaded from it and swapped in while the app keeps serving, see modules/HotReload.py
     """
-    app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
-    
-    # initialize clustering analyzer
-    global clustering_analyzer
-    clustering_analyzer = CustomerSegmentationAnalyzer(df, service_attributes)
-    clustering_analyzer.perform_kmeans_clustering()
-    clustering_analyzer.perform_pca_analysis()
-    
-    # dropdown options
-    subgroup_options = []
-    potential_subgroups = [
-        ('Gender', 'Gender'),
-        ('Customer Type', 'Customer Type'),
-        ('Age Group', 'Age_Group'),
-        ('Travel Class', 'Class'),
-        ('Type of Travel', 'Type of Travel'),
-        ('Travel Experience', 'Travel_Experience')
-    ]
-    
-    for label, value in potential_subgroups:
-        if value in df.columns:
-            subgroup_options.append({'label': label, 'value': value})
+    background_cache = diskcache.Cache(BACKGROUND_CACHE_DIR)
+    # latency and cache metrics from every process go to the shared cache, see /metrics
+    configure_metrics(background_cache)
     
     # parallel categories dimension options
     pc_dimension_options = [
@@ -108,33 +147,494 @@ def create_dash_app(df, service_attributes):
         {'label': 'Arrival Delay Category', 'value': 'Arrival Delay Category'}
     ]
     
-    app.layout = create_compact_layout(subgroup_options, None, pc_dimension_options)
+    def build_state(df, service_attributes, polars_frame=None, partitions=None, sql_path=SQL_PATH, fitted=None):
+        """
+        Frame, fitted models, aggregates and caches for one version of the data
+        fitted: k-means results of the full frame from another process (fitted_results), used
+        instead of fitting again
+        """
+        data_version = dataset_fingerprint(df)
+        # results of a batch.py run on this data: its k-means k skips the k sweeps and its
+        # Random Forest results fill the Service Factor Rankings cache
+        batch_tables = load_matching_batch_results(BATCH_RESULTS, data_version) if BATCH_RESULTS else None
+        cluster_k = batch_cluster_counts(batch_tables, len(df)) if batch_tables else {}
+        
+        clustering_analyzer = CustomerSegmentationAnalyzer(df, service_attributes)
+        if fitted is not None:
+            clustering_analyzer.attach_fitted_results(fitted)
+        else:
+            clustering_analyzer.perform_kmeans_clustering(n_clusters=cluster_k.get(-1))
+        clustering_analyzer.perform_pca_analysis()
+        clustering_analyzer.build_neighbor_index()
+        
+        # partitions of a partitioned dataset; their keys (airline, region, ...) are columns too
+        partitioned = None
+        if partitions is not None:
+            partitioned = PartitionedData(df, *partitions, cache=background_cache)
+        subgroup_options = subgroup_options_for(df, partitioned.keys if partitioned else ())
+        
+        # optional embedded database holding the frame: aggregates, subgroup filters and the
+        # chart columns are then queried from it instead of computed on the frame
+        survey_store = None
+        if SQL_BACKEND != 'off':
+            survey_store = open_survey_store(df, data_version, group_cols=[option['value'] for option in subgroup_options],
+                                             path=sql_path)
+        
+        state = DashboardState(
+            df=df,
+            service_attributes=service_attributes,
+            data_version=data_version,
+            clustering_analyzer=clustering_analyzer,
+            # clustering analyzers per sample size, reused across chart types and hover lookups;
+            # -1 is the full dataset
+            clustering_analyzers={-1: clustering_analyzer},
+            cluster_k=cluster_k,
+            batch_tables=batch_tables,
+            subgroup_options=subgroup_options,
+            partitioned=partitioned,
+            survey_store=survey_store,
+            # figures and models by callback inputs, shared through the disk cache so the
+            # startup warm-up, background jobs and every worker see the same entries
+            figure_cache=FigureCache(background_cache, data_version, expire=BACKGROUND_CACHE_EXPIRE),
+            # Flight Distance vs Delay, re-binned over the visible range on every zoom
+            delay_binner=DistanceDelayBinner(df)
+        )
+        
+        if batch_tables:
+            for (group_col, sample_size, value), rf in batch_rf_results(batch_tables, service_attributes).items():
+                state.figure_cache.set('service_factors', (group_col, sample_size, value, ()),
+                                       create_rf_importance_chart_from_results(*rf))
+        
+        if partitioned is not None:
+            state.aggregate_data = build_scope_aggregates(state, ())
+        elif polars_frame is not None and survey_store is None:
+            state.aggregate_data = build_polars_aggregate_store(
+                polars_frame.lazy(),
+                [option['value'] for option in subgroup_options],
+                [option['value'] for option in SAMPLE_SIZE_OPTIONS]
+            )
+        else:
+            state.aggregate_data = build_aggregate_store(
+                df,
+                [option['value'] for option in subgroup_options],
+                [option['value'] for option in SAMPLE_SIZE_OPTIONS],
+                store=survey_store
+            )
+        
+        state.warmup = WarmUp(state.figure_cache, warmup_tasks(state),
+                              lambda name, inputs: warm_combination(state, name, inputs), workers=WARMUP_WORKERS)
+        return state
+    
+    def build_scope_aggregates(state, scope):
+        # the all-rows entry is merged from per-partition aggregates kept in the cache, so
+        # only partitions whose files changed are aggregated again
+        group_cols = [option['value'] for option in state.subgroup_options]
+        return build_aggregate_store(
+            state.partitioned.frame(scope),
+            group_cols,
+            [option['value'] for option in SAMPLE_SIZE_OPTIONS],
+            full_aggregates=state.partitioned.summary_aggregates(group_cols, scope)
+        )
+    
+    def normalize_scope(state, selected):
+        return () if state.partitioned is None else state.partitioned.normalize_scope(selected)
+    
+    @stage('sample')
+    def get_sampled_df(state, sample_size, scope=()):
+        # scope: partition ids to sample from, () for every loaded row
+        frame = state.df if not scope else state.partitioned.frame(scope)
+        if sample_size > 0 and len(frame) > sample_size:
+            return frame.sample(n=sample_size, random_state=42)
+        # every consumer only reads the frame
+        return frame
+    
+    def analyzer_key(state, sample_size):
+        return sample_size if sample_size > 0 and len(state.df) > sample_size else -1
+    
+    def get_clustering_analyzer(state, sample_size, label_col='Cluster'):
+        """
+        The process's analyzer for the sample; when it has no label_col yet, labels fitted by a
+        background job or another worker are taken from the shared cache once
+        """
+        key = analyzer_key(state, sample_size)
+        analyzer = state.clustering_analyzers.get(key)
+        if analyzer is None:
+            analyzer = CustomerSegmentationAnalyzer(get_sampled_df(state, key), state.service_attributes)
+            analyzer.perform_pca_analysis()
+            state.clustering_analyzers[key] = analyzer
+        if not analyzer.has_column(label_col):
+            fitted = background_cache.get(('clustering-fit', state.data_version, key))
+            if fitted is not None:
+                analyzer.attach_fitted_results(fitted)
+        record_cache('clustering_analyzer', analyzer.has_column(label_col))
+        return analyzer
+    
+    def store_clustering_fit(state, sample_size, analyzer):
+        # labels and fit statistics only; every process keeps its own frame, features and PCA
+        background_cache.set(('clustering-fit', state.data_version, analyzer_key(state, sample_size)),
+                             analyzer.fitted_results(), expire=BACKGROUND_CACHE_EXPIRE)
+    
+    def build_charts(state, dataset_subgroup, sample_size, selected_dimensions, scope=()):
+        if state.survey_store is not None and FAST_FIGURES and not scope:
+            # radar means are computed in SQL; only the parallel-categories columns are loaded
+            radar_job = (create_radar_chart_sql,
+                         (state.survey_store, state.service_attributes, dataset_subgroup, sample_size), {})
+            sampled_df = state.survey_store.fetch(parallel_categories_columns(selected_dimensions), sample_size)
+        else:
+            sampled_df = get_sampled_df(state, sample_size, scope)
+            build_radar = create_radar_chart_fast if FAST_FIGURES else create_radar_chart
+            radar_job = (build_radar, (sampled_df, state.service_attributes, dataset_subgroup), {})
+        
+        # both builders only read the sample, so AIRLINE_BUILDER_POOL may run them side by side
+        figures, _ = run_builders({
+            'radar_chart': radar_job,
+            'parallel_categories_chart': (create_parallel_categories_chart,
+                                          (sampled_df, list(selected_dimensions), sample_size), {})
+        })
+        return figures['radar_chart'], figures['parallel_categories_chart']
+    
+    def build_service_factors(state, dataset_subgroup, sample_size, selected_specific_subgroup, scope=()):
+        survey_store = state.survey_store
+        if survey_store is not None and not scope and dataset_subgroup in survey_store.columns:
+            # the subgroup filter runs in SQL, so only the selected subgroup's rows are loaded
+            groups = survey_store.group_values(dataset_subgroup, sample_size)
+            if selected_specific_subgroup not in groups:
+                selected_specific_subgroup = groups[0] if groups else None
+            sampled_df = survey_store.fetch(sample_size=sample_size,
+                                            filters={dataset_subgroup: selected_specific_subgroup})
+        else:
+            sampled_df = get_sampled_df(state, sample_size, scope)
+        result = create_service_factors_chart(
+            sampled_df,
+            state.service_attributes,
+            group_col=dataset_subgroup,
+            selected_subgroup=selected_specific_subgroup,
+            chart_type='rf_importance'
+        )
+        if isinstance(result, tuple):
+            return result
+        return result, None
+    
+    # Startup warm-up: default combinations (every group-by with 'all'), then the most
+    # used ones from earlier runs; cheap charts first, k-means sweeps last
+    def warm_combination(state, name, inputs):
+        if name == 'clustering':
+            analyzer = get_clustering_analyzer(state, inputs[0])
+            if not analyzer.has_column('Cluster'):
+                analyzer.perform_kmeans_clustering(n_clusters=state.cluster_k.get(analyzer_key(state, inputs[0])))
+                store_clustering_fit(state, inputs[0], analyzer)
+            return
+        if state.figure_cache.get(name, inputs, track=False) is None:
+            builder = build_charts if name == 'charts' else build_service_factors
+            state.figure_cache.set(name, inputs, builder(state, *inputs))
+    
+    def warmup_tasks(state):
+        tasks = []
+        if WARMUP_MODE != 'off':
+            group_cols = [option['value'] for option in state.subgroup_options]
+            warm_groups = group_cols if WARMUP_MODE == 'all' else group_cols[:1]
+            sample_sizes = [option['value'] for option in SAMPLE_SIZE_OPTIONS]
+            tasks += [('charts', (group_col, sample_size, tuple(DEFAULT_PC_DIMENSIONS), ()))
+                      for sample_size in sample_sizes for group_col in warm_groups]
+            tasks += [('service_factors', (group_col, sample_size, value, ()))
+                      for sample_size in sample_sizes for group_col in warm_groups
+                      for value in get_group_values(state.df, group_col)]
+            tasks += [('clustering', (sample_size,)) for sample_size in sample_sizes]
+            for name in ('charts', 'service_factors'):
+                tasks += [(name, inputs) for inputs in state.figure_cache.most_used(name, WARMUP_TOP_USED)]
+        return tasks
+    
+    def reload_state():
+        loaded = load_dataset(source)
+        if loaded is None:
+            raise RuntimeError(f"could not load {source}")
+        # reloaded versions get their own SQL store file: the current one is still being read
+        state = build_state(*loaded, sql_path=versioned_path(SQL_PATH, dataset_fingerprint(loaded[0])))
+        # the k-means fit is handed to the processes adopting this version
+        store_clustering_fit(state, -1, state.clustering_analyzer)
+        # warm the new version before it is published, so the swap shows no placeholders
+        if state.warmup.tasks:
+            state.warmup.run()
+        return state
+    
+    def adopt_state(published):
+        # another process rebuilt this version: load the same frame, but open its SQL store
+        # and take its k-means fit from the shared cache; its warm-up already filled the
+        # figure cache
+        loaded = load_dataset(source)
+        if loaded is None:
+            raise RuntimeError(f"could not load {source}")
+        data_version = published['data_version']
+        if dataset_fingerprint(loaded[0]) != data_version:
+            raise RuntimeError(f"{source} changed again since version {data_version} was published")
+        return build_state(*loaded, sql_path=versioned_path(SQL_PATH, data_version),
+                           fitted=background_cache.get(('clustering-fit', data_version, -1)))
+    
+    def remove_unused_stores(versions_in_use):
+        # SQL store files of reloaded versions no process serves any more; the configured
+        # path stays for the next start
+        if SQL_BACKEND != 'off':
+            remove_versioned_stores(SQL_PATH, versions_in_use)
+    
+    # every callback reads the data through one state, replaced as a whole on reload; server
+    # processes share the rebuild through the cache: one rebuilds, the others adopt its version
+    hot_reload = StateHolder(build_state(df, service_attributes, polars_frame, partitions),
+                             rebuild=reload_state if source else None, source=source, cache=background_cache,
+                             adopt=adopt_state, cleanup=remove_unused_stores)
+    
+    # background callbacks run in their own process; completed results are cached
+    # by callback inputs plus the dataset version
+    background_manager = DiskcacheManager(
+        background_cache, cache_by=[lambda: hot_reload.current().data_version], expire=BACKGROUND_CACHE_EXPIRE
+    )
+    # orjson + gzip when available; figures themselves are compacted by their builders
+    compress = configure_serialization()
+    app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP],
+                    background_callback_manager=background_manager, compress=compress)
+    register_payload_logging(app.server)
+    # opt-in profiles of callbacks and preprocessing, listed at /profiles
+    register_profiling(app.server)
+    # started by the caller once the server process is set up, see main() and wsgi.py
+    app.hot_reload = hot_reload
+    app.warmup = hot_reload.current().warmup
+    
+    @app.server.route('/metrics')
+    def metrics():
+        return Response(render_prometheus(), mimetype='text/plain; version=0.0.4')
+    
+    # reload the data without a restart; GET reports the current version and the last reload
+    @app.server.route('/api/reload', methods=['GET', 'POST'])
+    def reload_data():
+        if request.method == 'GET':
+            return jsonify(hot_reload.status())
+        if not RELOAD_TOKEN:
+            return jsonify({'error': 'Reloading over the API is disabled; set AIRLINE_RELOAD_TOKEN'}), 403
+        if request.headers.get('X-Reload-Token') != RELOAD_TOKEN:
+            return jsonify({'error': 'Invalid reload token'}), 403
+        if hot_reload.rebuild is None:
+            return jsonify({'error': 'Data was not loaded from a reloadable source'}), 400
+        started = hot_reload.reload('api')
+        return jsonify(dict(hot_reload.status(), started=started)), 202 if started else 409
+    
+    # passenger look-alike queries
+    @app.server.route('/api/passengers/<int:passenger_id>/similar')
+    def similar_passengers(passenger_id):
+        try:
+            k = parse_k(request.args.get('k'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        try:
+            result = hot_reload.current().clustering_analyzer.neighbor_index.query(passenger_id, k=k)
+        except KeyError:
+            return jsonify({'error': f'Unknown passenger id {passenger_id}'}), 404
+        return jsonify(result)
+    
+    @app.server.route('/api/passengers/similar', methods=['POST'])
+    def similar_passengers_batch():
+        payload = request.get_json(silent=True)
+        try:
+            passenger_ids = parse_passenger_ids(payload)
+            k = parse_k(payload.get('k'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        try:
+            results = hot_reload.current().clustering_analyzer.neighbor_index.query_batch(passenger_ids, k=k)
+        except KeyError as e:
+            return jsonify({'error': str(e)}), 404
+        return jsonify(results)
+    
+    # read-only aggregates for other services, see modules/AggregateApi.py
+    def requested_group_cols(state, params):
+        group_cols = [option['value'] for option in state.subgroup_options]
+        if 'group_col' not in params:
+            return group_cols
+        if params['group_col'] not in group_cols:
+            raise LookupError(f"Unknown subgroup column {params['group_col']}")
+        return [params['group_col']]
+    
+    def requested_sample_size(params):
+        sample_sizes = [option['value'] for option in SAMPLE_SIZE_OPTIONS]
+        try:
+            sample_size = int(params.get('sample_size', -1))
+        except ValueError:
+            sample_size = None
+        if sample_size not in sample_sizes:
+            raise ValueError(f"sample_size must be one of {sample_sizes}")
+        return sample_size
+    
+    def subgroup_table(state, params):
+        return summary_records(state.aggregate_data, requested_group_cols(state, params), requested_sample_size(params))
+    
+    def histogram_table(state, params):
+        group_cols = requested_group_cols(state, params)
+        sample_size = requested_sample_size(params)
+        attributes = state.service_attributes
+        if 'attribute' in params:
+            if params['attribute'] not in attributes:
+                raise LookupError(f"Unknown service attribute {params['attribute']}")
+            attributes = [params['attribute']]
+        records = []
+        for group_col in group_cols:
+            # counted by a batch run on this data; never recounted from raw rows on request
+            batch_rows = [row for row in (state.batch_tables or {}).get('rating_distributions', [])
+                          if row['group_col'] == group_col and row['sample_size'] == sample_size]
+            if not batch_rows:
+                raise TableNotComputed(f"Rating histograms by {group_col} for sample_size {sample_size} come from "
+                                       "batch results; run batch.py on this data and set AIRLINE_BATCH_RESULTS")
+            records += [row for row in batch_rows if row['attribute'] in attributes]
+        return sort_histogram_records(records, group_cols, {group_col: get_group_values(state.df, group_col)
+                                                            for group_col in group_cols}, attributes)
+    
+    def cluster_table(state, params):
+        sample_size = requested_sample_size(params)
+        key = analyzer_key(state, sample_size)
+        if state.batch_tables:
+            rows = sorted((dict(row, sample_size=sample_size) for row in state.batch_tables['cluster_profiles']
+                           if analyzer_key(state, row['sample_size']) == key), key=lambda row: row['cluster'])
+            if rows:
+                return rows
+        # never fitted on request: the k sweep belongs to the warm-up and the clustering chart
+        analyzer = get_clustering_analyzer(state, sample_size)
+        if not analyzer.has_column('Cluster'):
+            return None
+        return sorted(cluster_profile_records(analyzer, sample_size), key=lambda row: row['cluster'])
+    
+    register_aggregate_api(
+        app.server,
+        hot_reload.current,
+        {'subgroups': subgroup_table, 'histograms': histogram_table, 'clusters': cluster_table},
+        lambda state: {
+            'group_cols': [option['value'] for option in state.subgroup_options],
+            'sample_sizes': [option['value'] for option in SAMPLE_SIZE_OPTIONS],
+            'service_attributes': list(state.service_attributes)
+        }
+    )
+    
+    # shown by a chart whose page is on a data version this process no longer (or not yet)
+    # holds; the reload poll moves the page to a version every process holds
+    stale_version_text = "Loading the current data..."
     
     # Add clustering chart
     @app.callback(
         Output('clustering-chart', 'figure'),
         [Input('clustering-chart-selector', 'value'),
-         Input('sample-dropdown', 'value')]
+         Input('sample-dropdown', 'value'),
+         Input('warmup-status', 'data'),
+         Input('data-version', 'data')],
+        background=True,
+        progress=[Output('clustering-progress', 'value'),
+                  Output('clustering-progress', 'max')],
+        running=[(Output('clustering-progress', 'style'),
+                  {'width': '100%', 'visibility': 'visible'},
+                  {'width': '100%', 'visibility': 'hidden'})],
+        interval=500
     )
-    def update_clustering_analysis(chart_type, sample_size):
-        if sample_size > 0 and len(df) > sample_size:
-            sampled_df = df.sample(n=sample_size, random_state=42)
-            temp_analyzer = CustomerSegmentationAnalyzer(sampled_df, service_attributes)
-            temp_analyzer.perform_kmeans_clustering()
-            temp_analyzer.perform_pca_analysis()
-        else:
-            temp_analyzer = clustering_analyzer
+    @timed_callback('update_clustering_analysis')
+    @profiled('update_clustering_analysis')
+    @track_memory('update_clustering_analysis')
+    def update_clustering_analysis(set_progress, chart_type, sample_size, warmup_status, data_version):
+        state = hot_reload.for_version(data_version)
+        # k sweep (7 fits), final fit, chart
+        total_steps = 9
+        set_progress(('0', str(total_steps)))
+        if state is None:
+            return placeholder_figure(stale_version_text)
+        if state.warmup.is_pending('clustering', (sample_size,)):
+            return placeholder_figure("Fitting customer segments...")
+        temp_analyzer = get_clustering_analyzer(
+            state, sample_size, label_col='DBSCAN_Cluster' if chart_type == 'dbscan_scatter' else 'Cluster')
+        
+        # k-means runs lazily, so the density mode does not pay for the k sweep
+        if chart_type != 'dbscan_scatter' and not temp_analyzer.has_column('Cluster'):
+            temp_analyzer.perform_kmeans_clustering(
+                n_clusters=state.cluster_k.get(analyzer_key(state, sample_size)),
+                progress_callback=lambda done, total: set_progress((str(done), str(total_steps)))
+            )
+        set_progress((str(total_steps - 1), str(total_steps)))
+        
         # create chart based on selection
         chart_fig = temp_analyzer.create_cluster_visualization(chart_type)
+        store_clustering_fit(state, sample_size, temp_analyzer)
         return chart_fig
     
+    @app.callback(
+        Output('clustering-hover-detail', 'children'),
+        [Input('clustering-chart', 'hoverData')],
+        [State('clustering-chart-selector', 'value'),
+         State('sample-dropdown', 'value'),
+         State('data-version', 'data')]
+    )
+    @timed_callback('update_clustering_hover_detail')
+    @profiled('update_clustering_hover_detail')
+    @track_memory('update_clustering_hover_detail')
+    def update_clustering_hover_detail(hover_data, chart_type, sample_size, data_version):
+        state = hot_reload.for_version(data_version)
+        if (state is None or not hover_data or not hover_data.get('points')
+                or chart_type not in ('pca_scatter', 'dbscan_scatter')):
+            return ""
+        label_col = 'DBSCAN_Cluster' if chart_type == 'dbscan_scatter' else 'Cluster'
+        analyzer = get_clustering_analyzer(state, sample_size, label_col=label_col)
+        detail = analyzer.describe_hover_point(hover_data['points'][0], label_col)
+        if detail is None:
+            return ""
+        if detail['kind'] == 'passenger':
+            return (f"{detail['name']} | Passenger {detail['passenger_id']} | "
+                    f"Satisfaction: {detail['satisfaction']} | Service Score: {detail['service_score']:.2f}")
+        breakdown = ", ".join(f"{name}: {count:,}" for name, count in detail['clusters'].items())
+        return f"{detail['count']:,} passengers in this area ({breakdown})" if detail['count'] else ""
+    
+    if MEMORY_TRACKING:
+        # sizes of the long-lived objects; analyzer frames shared with df count nothing
+        def memory_objects(state):
+            objects = {'passenger_frame': state.df, 'delay_binner': state.delay_binner}
+            objects.update({f'clustering_analyzer[{key}]': analyzer
+                            for key, analyzer in state.clustering_analyzers.items()})
+            return objects
+        
+        @app.server.route('/memory')
+        def memory():
+            state = hot_reload.current()
+            return jsonify(report_object_memory(memory_objects(state), source=state.df))
+        
+        report_object_memory(memory_objects(hot_reload.current()), source=df)
+    
+    @app.callback(
+        [Output('delay-scatter-chart', 'figure'),
+         Output('delay-scatter-view', 'data')],
+        [Input('delay-scatter-column', 'value'),
+         Input('delay-scatter-chart', 'relayoutData'),
+         Input('data-version', 'data')],
+        [State('delay-scatter-view', 'data')]
+    )
+    @timed_callback('update_delay_scatter')
+    @profiled('update_delay_scatter')
+    @track_memory('update_delay_scatter')
+    def update_delay_scatter(delay_col, relayout_data, data_version, view):
+        state = hot_reload.for_version(data_version)
+        if state is None:
+            return placeholder_figure(stale_version_text), dash.no_update
+        if view is None or view.get('delay_col') != delay_col:
+            x_range, y_range = None, None
+        else:
+            x_range, y_range = parse_relayout_ranges(relayout_data, (view['x_range'], view['y_range']))
+        fig = create_distance_delay_chart(state.delay_binner, delay_col, x_range, y_range)
+        return fig, {'delay_col': delay_col, 'x_range': x_range, 'y_range': y_range}
+    
     # Callback to populate service factors subgroup dropdown based on Dataset Overview group by
     @app.callback(
         [Output('service-factors-subgroup-dropdown', 'options'),
          Output('service-factors-subgroup-dropdown', 'value')],
-        [Input('subgroup-dropdown-distribution', 'value')]
+        [Input('subgroup-dropdown-distribution', 'value'),
+         Input('data-version', 'data')]
     )
-    def update_service_factors_subgroup_options(selected_group_col):
+    @timed_callback('update_service_factors_subgroup_options')
+    @profiled('update_service_factors_subgroup_options')
+    @track_memory('update_service_factors_subgroup_options')
+    def update_service_factors_subgroup_options(selected_group_col, data_version):
+        state = hot_reload.for_version(data_version)
+        if state is None:
+            return dash.no_update, dash.no_update
+        df = state.df
         if selected_group_col and selected_group_col in df.columns:
             # Preserve categorical order if available
             if pd.api.types.is_categorical_dtype(df[selected_group_col]):
@@ -146,105 +646,265 @@ def create_dash_app(df, service_attributes):
             return options, default_value
         else:
             return [], None
-
-    # Main callback for all charts
+    
+    # Summary cards, distribution donut and subgroup header are plain arithmetic on the
+    # aggregate store, so they render in the browser without a server round trip
+    app.clientside_callback(
+        ClientsideFunction(namespace='airline', function_name='renderSummary'),
+        Output('summary-stats-container', 'children'),
+        [Input('aggregate-store', 'data'),
+         Input('sample-dropdown', 'value')]
+    )
+    
+    app.clientside_callback(
+        ClientsideFunction(namespace='airline', function_name='renderDistribution'),
+        Output('distribution-chart', 'figure'),
+        [Input('aggregate-store', 'data'),
+         Input('sample-dropdown', 'value'),
+         Input('subgroup-dropdown-distribution', 'value')]
+    )
+    
+    app.clientside_callback(
+        ClientsideFunction(namespace='airline', function_name='renderSubgroupHeader'),
+        Output('subgroup-info-header', 'children'),
+        [Input('aggregate-store', 'data'),
+         Input('sample-dropdown', 'value'),
+         Input('subgroup-dropdown-distribution', 'value'),
+         Input('service-factors-subgroup-dropdown', 'options'),
+         Input('service-factors-subgroup-dropdown', 'value'),
+         Input('rf-accuracy-store', 'data')]
+    )
+    
+    # built per page load, so pages opened after the warm-up skip the status polling and
+    # pages opened after a reload get the new version once every server process holds it
+    def serve_layout():
+        state = hot_reload.page_state()
+        return create_compact_layout(state.subgroup_options, None, pc_dimension_options,
+                                     aggregate_data=state.aggregate_data,
+                                     warming_up=not state.warmup.is_ready(),
+                                     dataset_options=state.partitioned.options() if state.partitioned else None,
+                                     data_version=state.data_version,
+                                     reload_poll=hot_reload.rebuild is not None)
+    app.layout = serve_layout
+    
+    # aggregate store of the selected partitions, and of the new version after a reload: the
+    # data-version store then changes too and every server-side chart redraws from that version.
+    # A page only moves to a version every server process holds, so its callbacks never reach
+    # one that has not loaded it yet
+    @app.callback(
+        [Output('aggregate-store', 'data'),
+         Output('data-version', 'data')],
+        [Input('dataset-dropdown', 'value'),
+         Input('reload-interval', 'n_intervals')],
+        [State('data-version', 'data')],
+        prevent_initial_call=True
+    )
+    @timed_callback('update_aggregate_store')
+    @profiled('update_aggregate_store')
+    @track_memory('update_aggregate_store')
+    def update_aggregate_store(selected_partitions, n_intervals, data_version):
+        newest = hot_reload.page_state()
+        state = hot_reload.for_version(data_version)
+        if state is not newest and hot_reload.served_everywhere(newest.data_version):
+            state = newest
+        elif dash.ctx.triggered_id == 'reload-interval' or state is None:
+            return dash.no_update, dash.no_update
+        scope = normalize_scope(state, selected_partitions)
+        aggregate_data = build_scope_aggregates(state, scope) if scope else state.aggregate_data
+        # an unchanged version is not sent, so the charts only redraw for the selection itself
+        return aggregate_data, state.data_version if data_version != state.data_version else dash.no_update
+    
+    @app.callback(
+        [Output('warmup-status', 'data'),
+         Output('warmup-interval', 'disabled')],
+        [Input('warmup-interval', 'n_intervals')],
+        [State('warmup-status', 'data')]
+    )
+    @timed_callback('update_warmup_status')
+    @profiled('update_warmup_status')
+    @track_memory('update_warmup_status')
+    def update_warmup_status(n_intervals, status):
+        ready = hot_reload.current().warmup.is_ready()
+        if status and status.get('ready') == ready:
+            return dash.no_update, dash.no_update
+        return {'ready': ready}, ready
+    
+    # Main callback for the charts that need the passenger rows
     @app.callback(
         [Output('radar-chart', 'figure'),
-         Output('parallel-coords', 'figure'),
-         Output('summary-stats-container', 'children'),
-         Output('distribution-chart', 'figure'),
-         Output('service-factors-chart', 'figure'),
-         Output('subgroup-info-header', 'children')],
+         Output('parallel-coords', 'figure')],
         [Input('subgroup-dropdown-distribution', 'value'),
          Input('sample-dropdown', 'value'),
          Input('pc-dimensions-dropdown', 'value'),
+         Input('dataset-dropdown', 'value'),
+         Input('warmup-status', 'data'),
+         Input('data-version', 'data')]
+    )
+    @timed_callback('update_charts')
+    @profiled('update_charts')
+    @track_memory('update_charts')
+    def update_charts(dataset_subgroup, sample_size, selected_dimensions, selected_partitions, warmup_status,
+                      data_version):
+        state = hot_reload.for_version(data_version)
+        if state is None:
+            return placeholder_figure(stale_version_text), placeholder_figure(stale_version_text)
+        inputs = (dataset_subgroup, sample_size, tuple(selected_dimensions or []),
+                  normalize_scope(state, selected_partitions))
+        state.figure_cache.record_use('charts', inputs)
+        
+        figures = state.figure_cache.get('charts', inputs)
+        if figures is None:
+            if state.warmup.is_pending('charts', inputs):
+                return placeholder_figure(), placeholder_figure()
+            figures = build_charts(state, *inputs)
+            state.figure_cache.set('charts', inputs, figures)
+        return figures
+    
+    # Service Factor Rankings: trains a Random Forest, so it runs as a background job
+    @app.callback(
+        [Output('service-factors-chart', 'figure'),
+         Output('rf-accuracy-store', 'data')],
+        [Input('subgroup-dropdown-distribution', 'value'),
+         Input('sample-dropdown', 'value'),
          Input('service-factors-subgroup-dropdown', 'options'),
-         Input('service-factors-subgroup-dropdown', 'value')]
+         Input('service-factors-subgroup-dropdown', 'value'),
+         Input('dataset-dropdown', 'value'),
+         Input('warmup-status', 'data'),
+         Input('data-version', 'data')],
+        background=True,
+        progress=[Output('service-factors-progress', 'value'),
+                  Output('service-factors-progress', 'max')],
+        running=[(Output('service-factors-progress', 'style'),
+                  {'width': '100%', 'visibility': 'visible'},
+                  {'width': '100%', 'visibility': 'hidden'})],
+        interval=500
     )
-    def update_charts(dataset_subgroup, sample_size, selected_dimensions, subgroup_options, selected_specific_subgroup):
-        if sample_size > 0 and len(df) > sample_size:
-            sampled_df = df.sample(n=sample_size, random_state=42)
-        else:
-            sampled_df = df.copy()
-
+    @timed_callback('update_service_factors')
+    @profiled('update_service_factors')
+    @track_memory('update_service_factors')
+    def update_service_factors(set_progress, dataset_subgroup, sample_size, subgroup_options,
+                               selected_specific_subgroup, selected_partitions, warmup_status, data_version):
+        state = hot_reload.for_version(data_version)
+        set_progress(('0', '3'))
+        if state is None:
+            return placeholder_figure(stale_version_text), dash.no_update
+        
         if (not selected_specific_subgroup) and subgroup_options:
             selected_specific_subgroup = subgroup_options[0]['value']
-
-        distribution_fig = create_distribution_chart(sampled_df, group_col=dataset_subgroup)
-        radar_fig = create_radar_chart(sampled_df, service_attributes, dataset_subgroup)
-        parallel_fig = create_parallel_categories_chart(sampled_df, selected_dimensions, sample_size)
-        
-        total_passengers = len(sampled_df)
-        summary_items = html.Div([
-            html.Div([
-                html.H4(f"{total_passengers:,}", style={'color': '#d32f2f', 'margin': '0', 'fontSize': '23px'}),
-                html.P("Total Passengers", style={'color': '#666', 'margin': '5px 0', 'fontSize': '23px'})
-            ], style={'textAlign': 'center', 'padding': '10px', 'width': '33.33%'}),
-            html.Div([
-                html.H4(f"{(sampled_df['satisfaction'] == 'satisfied').mean() * 100:.1f}%", 
-                       style={'color': '#4caf50', 'margin': '0', 'fontSize': '23px'}),
-                html.P("Satisfaction Rate", style={'color': '#666', 'margin': '5px 0', 'fontSize': '23px'})
-            ], style={'textAlign': 'center', 'padding': '10px', 'width': '33.33%'}),
-            html.Div([
-                html.H4(f"{sampled_df['Service_Quality_Score'].mean():.2f}/5.0", 
-                       style={'color': '#2196f3', 'margin': '0', 'fontSize': '23px'}),
-                html.P("Avg Service Score", style={'color': '#666', 'margin': '5px 0', 'fontSize': '23px'})
-            ], style={'textAlign': 'center', 'padding': '10px', 'width': '33.33%'})
-        ], style={'display': 'flex', 'justifyContent': 'space-between', 'minHeight': '80px', 'marginBottom': '6px'})
+        inputs = (dataset_subgroup, sample_size, selected_specific_subgroup, normalize_scope(state, selected_partitions))
+        state.figure_cache.record_use('service_factors', inputs)
+        set_progress(('1', '3'))
         
         # Service Factor Rankings
-        service_factors_fig = None
-        accuracy = None
-        result = create_service_factors_chart(
-            sampled_df, 
-            service_attributes, 
-            group_col=dataset_subgroup,
-            selected_subgroup=selected_specific_subgroup,
-            chart_type='rf_importance'
-        )
-        if isinstance(result, tuple):
-            service_factors_fig, accuracy = result
-        else:
-            service_factors_fig = result
-            accuracy = None
-        subgroup_info = generate_subgroup_info_header(
-            sampled_df, 
-            group_col=dataset_subgroup,
-            selected_subgroup=selected_specific_subgroup,
-            accuracy=accuracy
-        )
-        return (radar_fig, parallel_fig, summary_items, distribution_fig, 
-                service_factors_fig, subgroup_info)
+        result = state.figure_cache.get('service_factors', inputs)
+        if result is None:
+            if state.warmup.is_pending('service_factors', inputs):
+                result = (placeholder_figure("Training Random Forest..."), None)
+            else:
+                result = build_service_factors(state, *inputs)
+                state.figure_cache.set('service_factors', inputs, result)
+        service_factors_fig, accuracy = result
+        set_progress(('2', '3'))
+        
+        # the header itself is rendered clientside; only the accuracy comes from here
+        accuracy_info = {
+            'group_col': dataset_subgroup,
+            'subgroup': selected_specific_subgroup,
+            'sample_size': sample_size,
+            'accuracy': None if accuracy is None else float(accuracy)
+        }
+        return service_factors_fig, accuracy_info
+    
+    if precompute:
+        # fit everything the callbacks would otherwise build lazily
+        state = hot_reload.current()
+        for option in SAMPLE_SIZE_OPTIONS:
+            get_clustering_analyzer(state, option['value']).compute_cluster_aggregates()
+        for delay_col in state.delay_binner.delays:
+            state.delay_binner.default_ranges(delay_col)
     
     return app
 
 # ===== MAIN EXECUTION =====
-def main():
+DEFAULT_DATA_PATH = "dataset/data2.csv"
+
+def load_dataset(file_path):
     """
-    Main function to run the application
+    Load and preprocess a survey file or the root of a partitioned dataset (key=value directories)
+    Returns (frame, service attributes, Polars frame or None, partitions or None), None on failure
     """
-    print("Starting Airline Satisfaction Analysis Dashboard...")
+    partitions = discover_partitions(file_path) if os.path.isdir(file_path) else []
+    if partitions:
+        # partitioned dataset: AIRLINE_PARTITIONS prunes partitions before anything is read
+        partitions = prune_partitions(partitions, parse_partition_filter(PARTITION_FILTER))
+        if not partitions:
+            print(f"No partitions under {file_path} match AIRLINE_PARTITIONS={PARTITION_FILTER}")
+            return None
+        df, ranges = read_partitions(partitions)
+        print(f"Loaded {len(partitions)} partitions. Shape: {df.shape}")
+        df_processed, service_attributes = preprocess_airline_data(df, copy=False)
+        if df_processed is None:
+            print("Failed to preprocess data.")
+            return None
+        return df_processed, service_attributes, None, (partitions, ranges)
     
-    # Load data
-    file_path = "dataset/data2.csv"
+    if POLARS_BACKEND:
+        # Polars loads and preprocesses (multi-threaded) and computes the aggregate store;
+        # the charts get the result as a pandas frame
+        try:
+            frame, service_attributes = collect_survey(file_path)
+        except Exception as e:
+            print(f"Error loading data with Polars: {e}")
+            return None
+        df_processed = to_pandas(frame)
+        print(f"Data loaded and preprocessed with Polars. Shape: {df_processed.shape}")
+        return df_processed, service_attributes, frame, None
     
     df = load_and_validate_data(file_path)
     if df is None:
         print("Failed to load data. Please check the file path.")
-        return
+        return None
     
     # Preprocess the data
-    df_processed, service_attributes = preprocess_airline_data(df)
+    # the raw frame is not used afterwards, so it is cleaned in place
+    df_processed, service_attributes = preprocess_airline_data(df, copy=False)
     if df_processed is None:
         print("Failed to preprocess data.")
+        return None
+    return df_processed, service_attributes, None, None
+
+def build_dashboard(file_path=DEFAULT_DATA_PATH, precompute=False):
+    """
+    Load, preprocess and build the Dash app; returns None if the data cannot be used
+    The app reloads file_path when it changes once app.hot_reload.watch() is started
+    """
+    loaded = load_dataset(file_path)
+    if loaded is None:
+        return None
+    df_processed, service_attributes, polars_frame, partitions = loaded
+    return create_dash_app(df_processed, service_attributes, precompute=precompute,
+                           polars_frame=polars_frame, partitions=partitions, source=file_path)
+
+def main():
+    """
+    Main function to run the application
+    """
+    print("Starting Airline Satisfaction Analysis Dashboard...")
+    
+    # Load data and create the Dash app
+    app = build_dashboard(DEFAULT_DATA_PATH)
+    if app is None:
         return
+    # with debug=True the reloader runs the app in a child process; only warm up and
+    # watch the data file there
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        app.warmup.start()
+        app.hot_reload.watch()
     
-    # Create and run the Dash app
-    app = create_dash_app(df_processed, service_attributes)
     print("\n=== STARTING DASH SERVER ===")
     print("Dashboard will be available at: http://127.0.0.1:8050/")
     print("Press Ctrl+C to stop the server")
     app.run(debug=True)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,71 @@
+"""
+Render a static HTML (and PNG) report with a page per subgroup value, e.g.
+
+    python report.py --output report
+    python report.py --output report --png --workers 8 --batch-results batch_results
+
+Every page holds the radar, distribution, service factor and customer segment charts for
+its subgroup. Each figure is built once and the pages are rendered on one process per
+CPU. Rerunning into the same directory only rewrites the pages whose charts changed
+(content hashes in report_manifest.json); --force rewrites everything.
+"""
+import argparse
+import sys
+
+from modules.Batch import BATCH_RESULTS, load_matching_batch_results, batch_cluster_counts, batch_rf_results
+from modules.Report import build_report_figures, render_report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Render the static subgroup report')
+    parser.add_argument('--data', default='dataset/data2.csv', help='survey file or partitioned dataset directory')
+    parser.add_argument('--output', default='report', help='bundle directory')
+    parser.add_argument('--sample-size', type=int, default=5000, help='rows the charts are drawn from, -1 for all')
+    parser.add_argument('--group-cols', default='', help='comma separated subgroup columns (default: the dashboard\'s)')
+    parser.add_argument('--batch-results', default=BATCH_RESULTS,
+                        help='batch.py output to take Random Forest results and k from (default: AIRLINE_BATCH_RESULTS)')
+    parser.add_argument('--png', action='store_true', help='also export every chart as PNG (needs kaleido)')
+    parser.add_argument('--workers', type=int, default=None, help='render processes (default: one per CPU)')
+    parser.add_argument('--force', action='store_true', help='rewrite artifacts even when unchanged')
+    args = parser.parse_args(argv)
+    if args.png:
+        try:
+            import kaleido  # noqa: F401
+        except ImportError:
+            print("--png needs kaleido; install it or leave out --png")
+            return 2
+
+    from project import load_dataset, dataset_fingerprint, subgroup_options_for
+    from modules.Partitions import partition_keys
+    loaded = load_dataset(args.data)
+    if loaded is None:
+        return 2
+    df, service_attributes, _, partitions = loaded
+
+    if args.group_cols:
+        group_cols = [col.strip() for col in args.group_cols.split(',') if col.strip()]
+    else:
+        keys = partition_keys(partitions[0]) if partitions else ()
+        group_cols = [option['value'] for option in subgroup_options_for(df, keys)]
+    missing = [col for col in group_cols if col not in df.columns]
+    if missing:
+        print(f"Unknown subgroup columns: {missing}")
+        return 2
+
+    # cached models from a batch run on the same data: no Random Forest training, no k sweep
+    rf_results, cluster_k = None, None
+    tables = load_matching_batch_results(args.batch_results, dataset_fingerprint(df)) if args.batch_results else None
+    if tables:
+        rf_results = batch_rf_results(tables, service_attributes)
+        counts = batch_cluster_counts(tables, len(df))
+        cluster_k = counts.get(args.sample_size if 0 < args.sample_size < len(df) else -1)
+
+    figures, subgroups = build_report_figures(df, service_attributes, group_cols, args.sample_size,
+                                              rf_results=rf_results, cluster_k=cluster_k)
+    render_report(figures, subgroups, args.output, png=args.png, workers=args.workers, force=args.force)
+    print(f"Report written to {args.output}/index.html")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
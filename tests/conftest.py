@@ -0,0 +1,49 @@
+import io
+import os
+import sys
+import tempfile
+import contextlib
+import pytest
+
+# oversized figures fail the tests instead of only being logged
+os.environ.setdefault('AIRLINE_PAYLOAD_STRICT', '1')
+# the app fixture serves from a throwaway cache, without warm-up or file watching
+os.environ.setdefault('AIRLINE_WARMUP', 'off')
+os.environ.setdefault('AIRLINE_RELOAD_INTERVAL', '0')
+os.environ.setdefault('AIRLINE_CACHE_DIR', tempfile.mkdtemp(prefix='airline-tests-'))
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DATA_PATH = os.path.join(ROOT, 'dataset', 'data2.csv')
+GROUP_COLS = ['Gender', 'Customer Type', 'Age_Group', 'Class', 'Type of Travel', 'Travel_Experience']
+SAMPLE_SIZES = [1000, 5000, -1]
+
+
+def sample(df, sample_size):
+    """
+    The rows the dashboard callbacks draw for a sample size
+    """
+    return df.sample(n=sample_size, random_state=42) if 0 < sample_size < len(df) else df
+
+
+@pytest.fixture(scope='session')
+def survey():
+    """
+    The bundled survey preprocessed as the dashboard loads it: (frame, service attributes)
+    """
+    from project import load_and_validate_data
+    from preprocess import preprocess_airline_data
+    with contextlib.redirect_stdout(io.StringIO()):
+        return preprocess_airline_data(load_and_validate_data(DATA_PATH))
+
+
+@pytest.fixture(scope='session')
+def app(survey):
+    """
+    The dashboard on 3,000 rows of the survey
+    """
+    from project import create_dash_app
+    df, service_attributes = survey
+    with contextlib.redirect_stdout(io.StringIO()):
+        return create_dash_app(sample(df, 3000), service_attributes)
@@ -0,0 +1,46 @@
+import random
+from conftest import sample
+from modules.Aggregates import get_group_values
+from modules.AggregateApi import encode_records, sort_histogram_records, summary_records
+from modules.Batch import RATINGS
+
+
+def test_histogram_records_sort_into_one_order(survey):
+    df, service_attributes = survey
+    sampled = sample(df, 1000)
+    group_cols = ['Class', 'Gender']
+    group_values = {group_col: get_group_values(df, group_col) for group_col in group_cols}
+    # modules.Batch writes the counts value by value, in whatever order the workers finish
+    batch = []
+    for group_col in group_cols:
+        for value in get_group_values(sampled, group_col):
+            subgroup = sampled[sampled[group_col] == value]
+            for attr in service_attributes:
+                counts = subgroup[attr].value_counts()
+                batch += [{'group_col': group_col, 'value': value, 'sample_size': 1000, 'attribute': attr,
+                           'rating': rating, 'count': int(counts.get(rating, 0))} for rating in RATINGS]
+    shuffled = batch[:]
+    random.Random(0).shuffle(shuffled)
+
+    records = sort_histogram_records(shuffled, group_cols, group_values, service_attributes)
+    assert encode_records(records, 'json') == \
+        encode_records(sort_histogram_records(batch, group_cols, group_values, service_attributes), 'json')
+    assert [(r['group_col'], r['value'], r['attribute'], r['rating']) for r in records] == \
+        [(group_col, value, attr, rating) for group_col in group_cols for value in group_values[group_col]
+         for attr in service_attributes for rating in RATINGS]
+
+    attr = service_attributes[0]
+    for record in records:
+        if record['group_col'] == 'Class' and record['attribute'] == attr:
+            expected = ((sampled['Class'] == record['value']) & (sampled[attr] == record['rating'])).sum()
+            assert record['count'] == expected
+    assert sum(r['count'] for r in records if r['group_col'] == 'Gender' and r['attribute'] == attr) == len(sampled)
+
+
+def test_summary_labels_are_plain_text():
+    aggregates = {'samples': {'-1': {'groups': {'satisfaction': {
+        'values': ['neutral or dissatisfied', 'satisfied'], 'labels': ['Neut.<br>or<br>Dissat.', 'Sat.'],
+        'n': [3, 1], 'satisfied': [0, 1], 'service_sum': [6.0, 4.0]}}}}}
+    records = summary_records(aggregates, ['satisfaction'], -1)
+    assert [r['label'] for r in records] == ['Neut. or Dissat.', 'Sat.']
+    assert records[0]['service_mean'] == 2.0 and records[1]['satisfaction_rate'] == 100
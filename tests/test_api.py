@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+from modules.NeighborIndex import PassengerNeighborIndex, MAX_BATCH_IDS
+
+
+@pytest.fixture(scope='module')
+def client(app):
+    return app.server.test_client()
+
+
+@pytest.fixture(scope='module')
+def passenger_ids(app):
+    return app.hot_reload.current().df['id'].tolist()
+
+
+def test_similar_passengers_exclude_the_passenger(client, passenger_ids):
+    response = client.get(f'/api/passengers/{passenger_ids[0]}/similar?k=5')
+    assert response.status_code == 200
+    result = response.get_json()
+    assert result['passenger_id'] == passenger_ids[0]
+    distances = [n['distance'] for n in result['neighbors']]
+    assert len(distances) == 5 and distances == sorted(distances)
+    assert passenger_ids[0] not in [n['passenger_id'] for n in result['neighbors']]
+
+
+def test_duplicate_passengers_still_exclude_themselves():
+    # three identical vectors: the query row is dropped whichever of them the tree returns first
+    index = PassengerNeighborIndex(np.array([[0.0, 0.0]] * 3 + [[5.0, 5.0]]), [10, 11, 12, 13]).build()
+    for result in index.query_batch([10, 11, 12], k=2):
+        assert result['passenger_id'] not in [n['passenger_id'] for n in result['neighbors']]
+        assert [n['distance'] for n in result['neighbors']] == [0.0, 0.0]
+    assert index.query_batch([], k=2) == []
+
+
+@pytest.mark.parametrize('query, status', [('k=0', 400), ('k=abc', 400), ('k=1000', 400)])
+def test_similar_passengers_validate_k(client, passenger_ids, query, status):
+    assert client.get(f'/api/passengers/{passenger_ids[0]}/similar?{query}').status_code == status
+
+
+def test_unknown_passenger_is_404(client, passenger_ids):
+    assert client.get(f'/api/passengers/{max(passenger_ids) + 1}/similar').status_code == 404
+
+
+@pytest.mark.parametrize('body', [None, [1, 2], {'ids': []}, {'ids': 'x'}, {'ids': [True]}, {'ids': [[1]]},
+                                  {'ids': [1] * (MAX_BATCH_IDS + 1)}, {'ids': [1], 'k': 0}])
+def test_batch_query_rejects_malformed_bodies(client, body):
+    response = client.post('/api/passengers/similar', json=body) if body is not None else \
+        client.post('/api/passengers/similar', data='not json', content_type='application/json')
+    assert response.status_code == 400
+
+
+def test_batch_query(client, passenger_ids):
+    response = client.post('/api/passengers/similar', json={'ids': passenger_ids[:3], 'k': 2})
+    assert response.status_code == 200
+    assert [result['passenger_id'] for result in response.get_json()] == passenger_ids[:3]
+    assert client.post('/api/passengers/similar', json={'ids': [-1]}).status_code == 404
+
+
+def test_reload_over_the_api_needs_a_token(client, app):
+    assert client.post('/api/reload').status_code == 403
+    assert client.get('/api/reload').get_json()['version'] == app.hot_reload.current().data_version
+
+
+def test_aggregate_tables_revalidate_with_etags(client):
+    response = client.get('/api/aggregates/subgroups?group_col=Customer Type&sample_size=1000')
+    assert response.status_code == 200
+    records = response.get_json()
+    assert [record['label'] for record in records] == ['Loyal', 'Disloyal']
+    assert sum(record['n'] for record in records) == 1000
+
+    etag = response.headers['ETag']
+    again = client.get(response.request.full_path, headers={'If-None-Match': etag})
+    assert again.status_code == 304 and again.get_data() == b''
+
+
+@pytest.mark.parametrize('path, status', [
+    ('/api/aggregates/unknown', 404),
+    ('/api/aggregates/subgroups?group_col=nope', 404),
+    ('/api/aggregates/subgroups?sample_size=7', 400),
+    ('/api/aggregates/subgroups?format=xml', 400),
+    # histograms are only served from batch results
+    ('/api/aggregates/histograms?group_col=Class', 503)
+])
+def test_aggregate_table_errors(client, path, status):
+    assert client.get(path).status_code == status
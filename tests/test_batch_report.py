@@ -0,0 +1,64 @@
+import io
+import os
+import contextlib
+import pytest
+from conftest import sample
+from modules.Batch import (run_batch, write_batch_results, load_batch_results, batch_rf_results,
+                           batch_cluster_counts, RATINGS)
+from modules.Report import build_report_figures, render_report, page_path
+
+
+@pytest.fixture(scope='module')
+def batch(survey):
+    df, service_attributes = survey
+    sampled = sample(df, 1000)
+    with contextlib.redirect_stdout(io.StringIO()):
+        tables, summaries = run_batch(sampled, service_attributes, ['Class'], [-1], workers=1)
+    return sampled, service_attributes, tables, summaries
+
+
+def test_batch_counts_match_the_rows(batch):
+    sampled, service_attributes, tables, summaries = batch
+    counts = sampled['Class'].value_counts()
+    assert {row['value']: row['n'] for row in tables['subgroups']} == counts.to_dict()
+    for row in tables['subgroups']:
+        subgroup = sampled[sampled['Class'] == row['value']]
+        assert row['satisfied'] == (subgroup['satisfaction'] == 'satisfied').sum()
+        assert row['accuracy'] is not None
+
+    attr = service_attributes[0]
+    for value, n in counts.items():
+        rows = [row for row in tables['rating_distributions'] if row['value'] == value and row['attribute'] == attr]
+        assert [row['rating'] for row in rows] == list(RATINGS) and sum(row['count'] for row in rows) == n
+    assert sum(row['count'] for row in tables['cluster_shares']) == len(sampled)
+    assert summaries['-1']['total']['n'] == len(sampled)
+
+
+def test_batch_results_round_trip(batch, tmp_path):
+    _, service_attributes, tables, _ = batch
+    write_batch_results(str(tmp_path), {'data_version': 'v1'}, tables)
+    manifest, loaded = load_batch_results(str(tmp_path))
+    assert manifest['data_version'] == 'v1' and manifest['format'] == 'json'
+    assert loaded['rating_distributions'] == tables['rating_distributions']
+    assert set(batch_rf_results(loaded, service_attributes)) == \
+        {('Class', -1, row['value']) for row in tables['subgroups']}
+
+
+def test_report_only_rewrites_what_changed(batch, tmp_path):
+    sampled, service_attributes, tables, _ = batch
+    output = str(tmp_path / 'report')
+    with contextlib.redirect_stdout(io.StringIO()):
+        figures, subgroups = build_report_figures(
+            sampled, service_attributes, ['Class'], sample_size=-1,
+            rf_results=batch_rf_results(tables, service_attributes),
+            cluster_k=batch_cluster_counts(tables, len(sampled))[-1])
+        first = render_report(figures, subgroups, output, workers=1)
+        second = render_report(figures, subgroups, output, workers=1)
+        third = render_report(figures, subgroups[1:], output, workers=1)
+
+    pages = [page_path(group_col, value).replace(os.sep, '/') for group_col, value in subgroups]
+    assert sorted(first['rendered']) == sorted(pages)
+    assert second['rendered'] == [] and sorted(second['skipped']) == sorted(pages)
+    assert third['removed'] == [pages[0]] and not os.path.exists(os.path.join(output, pages[0]))
+    for name in ('index.html', 'plotly.min.js', 'report_manifest.json', pages[1]):
+        assert os.path.exists(os.path.join(output, name))
@@ -0,0 +1,115 @@
+import io
+import time
+import contextlib
+import diskcache
+import pytest
+from modules.HotReload import (DashboardState, StateHolder, LOCK_KEY, FAILED_KEY, PUBLISHED_KEY, SERVING_KEY,
+                               source_fingerprint)
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / 'survey.csv'
+    path.write_text('v1')
+    # versions are written with a newline, so a rewrite changes the size even within one mtime tick
+    return path
+
+
+@pytest.fixture
+def cache(tmp_path):
+    with diskcache.Cache(str(tmp_path / 'cache')) as cache:
+        yield cache
+
+
+def holder(source, cache, rebuild=None, version='v1'):
+    rebuilds = []
+
+    def default_rebuild():
+        rebuilds.append(source.read_text().strip())
+        return DashboardState(data_version=source.read_text().strip())
+    h = StateHolder(DashboardState(data_version=version), rebuild=rebuild or default_rebuild, source=str(source),
+                    interval=0, cache=cache, adopt=lambda published: DashboardState(data_version=published['data_version']))
+    h.rebuilds = rebuilds
+    return h
+
+
+def run(h, method, *args):
+    # the reload runs in the caller's thread, as the background thread would run it
+    with contextlib.redirect_stdout(io.StringIO()):
+        method(*args)
+        if h._reload_thread is not None:
+            h._reload_thread.join()
+
+
+def test_swap_keeps_the_replaced_state_for_pages_still_on_it(source, cache):
+    h = holder(source, cache)
+    h.swap(DashboardState(data_version='v2'))
+    assert h.current().data_version == 'v2'
+    assert h.for_version('v1').data_version == 'v1' and h.for_version('v2') is h.current()
+    h.swap(DashboardState(data_version='v3'))
+    assert h.for_version('v1') is None
+
+
+def test_leader_rebuilds_and_publishes_followers_adopt(source, cache):
+    leader, follower = holder(source, cache), holder(source, cache)
+    source.write_text('v2\n')
+    fingerprint = source_fingerprint(str(source))
+
+    run(leader, leader._check, fingerprint, fingerprint)
+    assert leader.current().data_version == 'v2' and leader.rebuilds == ['v2']
+    assert cache.get(PUBLISHED_KEY)['data_version'] == 'v2' and cache.get(LOCK_KEY) is None
+
+    run(follower, follower._check, fingerprint, fingerprint)
+    assert follower.current().data_version == 'v2' and follower.rebuilds == []
+
+
+def test_no_rebuild_while_another_process_holds_the_lock(source, cache):
+    h = holder(source, cache)
+    cache.set(LOCK_KEY, 'another process')
+    source.write_text('v2\n')
+    fingerprint = source_fingerprint(str(source))
+    run(h, h._check, fingerprint, fingerprint)
+    assert h.reload() is False
+    assert h.rebuilds == [] and h.current().data_version == 'v1'
+
+
+def test_a_source_that_failed_is_skipped_until_it_changes(source, cache):
+    calls = []
+
+    def broken_rebuild():
+        calls.append(source.read_text())
+        raise ValueError('unreadable')
+    h = holder(source, cache, rebuild=broken_rebuild)
+    source.write_text('garbage')
+    fingerprint = source_fingerprint(str(source))
+    run(h, h._check, fingerprint, fingerprint)
+    assert calls == ['garbage'] and h.current().data_version == 'v1'
+    assert cache.get(FAILED_KEY)['fingerprint'] == fingerprint and h.status()['last_error'] == 'unreadable'
+
+    run(h, h._check, fingerprint, fingerprint)
+    assert calls == ['garbage']
+
+    source.write_text('v2 fixed')
+    fingerprint = source_fingerprint(str(source))
+    run(h, h._check, fingerprint, fingerprint)
+    assert calls == ['garbage', 'v2 fixed']
+
+
+def test_a_changing_file_waits_for_two_equal_checks(source, cache):
+    h = holder(source, cache)
+    source.write_text('v2\n')
+    run(h, h._check, source_fingerprint(str(source)), None)
+    assert h.rebuilds == []
+
+
+def test_pages_move_only_to_a_version_every_process_holds(source, cache):
+    h = holder(source, cache)
+    h.swap(DashboardState(data_version='v2'))
+    serving = cache.get(SERVING_KEY)
+    serving[-1] = ({'v1'}, time.time() + 60)
+    cache.set(SERVING_KEY, serving)
+    assert not h.served_everywhere('v2') and h.page_state().data_version == 'v1'
+
+    serving[-1] = ({'v1', 'v2'}, time.time() + 60)
+    cache.set(SERVING_KEY, serving)
+    assert h.served_everywhere('v2') and h.page_state().data_version == 'v2'
@@ -0,0 +1,36 @@
+import io
+import contextlib
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import DATA_PATH, GROUP_COLS
+from modules.Aggregates import compute_summary_aggregates, merge_summary_aggregates
+from modules.Partitions import PartitionedData, write_partition
+
+
+@pytest.mark.parametrize('n_blocks', [1, 3, 7])
+def test_merged_block_aggregates_match_direct(survey, n_blocks):
+    df, _ = survey
+    bounds = np.linspace(0, len(df), n_blocks + 1).astype(int)
+    parts = [compute_summary_aggregates(df.iloc[start:stop], GROUP_COLS, digits=None)
+             for start, stop in zip(bounds[:-1], bounds[1:])]
+    assert merge_summary_aggregates(parts, GROUP_COLS) == compute_summary_aggregates(df, GROUP_COLS)
+
+
+@pytest.fixture(scope='module')
+def partitioned(tmp_path_factory):
+    from project import load_dataset
+    root = tmp_path_factory.mktemp('partitioned')
+    raw = pd.read_csv(DATA_PATH)
+    bounds = np.linspace(0, len(raw), 4).astype(int)
+    for i, (start, stop) in enumerate(zip(bounds[:-1], bounds[1:])):
+        write_partition(raw.iloc[start:stop], str(root), {'quarter': f'2024Q{i + 1}'})
+    with contextlib.redirect_stdout(io.StringIO()):
+        df, _, _, (partitions, ranges) = load_dataset(str(root))
+    return PartitionedData(df, partitions, ranges)
+
+
+@pytest.mark.parametrize('scope', [(), ('quarter=2024Q2',), ('quarter=2024Q1', 'quarter=2024Q3')])
+def test_partition_aggregates_match_direct(partitioned, scope):
+    assert partitioned.summary_aggregates(GROUP_COLS, scope) == \
+        compute_summary_aggregates(partitioned.frame(scope), GROUP_COLS)
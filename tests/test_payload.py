@@ -0,0 +1,37 @@
+import io
+import contextlib
+import pytest
+from modules import Payload
+from modules.Metrics import render_prometheus
+from modules.Payload import figure_budget, PayloadBudgetError, FIGURE_BYTE_BUDGETS
+
+
+def figure_of(n_bytes):
+    return {'data': [], 'layout': {'title': {'text': 'x' * n_bytes}}}
+
+
+@figure_budget('radar_chart')
+def build(n_bytes):
+    return figure_of(n_bytes)
+
+
+def test_figures_within_budget_pass():
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert build(100)['layout']['title']['text'] == 'x' * 100
+
+
+def test_strict_budgets_raise():
+    assert Payload.PAYLOAD_STRICT
+    with contextlib.redirect_stdout(io.StringIO()), pytest.raises(PayloadBudgetError):
+        build(FIGURE_BYTE_BUDGETS['radar_chart'])
+
+
+def test_servers_send_oversized_figures_and_count_them(monkeypatch):
+    monkeypatch.setattr(Payload, 'PAYLOAD_STRICT', False)
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        fig = build(FIGURE_BYTE_BUDGETS['radar_chart'])
+        fig_in_tuple, accuracy = figure_budget('radar_chart')(lambda: (figure_of(20_000), 0.9))()
+    assert len(fig['layout']['title']['text']) == FIGURE_BYTE_BUDGETS['radar_chart'] and accuracy == 0.9
+    assert f"over its {FIGURE_BYTE_BUDGETS['radar_chart']:,} byte budget" in output.getvalue()
+    assert 'airline_payload_over_budget_total{figure="radar_chart"}' in render_prometheus()
@@ -0,0 +1,35 @@
+import pandas as pd
+import pytest
+from conftest import DATA_PATH, GROUP_COLS, SAMPLE_SIZES, sample
+from modules.Aggregates import build_aggregate_store, compute_summary_aggregates
+
+pytest.importorskip('polars')
+from modules.PolarsBackend import build_aggregate_store as build_polars_aggregate_store  # noqa: E402
+from modules.PolarsBackend import collect_survey, sample_lazy, summary_aggregates, to_pandas  # noqa: E402
+
+
+@pytest.fixture(scope='module')
+def polars_survey():
+    return collect_survey(DATA_PATH)
+
+
+def test_to_pandas_matches_preprocess_airline_data(survey, polars_survey):
+    df, service_attributes = survey
+    frame, polars_attributes = polars_survey
+    assert polars_attributes == service_attributes
+    pd.testing.assert_frame_equal(to_pandas(frame), df)
+
+
+@pytest.mark.parametrize('sample_size', SAMPLE_SIZES)
+def test_summary_aggregates_match_pandas(survey, polars_survey, sample_size):
+    df, _ = survey
+    frame, _ = polars_survey
+    assert summary_aggregates(sample_lazy(frame.lazy(), sample_size), GROUP_COLS) == \
+        compute_summary_aggregates(sample(df, sample_size), GROUP_COLS)
+
+
+def test_aggregate_store_matches_pandas(survey, polars_survey):
+    df, _ = survey
+    frame, _ = polars_survey
+    assert build_polars_aggregate_store(frame.lazy(), GROUP_COLS, SAMPLE_SIZES) == \
+        build_aggregate_store(df, GROUP_COLS, SAMPLE_SIZES)
@@ -0,0 +1,55 @@
+import pandas as pd
+import pytest
+from conftest import DATA_PATH, GROUP_COLS, SAMPLE_SIZES, sample
+from modules.Aggregates import compute_summary_aggregates
+from modules.SqlStore import SurveyStore
+
+
+@pytest.fixture(scope='module')
+def store(survey, tmp_path_factory):
+    df, _ = survey
+    return SurveyStore.build(df, path=str(tmp_path_factory.mktemp('sql') / 'survey.db'), engine='sqlite',
+                             group_cols=GROUP_COLS)
+
+
+@pytest.mark.parametrize('sample_size', SAMPLE_SIZES)
+def test_summary_aggregates_match_pandas(survey, store, sample_size):
+    df, _ = survey
+    assert store.summary_aggregates(GROUP_COLS, sample_size) == compute_summary_aggregates(sample(df, sample_size), GROUP_COLS)
+
+
+@pytest.mark.parametrize('sample_size', SAMPLE_SIZES)
+def test_fetch_returns_the_dataframe_sample(survey, store, sample_size):
+    df, _ = survey
+    pd.testing.assert_frame_equal(store.fetch(sample_size=sample_size), sample(df, sample_size), check_dtype=False)
+
+
+@pytest.mark.parametrize('sample_size', SAMPLE_SIZES)
+def test_filtered_fetch_matches_pandas_filter(survey, store, sample_size):
+    df, _ = survey
+    sampled = sample(df, sample_size)
+    columns = [c for c in df.columns if c in ('Age', 'Class', 'satisfaction')]
+    expected = sampled[sampled['Class'] == 'Eco'][columns]
+    fetched = store.fetch(columns, sample_size=sample_size, filters={'Class': 'Eco'})
+    pd.testing.assert_frame_equal(fetched, expected, check_dtype=False)
+
+
+@pytest.mark.parametrize('sample_size', SAMPLE_SIZES)
+def test_group_means_match_pandas(survey, store, sample_size):
+    df, service_attributes = survey
+    sampled = sample(df, sample_size)
+    means, sizes = store.group_means('Class', service_attributes, sample_size)
+    grouped = sampled.groupby('Class', observed=True)
+    pd.testing.assert_frame_equal(means.sort_index(), grouped[service_attributes].mean().sort_index(),
+                                  check_names=False, check_index_type=False)
+    assert sizes.sort_index().tolist() == grouped.size().sort_index().tolist()
+
+
+def test_from_csv_matches_preprocessing_the_whole_file(survey, tmp_path):
+    df, _ = survey
+    chunked = SurveyStore.from_csv(DATA_PATH, path=str(tmp_path / 'chunked.db'), engine='sqlite',
+                                   chunk_rows=5000, group_cols=GROUP_COLS)
+    assert chunked.n_rows == len(df)
+    for sample_size in SAMPLE_SIZES:
+        assert chunked.summary_aggregates(GROUP_COLS, sample_size) == \
+            compute_summary_aggregates(sample(df, sample_size), GROUP_COLS)
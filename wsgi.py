@@ -0,0 +1,38 @@
+"""
+Production entry point for a multi-process WSGI server, e.g.
+
+    gunicorn -c gunicorn.conf.py wsgi:server
+
+Everything is loaded and fitted at import time. With preload_app the master
+process imports this module once and forks the workers afterwards, so the
+preprocessed frame and the fitted models are shared copy-on-write instead of
+being rebuilt in every worker.
+"""
+import gc
+import os
+
+from project import build_dashboard, DEFAULT_DATA_PATH
+
+app = build_dashboard(os.environ.get('AIRLINE_DATA_PATH', DEFAULT_DATA_PATH), precompute=True)
+if app is None:
+    raise RuntimeError("Dashboard could not be built; check AIRLINE_DATA_PATH")
+server = app.server
+
+# precompute figures for the default and most used combinations before the workers
+# fork, so they start with a full cache and the shared pages hold the fitted models; run
+# synchronously: a thread still inside a k-means or RF fit (OpenMP, SQLite locks) at fork
+# time would leave its held locks to the workers
+if app.warmup.tasks:
+    app.warmup.run()
+
+# Move everything built so far into the permanent generation: the cyclic GC
+# in the workers then never walks (and so never writes to) these objects,
+# which keeps their memory pages shared with the master
+gc.collect()
+gc.freeze()
+
+# each worker watches the data file itself (threads do not survive the fork), see
+# post_fork in gunicorn.conf.py; one of them rebuilds a changed file and the others adopt
+# its version, coordinated through the shared cache; without gunicorn this process watches it
+if 'gunicorn' not in os.environ.get('SERVER_SOFTWARE', ''):
+    app.hot_reload.watch()